@@ -2,39 +2,40 @@
 
 from __future__ import annotations
 
+from functools import partial
 import logging
 
-from homeassistant.config_entries import ConfigEntryState
-from homeassistant.const import CONF_HOST, CONF_PORT
-from homeassistant.core import HomeAssistant, ServiceCall, callback
-from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
-from homeassistant.helpers import config_validation as cv
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_TIMEOUT
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.typing import ConfigType
-import voluptuous as vol
 
-from .const import DEFAULT_PORT, DOMAIN, NUM_PRESETS, PLATFORMS
+from .autoroute import AUTO_ROUTES_SCHEMA, AutoRouteEngine, AutoRouteRule
+from .const import (
+    CONF_AUTO_ROUTES,
+    CONF_COMPACT,
+    CONF_TRACE_SIZE,
+    DEFAULT_PORT,
+    DEFAULT_TIMEOUT,
+    DEFAULT_TRACE_SIZE,
+    PLATFORMS,
+)
 from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
 from .device import GofancoProphecyClient, ProphecyError
+from .history import RoutingHistory
+from .presets import PresetIndex
+from .services import async_setup_services
+from .transport import TransportOptions
+from .websocket_api import async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
-SERVICE_SAVE_PRESET = "save_preset"
-ATTR_ENTRY_ID = "entry_id"
-ATTR_INDEX = "index"
-
-_SAVE_PRESET_SCHEMA = vol.Schema(
-    {
-        vol.Optional(ATTR_ENTRY_ID): cv.string,
-        vol.Required(ATTR_INDEX): vol.All(
-            vol.Coerce(int), vol.Range(min=1, max=NUM_PRESETS)
-        ),
-    }
-)
-
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
-    """Register the integration-wide save_preset service."""
-    _register_services(hass)
+    """Register the integration-wide services and WebSocket commands."""
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
     return True
 
 
@@ -43,25 +44,52 @@ async def async_setup_entry(hass: HomeAssistant, entry: ProphecyConfigEntry) ->
     host: str = entry.data[CONF_HOST]
     port: int = entry.data.get(CONF_PORT, DEFAULT_PORT)
 
-    client = GofancoProphecyClient(host, port)
+    client = GofancoProphecyClient(
+        host,
+        port,
+        timeout=entry.options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT),
+        trace_size=entry.options.get(CONF_TRACE_SIZE, DEFAULT_TRACE_SIZE),
+        transport=TransportOptions.from_options(entry.options),
+    )
     coordinator = ProphecyDataUpdateCoordinator(hass, entry, client, _LOGGER)
 
     try:
         await coordinator.async_config_entry_first_refresh()
     except ProphecyError as err:
         raise ConfigEntryNotReady(str(err)) from err
+    # Best effort: the names refresh on their own schedule if this fails.
+    await coordinator.preset_names_coordinator.async_refresh()
 
     entry.runtime_data = coordinator
 
+    compact: bool = entry.options.get(CONF_COMPACT, False)
+    _async_remove_other_mode_entities(hass, entry, compact)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    engine = AutoRouteEngine(hass, coordinator, _auto_route_rules(entry))
+    engine.async_start()
+    entry.async_on_unload(engine.async_stop)
+    entry.async_on_unload(
+        entry.add_update_listener(
+            partial(_async_update_listener, engine=engine, compact=compact)
+        )
+    )
 
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ProphecyConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+    await entry.runtime_data.history.async_close()
+    return True
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ProphecyConfigEntry) -> None:
+    """Delete the routing history and preset contents of a removed entry."""
+    await RoutingHistory(hass, entry.entry_id).async_remove()
+    await PresetIndex(hass, entry.entry_id).async_remove()
 
 
 async def async_migrate_entry(hass: HomeAssistant, entry: ProphecyConfigEntry) -> bool:
@@ -79,54 +107,48 @@ async def async_migrate_entry(hass: HomeAssistant, entry: ProphecyConfigEntry) -
     return True
 
 
-async def _async_update_listener(
-    hass: HomeAssistant, entry: ProphecyConfigEntry
+@callback
+def _async_remove_other_mode_entities(
+    hass: HomeAssistant, entry: ProphecyConfigEntry, compact: bool
 ) -> None:
-    """Reload integration when options or data change."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Drop registry entries left over from the other entity mode.
 
+    Every platform is forwarded in both modes (they simply add nothing in
+    compact mode), so only the registry needs tidying after a switch.
+    """
+    registry = er.async_get(hass)
+    matrix_unique_id = f"{entry.entry_id}_matrix"
+    for registry_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        if (registry_entry.unique_id == matrix_unique_id) != compact:
+            registry.async_remove(registry_entry.entity_id)
 
-@callback
-def _register_services(hass: HomeAssistant) -> None:
-    """Register global services once per HA startup."""
-    if hass.services.has_service(DOMAIN, SERVICE_SAVE_PRESET):
-        return
 
-    async def _handle_save_preset(call: ServiceCall) -> None:
-        coordinator = _pick_coordinator(hass, call.data.get(ATTR_ENTRY_ID))
-        index: int = call.data[ATTR_INDEX]
-        try:
-            await coordinator.client.async_save_preset(index)
-        except ProphecyError as err:
-            raise HomeAssistantError(f"Failed to save preset {index}: {err}") from err
-        await coordinator.async_reload_presets()
-
-    hass.services.async_register(
-        DOMAIN,
-        SERVICE_SAVE_PRESET,
-        _handle_save_preset,
-        schema=_SAVE_PRESET_SCHEMA,
-    )
+def _auto_route_rules(entry: ProphecyConfigEntry) -> list[AutoRouteRule]:
+    """Return the auto-route rules configured on the entry."""
+    rules = AUTO_ROUTES_SCHEMA(entry.options.get(CONF_AUTO_ROUTES, []))
+    return [AutoRouteRule.from_config(rule) for rule in rules]
 
 
-def _pick_coordinator(
-    hass: HomeAssistant, entry_id: str | None
-) -> ProphecyDataUpdateCoordinator:
-    """Resolve which matrix's coordinator to act on."""
-    loaded: list[ProphecyConfigEntry] = [
-        entry
-        for entry in hass.config_entries.async_entries(DOMAIN)
-        if entry.state is ConfigEntryState.LOADED
-    ]
-    if entry_id is not None:
-        for entry in loaded:
-            if entry.entry_id == entry_id:
-                return entry.runtime_data
-        raise HomeAssistantError(f"No loaded HDMI Matrix entry with id {entry_id}")
-    if not loaded:
-        raise HomeAssistantError("No HDMI Matrix entries are loaded")
-    if len(loaded) > 1:
-        raise HomeAssistantError(
-            "Multiple HDMI Matrix entries are loaded; pass entry_id to choose one"
-        )
-    return loaded[0].runtime_data
+async def _async_update_listener(
+    hass: HomeAssistant,
+    entry: ProphecyConfigEntry,
+    *,
+    engine: AutoRouteEngine,
+    compact: bool,
+) -> None:
+    """Apply changed options live; reload only for structural changes.
+
+    A reload tears down every entity and blocks on a first refresh, so
+    tuning options are pushed into the running client, coordinator and
+    auto-route engine instead. A new device address or entity mode still
+    needs one.
+    """
+    client = entry.runtime_data.client
+    if (client.host, client.port) != (
+        entry.data[CONF_HOST],
+        entry.data.get(CONF_PORT, DEFAULT_PORT),
+    ) or compact != entry.options.get(CONF_COMPACT, False):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    entry.runtime_data.async_apply_options(entry.options)
+    engine.async_set_rules(_auto_route_rules(entry))
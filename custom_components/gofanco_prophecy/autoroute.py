@@ -0,0 +1,191 @@
+"""Built-in auto-routing: a source player starts playing, its input goes live.
+
+This replaces the ``auto_route_media`` blueprint, which needed one template
+automation per source and woke the automation engine for every state
+change of every player. Here each matrix holds its source-player → input
+rules (from the options flow), subscribes to exactly those players' state
+changes, and debounces: routes requested within
+``AUTO_ROUTE_DEBOUNCE_COOLDOWN`` are collected, re-checked against each
+player's state at the end of the window (so a player flapping
+playing → idle → playing routes once, and one that stopped does not route
+at all), and issued as one batch through the client, followed by a single
+refresh.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+from typing import Any
+
+from homeassistant.const import CONF_ENTITY_ID
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
+    HomeAssistant,
+    callback,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_state_change_event
+import voluptuous as vol
+
+from .const import AUTO_ROUTE_DEBOUNCE_COOLDOWN, NUM_INPUTS, NUM_OUTPUTS
+from .coordinator import ProphecyDataUpdateCoordinator
+from .device import ProphecyError
+
+_LOGGER = logging.getLogger(__name__)
+
+CONF_INPUT = "input"
+CONF_OUTPUTS = "outputs"
+CONF_STATES = "states"
+
+DEFAULT_TRIGGER_STATES = ["playing"]
+
+AUTO_ROUTES_SCHEMA = vol.Schema(
+    [
+        {
+            vol.Required(CONF_ENTITY_ID): cv.entity_domain("media_player"),
+            vol.Required(CONF_INPUT): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=NUM_INPUTS)
+            ),
+            vol.Required(CONF_OUTPUTS): vol.All(
+                cv.ensure_list,
+                [vol.All(vol.Coerce(int), vol.Range(min=1, max=NUM_OUTPUTS))],
+                vol.Length(min=1),
+            ),
+            vol.Optional(CONF_STATES, default=DEFAULT_TRIGGER_STATES): vol.All(
+                cv.ensure_list, [cv.string]
+            ),
+        }
+    ]
+)
+
+
+@dataclass(slots=True, frozen=True)
+class AutoRouteRule:
+    """Route `source` to `outputs` when `entity_id` enters one of `states`."""
+
+    entity_id: str
+    source: int
+    outputs: tuple[int, ...]
+    states: frozenset[str]
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> AutoRouteRule:
+        """Build a rule from one validated `AUTO_ROUTES_SCHEMA` item."""
+        return cls(
+            entity_id=config[CONF_ENTITY_ID],
+            source=config[CONF_INPUT],
+            outputs=tuple(config[CONF_OUTPUTS]),
+            states=frozenset(config[CONF_STATES]),
+        )
+
+
+class AutoRouteEngine:
+    """Route inputs to outputs as their source players start playing."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: ProphecyDataUpdateCoordinator,
+        rules: list[AutoRouteRule],
+    ) -> None:
+        """Initialize the engine; call `async_start` to begin listening."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._rules: dict[str, list[AutoRouteRule]] = {}
+        for rule in rules:
+            self._rules.setdefault(rule.entity_id, []).append(rule)
+        self._pending: dict[int, AutoRouteRule] = {}
+        self._debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=AUTO_ROUTE_DEBOUNCE_COOLDOWN,
+            immediate=False,
+            function=self._async_flush,
+        )
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Subscribe to state changes of the configured players only."""
+        if self._rules:
+            self._unsub = async_track_state_change_event(
+                self._hass, list(self._rules), self._async_player_changed
+            )
+
+    @callback
+    def async_set_rules(self, rules: list[AutoRouteRule]) -> None:
+        """Replace the rules, re-subscribing to the new set of players.
+
+        Routes still pending under the old rules are dropped.
+        """
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self._pending.clear()
+        self._debouncer.async_cancel()
+        self._rules = {}
+        for rule in rules:
+            self._rules.setdefault(rule.entity_id, []).append(rule)
+        self.async_start()
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe and drop anything not yet routed."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self._pending.clear()
+        self._debouncer.async_shutdown()
+
+    @callback
+    def _async_player_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Queue the routes of rules whose player just entered a trigger state."""
+        new_state = event.data["new_state"]
+        if new_state is None:
+            return
+        old_state = event.data["old_state"]
+        for rule in self._rules[event.data["entity_id"]]:
+            if new_state.state not in rule.states:
+                continue
+            if old_state is not None and old_state.state in rule.states:
+                continue
+            for output in rule.outputs:
+                # Last trigger wins when two players claim the same output.
+                self._pending[output] = rule
+        if self._pending:
+            self._debouncer.async_schedule_call()
+
+    async def _async_flush(self) -> None:
+        """Issue the routes still wanted at the end of the debounce window."""
+        pending, self._pending = self._pending, {}
+        routes: dict[int, int] = {}
+        for output, rule in pending.items():
+            state = self._hass.states.get(rule.entity_id)
+            if state is not None and state.state in rule.states:
+                routes[output] = rule.source
+        if not routes:
+            return
+
+        client = self._coordinator.client
+        try:
+            current = (await self._coordinator.async_get_state()).outputs
+            routes = {
+                output: source
+                for output, source in routes.items()
+                if current.get(output) != source
+            }
+            if not routes:
+                return
+            sources = set(routes.values())
+            if len(routes) == NUM_OUTPUTS and len(sources) == 1:
+                await client.async_set_all_outputs(sources.pop())
+            else:
+                for output, source in sorted(routes.items()):
+                    await client.async_set_output(output, source)
+        except ProphecyError as err:
+            _LOGGER.warning("Auto-route failed: %s", err)
+        await self._coordinator.async_request_refresh()
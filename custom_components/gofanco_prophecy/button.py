@@ -7,6 +7,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .const import CONF_COMPACT
 from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
 from .device import ProphecyError
 from .entity import ProphecyEntity
@@ -20,6 +21,8 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up button entities."""
+    if entry.options.get(CONF_COMPACT):
+        return
     async_add_entities([ProphecyMuteAllButton(entry.runtime_data)])
 
 
@@ -33,6 +36,10 @@ class ProphecyMuteAllButton(ProphecyEntity, ButtonEntity):
         super().__init__(coordinator, "mute_all")
         self._attr_suggested_object_id = "mute_all"
 
+    def _visible_state(self) -> object:
+        """Return nothing: a button's state is its last press."""
+        return None
+
     async def async_press(self) -> None:
         """Mute all outputs."""
         try:
@@ -0,0 +1,291 @@
+r"""Command-line latency and throughput profiler for Prophecy matrices.
+
+Characterises a matrix (or a stand-in for one) with nothing but the
+integration's own client, so a slow rack can be told apart from a slow
+Home Assistant::
+
+    python -m custom_components.gofanco_prophecy.cli 192.168.1.92
+    python -m custom_components.gofanco_prophecy.cli 192.168.1.92 \
+        --workload route-storm --count 500 --concurrency 4
+    python -m custom_components.gofanco_prophecy.cli --simulate --latency 0.04
+    python -m custom_components.gofanco_prophecy.cli --replay session.jsonl
+
+Workloads:
+
+- ``poll`` — state queries, the coordinator's steady-state traffic.
+- ``route-storm`` — single-output routes cycling through every output and
+  input, like a burst of service calls or an auto-route batch.
+- ``preset-cycle`` — recalls of presets 1 to 8 in turn.
+
+Each of ``--concurrency`` workers drives its own client, so the device sees
+that many connections at once (one client serialises its commands).
+Workloads that change routing restore the routing read at the start.
+Nothing here touches a running Home Assistant instance; only the package
+import needs Home Assistant to be installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from itertools import count as counter
+import json
+import math
+import sys
+import time
+from typing import Any
+
+from .const import DEFAULT_PORT, DEFAULT_TIMEOUT, NUM_INPUTS, NUM_OUTPUTS, NUM_PRESETS
+from .device import Exchange, GofancoProphecyClient, ProphecyError
+from .replay import ReplayExchange, load_session
+from .simulator import SimulatedMatrix
+
+WORKLOADS = ("poll", "route-storm", "preset-cycle")
+
+_PERCENTILES = (50, 90, 95, 99)
+
+type Operation = Callable[[GofancoProphecyClient, int], Awaitable[Any]]
+
+
+@dataclass(slots=True)
+class WorkloadReport:
+    """Latency, throughput and errors of one workload run."""
+
+    workload: str
+    concurrency: int
+    operations: int = 0
+    wall_time: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    errors: dict[str, int] = field(default_factory=dict)
+    restore_errors: dict[int, str] = field(default_factory=dict)
+    """Outputs whose starting routing could not be put back, with why."""
+
+    @property
+    def succeeded(self) -> int:
+        """Return the number of operations that completed without error."""
+        return self.operations - sum(self.errors.values())
+
+    @property
+    def throughput(self) -> float:
+        """Return operations (failed ones included) per second of wall time."""
+        return self.operations / self.wall_time if self.wall_time else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Return the nearest-rank latency percentile, in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report as JSON-serialisable data, latencies in ms."""
+        return {
+            "workload": self.workload,
+            "concurrency": self.concurrency,
+            "operations": self.operations,
+            "succeeded": self.succeeded,
+            "wall_time_s": round(self.wall_time, 3),
+            "throughput_ops_s": round(self.throughput, 2),
+            "latency_ms": {
+                **{
+                    f"p{percent}": round(self.percentile(percent) * 1000, 2)
+                    for percent in _PERCENTILES
+                },
+                "max": round(max(self.latencies, default=0.0) * 1000, 2),
+                "mean": round(
+                    sum(self.latencies) / len(self.latencies) * 1000
+                    if self.latencies
+                    else 0.0,
+                    2,
+                ),
+            },
+            "errors": dict(self.errors),
+            "restore_errors": {
+                str(output): error for output, error in self.restore_errors.items()
+            },
+        }
+
+
+async def _poll(client: GofancoProphecyClient, step: int) -> None:
+    await client.async_get_state()
+
+
+async def _route(client: GofancoProphecyClient, step: int) -> None:
+    output = step % NUM_OUTPUTS + 1
+    source = (step // NUM_OUTPUTS) % NUM_INPUTS + 1
+    await client.async_set_output(output, source)
+
+
+async def _recall(client: GofancoProphecyClient, step: int) -> None:
+    await client.async_recall_preset(step % NUM_PRESETS + 1)
+
+
+_OPERATIONS: dict[str, Operation] = {
+    "poll": _poll,
+    "route-storm": _route,
+    "preset-cycle": _recall,
+}
+
+
+async def async_run_workload(
+    make_client: Callable[[], GofancoProphecyClient],
+    workload: str,
+    *,
+    count: int,
+    concurrency: int = 1,
+) -> WorkloadReport:
+    """Run `count` operations of `workload` across `concurrency` clients.
+
+    Failures are counted per exception type rather than aborting the run.
+    Routing changed by the workload is put back afterwards when it could be
+    read beforehand.
+    """
+    operation = _OPERATIONS[workload]
+    report = WorkloadReport(workload=workload, concurrency=concurrency)
+    clients = [make_client() for _ in range(concurrency)]
+    original = None
+    if workload != "poll":
+        try:
+            original = (await clients[0].async_get_state()).outputs
+        except ProphecyError:
+            original = None
+    steps = counter()
+
+    async def _worker(client: GofancoProphecyClient) -> None:
+        while (step := next(steps)) < count:
+            started = time.perf_counter()
+            try:
+                await operation(client, step)
+            except ProphecyError as err:
+                name = type(err).__name__
+                report.errors[name] = report.errors.get(name, 0) + 1
+            report.latencies.append(time.perf_counter() - started)
+            report.operations += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(client) for client in clients))
+    report.wall_time = time.perf_counter() - started
+
+    if original is not None:
+        for output, source in original.items():
+            try:
+                await clients[0].async_set_output(output, source)
+            except ProphecyError as err:
+                report.restore_errors[output] = str(err)
+    return report
+
+
+def format_report(report: WorkloadReport) -> str:
+    """Render a report as a short human-readable table."""
+    data = report.as_dict()
+    latency = data["latency_ms"]
+    lines = [
+        f"{report.workload}: {report.operations} operations, "
+        f"concurrency {report.concurrency}",
+        f"  wall time   {data['wall_time_s']:.3f} s",
+        f"  throughput  {data['throughput_ops_s']:.2f} ops/s",
+        "  latency ms  "
+        + "  ".join(f"{key} {value:.2f}" for key, value in latency.items()),
+        f"  succeeded   {report.succeeded}",
+    ]
+    lines.extend(
+        f"  error       {name}: {errors}"
+        for name, errors in sorted(report.errors.items())
+    )
+    lines.extend(
+        f"  not restored output {output}: {error}"
+        for output, error in sorted(report.restore_errors.items())
+    )
+    return "\n".join(lines)
+
+
+def _parser() -> argparse.ArgumentParser:
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.gofanco_prophecy.cli",
+        description="Measure latency and throughput of a Gofanco Prophecy matrix.",
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("host", nargs="?", help="matrix IP address or hostname")
+    target.add_argument(
+        "--simulate", action="store_true", help="run against an in-process simulator"
+    )
+    target.add_argument(
+        "--replay", metavar="SESSION", help="answer from a recorded wire session"
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument(
+        "--workload",
+        choices=(*WORKLOADS, "all"),
+        default="poll",
+        help="traffic to generate (default: poll)",
+    )
+    parser.add_argument("--count", type=int, default=100, help="operations per run")
+    parser.add_argument(
+        "--concurrency", type=int, default=1, help="parallel clients (default: 1)"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.03,
+        help="simulator service time per request, in seconds",
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.0,
+        help="fraction of simulated requests that fail",
+    )
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    return parser
+
+
+def _client_factory(
+    args: argparse.Namespace,
+) -> Callable[[], GofancoProphecyClient]:
+    """Return a factory for clients aimed at the selected target."""
+    if args.host:
+        return lambda: GofancoProphecyClient(args.host, args.port, timeout=args.timeout)
+    exchange: Exchange
+    if args.simulate:
+        # One shared device: parallel clients contend for it like on hardware.
+        exchange = SimulatedMatrix(latency=args.latency, failure_rate=args.failure_rate)
+    else:
+        exchange = ReplayExchange(load_session(args.replay), loop=True)
+    return lambda: GofancoProphecyClient(
+        "simulator.invalid", args.port, timeout=args.timeout, exchange=exchange
+    )
+
+
+async def _async_main(args: argparse.Namespace) -> list[WorkloadReport]:
+    """Run the selected workloads in order."""
+    make_client = _client_factory(args)
+    workloads = WORKLOADS if args.workload == "all" else (args.workload,)
+    return [
+        await async_run_workload(
+            make_client, workload, count=args.count, concurrency=args.concurrency
+        )
+        for workload in workloads
+    ]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the profiler; return the process exit status."""
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.count < 1 or args.concurrency < 1:
+        parser.error("--count and --concurrency must be at least 1")
+    reports = asyncio.run(_async_main(args))
+    if args.json:
+        print(json.dumps([report.as_dict() for report in reports], indent=2))
+    else:
+        print("\n\n".join(format_report(report) for report in reports))
+    return 1 if any(report.succeeded == 0 for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
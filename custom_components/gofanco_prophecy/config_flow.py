@@ -2,19 +2,47 @@
 
 from __future__ import annotations
 
+from ipaddress import IPv4Network, ip_address, ip_network
 import logging
 from typing import Any
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
-from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL, CONF_TIMEOUT
+from homeassistant.core import callback
+from homeassistant.helpers import selector
 import voluptuous as vol
 
-from .const import DEFAULT_HOST_SUGGESTION, DEFAULT_PORT, DOMAIN
+from .autoroute import AUTO_ROUTES_SCHEMA
+from .const import (
+    CONF_ABORTIVE_CLOSE,
+    CONF_AUTO_ROUTES,
+    CONF_COMPACT,
+    CONF_LOCAL_ADDRESS,
+    CONF_TCP_NODELAY,
+    CONF_TRACE_SIZE,
+    DEFAULT_HOST_SUGGESTION,
+    DEFAULT_PORT,
+    DEFAULT_TIMEOUT,
+    DEFAULT_TRACE_SIZE,
+    DISCOVERY_MIN_PREFIX,
+    DOMAIN,
+    MAX_SCAN_INTERVAL,
+    MAX_TIMEOUT,
+    MAX_TRACE_SIZE,
+    MIN_SCAN_INTERVAL,
+    SCAN_INTERVAL,
+)
 from .device import (
     GofancoProphecyClient,
     ProphecyConnectionError,
     ProphecyResponseError,
 )
+from .discovery import DiscoveredMatrix, async_discover
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,12 +55,43 @@ _STEP_USER_SCHEMA = vol.Schema(
     }
 )
 
+_OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(
+            CONF_SCAN_INTERVAL, default=int(SCAN_INTERVAL.total_seconds())
+        ): vol.All(
+            vol.Coerce(int), vol.Range(min=MIN_SCAN_INTERVAL, max=MAX_SCAN_INTERVAL)
+        ),
+        vol.Optional(CONF_TIMEOUT, default=DEFAULT_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=MAX_TIMEOUT)
+        ),
+        vol.Optional(CONF_TRACE_SIZE, default=DEFAULT_TRACE_SIZE): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=MAX_TRACE_SIZE)
+        ),
+        vol.Optional(CONF_TCP_NODELAY, default=True): bool,
+        vol.Optional(CONF_ABORTIVE_CLOSE, default=False): bool,
+        vol.Optional(CONF_LOCAL_ADDRESS): str,
+        vol.Optional(CONF_AUTO_ROUTES): selector.ObjectSelector(),
+        vol.Optional(CONF_COMPACT, default=False): bool,
+    }
+)
+
 
 class GofancoProphecyConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Gofanco Prophecy."""
 
     VERSION = 2
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._discovered: dict[str, DiscoveredMatrix] = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Return the options flow handler."""
+        return GofancoProphecyOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -43,14 +102,14 @@ class GofancoProphecyConfigFlow(ConfigFlow, domain=DOMAIN):
             host = user_input[CONF_HOST]
             port = user_input[CONF_PORT]
 
-            error = await self._async_try_connect(host, port)
-            if error is None:
-                await self.async_set_unique_id(f"{host}:{port}")
-                self._abort_if_unique_id_configured()
-                return self.async_create_entry(
-                    title=f"HDMI Matrix ({host})",
-                    data={CONF_HOST: host, CONF_PORT: port},
-                )
+            if "/" in host:
+                error = await self._async_scan(host, port)
+                if error is None:
+                    return await self.async_step_pick()
+            else:
+                error = await self._async_try_connect(host, port)
+                if error is None:
+                    return await self._async_create_matrix_entry(host, port)
             errors["base"] = error
 
         schema = self.add_suggested_values_to_schema(
@@ -63,6 +122,64 @@ class GofancoProphecyConfigFlow(ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_pick(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Let the user choose one of the matrices found by a subnet scan."""
+        if user_input is not None:
+            matrix = self._discovered[user_input[CONF_HOST]]
+            return await self._async_create_matrix_entry(matrix.host, matrix.port)
+
+        options = [
+            selector.SelectOptionDict(
+                value=host,
+                label=f"{host} ({', '.join(matrix.output_names.values())})",
+            )
+            for host, matrix in self._discovered.items()
+        ]
+        return self.async_show_form(
+            step_id="pick",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_HOST): selector.SelectSelector(
+                        selector.SelectSelectorConfig(options=options)
+                    )
+                }
+            ),
+        )
+
+    async def _async_create_matrix_entry(
+        self, host: str, port: int
+    ) -> ConfigFlowResult:
+        """Create the entry for a matrix that answered a probe."""
+        await self.async_set_unique_id(f"{host}:{port}")
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=f"HDMI Matrix ({host})",
+            data={CONF_HOST: host, CONF_PORT: port},
+        )
+
+    async def _async_scan(self, subnet: str, port: int) -> str | None:
+        """Sweep a subnet for unconfigured matrices; return an error key or None."""
+        try:
+            network = ip_network(subnet, strict=False)
+        except ValueError:
+            return "invalid_subnet"
+        if not isinstance(network, IPv4Network):
+            return "invalid_subnet"
+        if network.prefixlen < DISCOVERY_MIN_PREFIX:
+            return "subnet_too_large"
+
+        configured = self._async_current_ids(include_ignore=False)
+        self._discovered = {
+            matrix.host: matrix
+            for matrix in await async_discover(network, port)
+            if f"{matrix.host}:{matrix.port}" not in configured
+        }
+        if not self._discovered:
+            return "no_devices_found"
+        return None
+
     async def async_step_reconfigure(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -116,3 +233,33 @@ class GofancoProphecyConfigFlow(ConfigFlow, domain=DOMAIN):
             _LOGGER.exception("Unexpected error probing %s:%s", host, port)
             return "unknown"
         return None
+
+
+class GofancoProphecyOptionsFlow(OptionsFlow):
+    """Handle runtime tuning options for an HDMI Matrix entry."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            try:
+                AUTO_ROUTES_SCHEMA(user_input.get(CONF_AUTO_ROUTES, []))
+            except vol.Invalid:
+                errors[CONF_AUTO_ROUTES] = "invalid_auto_routes"
+            if local_address := user_input.get(CONF_LOCAL_ADDRESS):
+                try:
+                    ip_address(local_address)
+                except ValueError:
+                    errors[CONF_LOCAL_ADDRESS] = "invalid_local_address"
+            if not errors:
+                return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                _OPTIONS_SCHEMA, user_input or self.config_entry.options
+            ),
+            errors=errors,
+        )
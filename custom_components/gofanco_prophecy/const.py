@@ -13,9 +13,90 @@ MODEL: Final = "PRO-Matrix44-SC"
 DEFAULT_HOST_SUGGESTION: Final = "192.168.1.92"
 DEFAULT_PORT: Final = 80
 DEFAULT_TIMEOUT: Final = 10.0
+MAX_TIMEOUT: Final = 60.0
+# Options-flow keys; all of them apply to a running entry without a reload.
+# A trace size of 0 keeps the wire-trace buffer disabled.
+CONF_TRACE_SIZE: Final = "trace_size"
+DEFAULT_TRACE_SIZE: Final = 0
+MAX_TRACE_SIZE: Final = 200
+# Socket tuning for the per-command TCP connections; see transport.py.
+CONF_TCP_NODELAY: Final = "tcp_nodelay"
+CONF_ABORTIVE_CLOSE: Final = "abortive_close"
+CONF_LOCAL_ADDRESS: Final = "local_address"
+# Resolved-address cache for hostname-configured matrices, in seconds: a
+# lookup is refreshed in the background after REFRESH_AFTER and must be
+# redone before use after TTL.
+RESOLVE_TTL: Final = 300.0
+RESOLVE_REFRESH_AFTER: Final = 240.0
+# Compact mode: one sensor entity per matrix, mutated through services.
+CONF_COMPACT: Final = "compact"
+# Adaptive polling of GofancoProphecyClient.watch, in seconds: the interval
+# right after a change, the ceiling, and the growth factor per quiet poll.
+WATCH_MIN_INTERVAL: Final = 1.0
+WATCH_MAX_INTERVAL: Final = 15.0
+WATCH_BACKOFF: Final = 1.5
+# Boot phase after `poweron`, in seconds: how often readiness is probed, how
+# long one probe may take, and the longest routing commands are held for.
+BOOT_PROBE_INTERVAL: Final = 0.25
+BOOT_PROBE_TIMEOUT: Final = 1.0
+BOOT_MAX_WAIT: Final = 15.0
+# Source-player → input rules for the built-in auto-route engine.
+CONF_AUTO_ROUTES: Final = "auto_routes"
+
+# Fired once per poll that observes a routing or power change, carrying the
+# diff; the device_trigger platform is built on it.
+EVENT_ROUTE_CHANGED: Final = f"{DOMAIN}_route_changed"
+
+# How long auto-route triggers are collected before one batch is issued.
+AUTO_ROUTE_DEBOUNCE_COOLDOWN: Final = 1.0
+
+# Subnet discovery in the config flow: probes in flight at once, per-host
+# connect and overall timeouts in seconds, and the largest subnet accepted.
+DISCOVERY_MAX_PARALLEL: Final = 64
+DISCOVERY_CONNECT_TIMEOUT: Final = 0.5
+DISCOVERY_PROBE_TIMEOUT: Final = 2.0
+DISCOVERY_MIN_PREFIX: Final = 22
+
 SCAN_INTERVAL: Final = timedelta(seconds=15)
+# Bounds for the options-flow poll interval, in seconds.
+MIN_SCAN_INTERVAL: Final = 5
+MAX_SCAN_INTERVAL: Final = 300
+# Preset names are read with LOADMAP on their own, much slower schedule;
+# they only change when renamed, and renames made here refresh them at once.
+PRESET_SCAN_INTERVAL: Final = timedelta(minutes=5)
+# How old (in seconds) the last poll may be before callers that act on the
+# current routing read the device again; see coordinator.async_get_state.
+FRESH_STATE_MAX_AGE: Final = 2.0
 REFRESH_DEBOUNCE_COOLDOWN: Final = 0.5
 
+# Event-loop lag back-off (see loop_lag.py): sample period, smoothing weight
+# of each sample, the lag in seconds above which scheduled polls are
+# stretched, and the most they are stretched by.
+LOOP_LAG_SAMPLE_INTERVAL: Final = 1.0
+LOOP_LAG_SMOOTHING: Final = 0.3
+LOOP_LAG_THRESHOLD: Final = 0.1
+LOOP_LAG_MAX_STRETCH: Final = 8.0
+
+# Multi-matrix service fan-out: how many devices to drive at once, and how
+# long past its configured request timeout any single device may take
+# before its result is reported as failed.
+FANOUT_MAX_PARALLEL: Final = 8
+FANOUT_TIMEOUT_MARGIN: Final = 5.0
+
+# Bounds for the on-demand `profile` service window, in seconds.
+PROFILE_DEFAULT_DURATION: Final = 30
+PROFILE_MAX_DURATION: Final = 300
+
+# Bounds for the `record_session` wire-capture window, in seconds.
+RECORD_DEFAULT_DURATION: Final = 60
+RECORD_MAX_DURATION: Final = 3600
+
+# Routing history: records kept per log generation (13 bytes each, so about
+# 1.3 MB; one previous generation is retained), and how often the on-air
+# time sensors tick between routing changes.
+HISTORY_MAX_RECORDS: Final = 100_000
+HISTORY_SENSOR_INTERVAL: Final = timedelta(minutes=1)
+
 NUM_INPUTS: Final = 4
 NUM_OUTPUTS: Final = 4
 NUM_PRESETS: Final = 8
@@ -26,6 +107,7 @@ PLATFORMS: Final = [
     "button",
     "media_player",
     "select",
+    "sensor",
     "switch",
     "text",
 ]
@@ -1,16 +1,59 @@
-"""DataUpdateCoordinator for the Gofanco Prophecy HDMI Matrix."""
+"""DataUpdateCoordinator for the Gofanco Prophecy HDMI Matrix.
+
+The poll interval is stretched while the event loop is lagging (see
+`loop_lag.LoopLagMonitor`); refreshes requested after a command are not
+affected. Besides the periodic poll, `async_get_state` gives callers a middle ground
+between the possibly stale ``data`` and a full debounced refresh: it
+answers from the last poll when that is at most ``max_age`` seconds old and
+otherwise reads the device once, publishing the result like a poll would.
+
+A poll sent before a command the device has since acknowledged (see
+`GofancoProphecyClient.is_stale`) is discarded rather than published: it
+would briefly put the old routing back on screen, and the refresh that
+every command requests brings the new routing anyway.
+
+Preset contents saved through the coordinator are indexed (see
+`presets.PresetIndex`), so the active preset is known on every poll and
+recalling it again is skipped. Power, global on this device, goes through
+`async_set_power` for the same reason: the switch and every output's media
+player can ask for it, and only a request that changes something is sent.
+Preset names come from a separate, slow
+`ProphecyPresetNamesCoordinator`, so the routing poll never waits for a
+``LOADMAP`` and a rename only wakes the entities that show preset names.
+"""
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Mapping
+from datetime import timedelta
 import logging
+import time
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_SCAN_INTERVAL, CONF_TIMEOUT
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN, REFRESH_DEBOUNCE_COOLDOWN, SCAN_INTERVAL
-from .device import GofancoProphecyClient, ProphecyError, ProphecyState
+from .const import (
+    CONF_TRACE_SIZE,
+    DEFAULT_TIMEOUT,
+    DEFAULT_TRACE_SIZE,
+    DOMAIN,
+    EVENT_ROUTE_CHANGED,
+    FRESH_STATE_MAX_AGE,
+    PRESET_SCAN_INTERVAL,
+    REFRESH_DEBOUNCE_COOLDOWN,
+    SCAN_INTERVAL,
+)
+from .device import GofancoProphecyClient, ProphecyError, ProphecyState, diff_states
+from .history import RoutingHistory
+from .loop_lag import async_get_loop_lag_monitor
+from .presets import PresetIndex
+from .transport import TransportOptions
 
 type ProphecyConfigEntry = ConfigEntry[ProphecyDataUpdateCoordinator]
 
@@ -33,7 +76,7 @@ class ProphecyDataUpdateCoordinator(DataUpdateCoordinator[ProphecyState]):
             logger,
             config_entry=entry,
             name=DOMAIN,
-            update_interval=SCAN_INTERVAL,
+            update_interval=scan_interval(entry.options),
             always_update=False,
             request_refresh_debouncer=Debouncer(
                 hass,
@@ -43,25 +86,316 @@ class ProphecyDataUpdateCoordinator(DataUpdateCoordinator[ProphecyState]):
             ),
         )
         self.client = client
-        self._preset_names: dict[int, str] = {}
+        self._poll_interval = self.update_interval
+        self.preset_names_coordinator = ProphecyPresetNamesCoordinator(
+            hass, entry, client, logger
+        )
+        self.history = RoutingHistory(hass, entry.entry_id)
+        self.presets = PresetIndex(hass, entry.entry_id)
+        self._observed: ProphecyState | None = None
+        self._fetched_at = 0.0
+        self._read_lock = asyncio.Lock()
+        self.loop_lag = async_get_loop_lag_monitor(hass)
+        self.stale_polls_discarded = 0
+        self._power_written: tuple[bool, int] | None = None
+        self._power_pending: tuple[bool, asyncio.Task[None]] | None = None
+        self._preset_in_place: int | None = None
+
+    @callback
+    def async_apply_options(self, options: Mapping[str, Any]) -> None:
+        """Apply changed entry options to the running client and poll.
+
+        Nothing is torn down: entities stay available, and a queued poll is
+        re-armed so the new interval applies right away.
+        """
+        self.client.reconfigure(
+            timeout=options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT),
+            trace_size=options.get(CONF_TRACE_SIZE, DEFAULT_TRACE_SIZE),
+            transport=TransportOptions.from_options(options),
+        )
+        self._poll_interval = scan_interval(options)
+        self._async_loop_lag_changed()
+        if self._unsub_refresh is not None:
+            self._schedule_refresh()
+
+    async def _async_setup(self) -> None:
+        """Load the routing history and preset contents; watch loop lag."""
+        await self.history.async_load()
+        await self.presets.async_load()
+        self.config_entry.async_on_unload(self.loop_lag.async_acquire())
+        self.config_entry.async_on_unload(
+            self.loop_lag.async_add_listener(self._async_loop_lag_changed)
+        )
+        # Registered before any entity, so they see the names already merged.
+        self.config_entry.async_on_unload(
+            self.preset_names_coordinator.async_add_listener(
+                self._async_preset_names_updated
+            )
+        )
+
+    async def async_shutdown(self) -> None:
+        """Stop polling and the client's background work."""
+        await super().async_shutdown()
+        self.client.close()
+
+    @callback
+    def _async_loop_lag_changed(self) -> None:
+        """Stretch the poll interval by the loop-lag factor.
+
+        The base class picks the new interval up when it schedules the next
+        poll; one already scheduled runs on time.
+        """
+        if self._poll_interval is not None:
+            self.update_interval = self._poll_interval * self.loop_lag.stretch
 
     async def _async_update_data(self) -> ProphecyState:
-        """Fetch the latest state from the device, preserving cached presets."""
+        """Poll the device."""
         try:
-            state = await self.client.async_get_state()
+            return await self._async_fetch_state()
         except ProphecyError as err:
+            # Unreachable time is not on-air time.
+            self.history.async_mark_unseen()
             raise UpdateFailed(str(err)) from err
 
-        if not self._preset_names:
-            try:
-                self._preset_names = await self.client.async_load_presets()
-            except ProphecyError as err:
-                self.logger.debug("Could not load preset names: %s", err)
+    async def async_get_state(
+        self, max_age: float = FRESH_STATE_MAX_AGE, *, keep_raw: bool = False
+    ) -> ProphecyState:
+        """Return state no older than `max_age` seconds, reading the device if needed.
+
+        A device read publishes its result to listeners exactly as a poll
+        would. With `keep_raw` the state must also carry the unparsed reply,
+        which polls do not keep, so a cached state only serves if it has
+        one. Raises `ProphecyError` when the device cannot be read.
+        """
+        async with self._read_lock:
+            if (
+                self.data is not None
+                and self.last_update_success
+                and not self.client.is_stale(self.data)
+                and time.monotonic() - self._fetched_at <= max_age
+                and (not keep_raw or self.data.raw is not None)
+            ):
+                return self.data
+            state = await self._async_fetch_state(reread_stale=True, keep_raw=keep_raw)
+        self.async_set_updated_data(state)
+        return state
+
+    async def _async_fetch_state(
+        self, *, reread_stale: bool = False, keep_raw: bool = False
+    ) -> ProphecyState:
+        """Read state from the device, attaching the known preset names.
 
-        state.preset_names = dict(self._preset_names)
+        A read overtaken by a write is dropped: the current data is kept
+        or, with `reread_stale`, the device is read again.
+        """
+        state = await self.client.async_get_state(keep_raw=keep_raw)
+        while self.data is not None and self.client.is_stale(state):
+            self.stale_polls_discarded += 1
+            self.logger.debug(
+                "Discarding state read %d, older than write %d",
+                state.generation,
+                self.client.write_generation,
+            )
+            if not reread_stale:
+                return self.data
+            state = await self.client.async_get_state(keep_raw=keep_raw)
+        self._fetched_at = time.monotonic()
+
+        self.history.async_observe(state.power, state.outputs)
+        if (
+            self._preset_in_place is not None
+            and self.presets.contents(self._preset_in_place) != state.outputs
+        ):
+            # Once the routing leaves the slot, the slot itself may be
+            # re-saved from the front panel.
+            self._preset_in_place = None
+        if self._observed is not None:
+            self._async_fire_route_changed(self._observed, state)
+        self._observed = state
+
+        # Shared, not copied: the names coordinator replaces its data wholesale.
+        state.preset_names = self.preset_names_coordinator.data or {}
         return state
 
+    @callback
+    def _async_preset_names_updated(self) -> None:
+        """Merge new preset names into the current state without a poll.
+
+        Only the names coordinator's listeners are told; routing entities
+        are left alone.
+        """
+        if self.data is not None and self.preset_names_coordinator.data:
+            self.data.preset_names = self.preset_names_coordinator.data
+
+    @callback
+    def _async_fire_route_changed(
+        self, previous: ProphecyState, state: ProphecyState
+    ) -> None:
+        """Fire one event describing what changed in routing or power."""
+        change = diff_states(previous, state)
+        if change is None or (not change.routes and change.power is None):
+            return
+        changes = [
+            {
+                "output": route.output,
+                "old_input": route.old_input,
+                "new_input": route.new_input,
+            }
+            for route in change.routes
+        ]
+        device = dr.async_get(self.hass).async_get_device(
+            identifiers={(DOMAIN, self.config_entry.entry_id)}
+        )
+        event_data: dict[str, Any] = {
+            "entry_id": self.config_entry.entry_id,
+            "device_id": device.id if device is not None else None,
+            "old_power": previous.power,
+            "power": state.power,
+            "changes": changes,
+            "routing": dict(state.outputs),
+        }
+        self.hass.bus.async_fire(EVENT_ROUTE_CHANGED, event_data)
+
+    @property
+    def data_is_fresh(self) -> bool:
+        """Return whether the last poll is recent enough to act on unread."""
+        return (
+            self.last_update_success
+            and time.monotonic() - self._fetched_at <= FRESH_STATE_MAX_AGE
+        )
+
+    @property
+    def active_preset(self) -> int | None:
+        """Return the preset whose saved routing is on the matrix, if known."""
+        if self.data is None:
+            return None
+        return self.presets.active(self.data.outputs)
+
+    async def async_save_preset(self, index: int) -> None:
+        """Save the current routing into preset `index` and remember it.
+
+        Raises `ProphecyError` when the device cannot be read or written.
+        """
+        state = await self.async_get_state()
+        await self.client.async_save_preset(index)
+        await self.presets.async_record(index, state.outputs)
+        self._preset_in_place = index
+        # The routing did not change, so no poll would tell the entities.
+        self.async_update_listeners()
+
+    async def async_recall_preset(self, index: int) -> bool:
+        """Recall preset `index`; return False if it was already in place.
+
+        The recall is skipped only when the preset was saved or recalled
+        from here and every poll since, the last at most
+        ``FRESH_STATE_MAX_AGE`` old, showed its routing. A slot overwritten
+        from the front panel or web UI can only change while the routing is
+        elsewhere, so matching routing alone is not enough: a preset that
+        was saved before a restart, or whose routing was left in between,
+        is always sent, and the device applies whatever the slot now holds.
+        """
+        if self.data_is_fresh and self._preset_in_place == index:
+            return False
+        await self.client.async_recall_preset(index)
+        self._preset_in_place = index
+        return True
+
+    @property
+    def expected_power(self) -> bool | None:
+        """Return the power state the matrix has or was last commanded into.
+
+        A power command still in flight, or acknowledged after the last
+        published poll, wins over that poll, so back-to-back requests see
+        each other.
+        """
+        if self._power_pending is not None:
+            return self._power_pending[0]
+        if self.data is None:
+            return None
+        if (
+            self._power_written is not None
+            and self._power_written[1] > self.data.generation
+        ):
+            return self._power_written[0]
+        return self.data.power
+
+    async def async_set_power(self, on: bool) -> bool:
+        """Turn the matrix on or off; return False if nothing had to be sent.
+
+        The requested state is recorded before the command is sent: a
+        request for the same state waits on that command instead of sending
+        another, and a request for the opposite state is queued behind it.
+        """
+        pending = self._power_pending
+        if pending is not None and pending[0] == on:
+            await asyncio.shield(pending[1])
+            return False
+        if pending is None and self.data_is_fresh and self.expected_power == on:
+            return False
+        task = self.hass.async_create_task(
+            self._async_send_power(on), f"{DOMAIN} power", eager_start=True
+        )
+        self._power_pending = (on, task)
+        task.add_done_callback(self._power_sent)
+        await asyncio.shield(task)
+        return True
+
+    @callback
+    def _power_sent(self, task: asyncio.Task[None]) -> None:
+        """Stop treating a finished power command as pending."""
+        if self._power_pending is not None and self._power_pending[1] is task:
+            self._power_pending = None
+        if not task.cancelled():
+            # Mark the exception retrieved in case every caller was cancelled.
+            task.exception()
+
+    async def _async_send_power(self, on: bool) -> None:
+        """Send one power command and remember it against its own sequence."""
+        generation = await self.client.async_power(on)
+        self._power_written = (on, generation)
+
     async def async_reload_presets(self) -> None:
-        """Force a re-fetch of preset names on the next poll."""
-        self._preset_names = {}
-        await self.async_request_refresh()
+        """Re-read the preset names now, e.g. after renaming one."""
+        await self.preset_names_coordinator.async_request_refresh()
+
+
+class ProphecyPresetNamesCoordinator(DataUpdateCoordinator[dict[int, str]]):
+    """Refresh the preset names on a slow schedule of their own.
+
+    The client returns the very same dict while the ``LOADMAP`` response is
+    byte-for-byte unchanged, so an idle refresh notifies nobody.
+    """
+
+    config_entry: ProphecyConfigEntry
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ProphecyConfigEntry,
+        client: GofancoProphecyClient,
+        logger: logging.Logger,
+    ) -> None:
+        """Initialize the preset-names coordinator."""
+        super().__init__(
+            hass,
+            logger,
+            config_entry=entry,
+            name=f"{DOMAIN} preset names",
+            update_interval=PRESET_SCAN_INTERVAL,
+            always_update=False,
+        )
+        self.client = client
+
+    async def _async_update_data(self) -> dict[int, str]:
+        """Read the preset names."""
+        try:
+            return await self.client.async_load_presets()
+        except ProphecyError as err:
+            raise UpdateFailed(str(err)) from err
+
+
+def scan_interval(options: Mapping[str, Any]) -> timedelta:
+    """Return the poll interval configured in `options`."""
+    if (seconds := options.get(CONF_SCAN_INTERVAL)) is None:
+        return SCAN_INTERVAL
+    return timedelta(seconds=seconds)
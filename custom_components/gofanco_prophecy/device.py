@@ -12,30 +12,66 @@ The 13-key state response (`out1..4`, `namein1..4`, `nameout1..4`, `powstatus`)
 is all we consistently see on this firmware. Preset names are fetched on demand
 via the ``LOADMAP`` command (returning `namem1..namem8`). Standby/lock and EDID
 state are not readable — intentionally not modelled here.
+
+Identical commands issued while one is already in flight share its round
+trip (see `GofancoProphecyClient._post`): a poll, a diagnostics download
+and a service all asking for state at once cost the device one request.
+
+Every command is numbered in the order it reaches the device. A state
+read carries its number as ``ProphecyState.generation``, and
+`GofancoProphecyClient.is_stale` tells whether a read was sent before the
+most recently acknowledged write, i.e. shows routing that is already gone.
+
+After ``poweron`` the matrix spends a few seconds booting and ignores
+routing commands. The client probes it with fast state reads until it
+reports itself on, and holds routing commands issued meanwhile; once it is
+ready they are sent back to back, later ones for the same output replacing
+earlier ones, so "power on, then route" completes as soon as the hardware
+allows.
+
+Consumers outside Home Assistant can iterate `GofancoProphecyClient.watch`
+for a stream of `StateChange`s instead of polling and diffing themselves;
+`diff_states` is the same change detection the coordinator uses.
 """
 
 from __future__ import annotations
 
 import asyncio
-import contextlib
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Mapping
 from dataclasses import dataclass, field
 import json
 import logging
+import time
+from typing import Final
 
 from .const import (
+    BOOT_MAX_WAIT,
+    BOOT_PROBE_INTERVAL,
+    BOOT_PROBE_TIMEOUT,
     DEFAULT_TIMEOUT,
     MUTE_INPUT,
     NAME_MAX_LEN,
     NUM_INPUTS,
     NUM_OUTPUTS,
     NUM_PRESETS,
+    WATCH_BACKOFF,
+    WATCH_MAX_INTERVAL,
+    WATCH_MIN_INTERVAL,
 )
+from .transport import TcpTransport, TransportOptions
+from .wire_trace import WireTrace, WireTraceRecord
 
 _LOGGER = logging.getLogger(__name__)
 
 _ENDPOINT = "/inform.cgi"
-_STATE_CMD = '{"param1":"1"}'
-_LOAD_PRESETS_CMD = "LOADMAP"
+# Read commands, shared with the replay harness and the simulator.
+STATE_CMD: Final = '{"param1":"1"}'
+LOAD_PRESETS_CMD: Final = "LOADMAP"
+# Commands that change nothing on the device; every other one is a write.
+_READ_CMDS = frozenset({STATE_CMD, LOAD_PRESETS_CMD})
+
+type Exchange = Callable[[bytes], Awaitable[str]]
+"""Send one raw request and return the raw reply (preamble included)."""
 
 
 class ProphecyError(Exception):
@@ -50,22 +86,181 @@ class ProphecyResponseError(ProphecyError):
     """Raised when the device responds with unparsable data."""
 
 
+class ProphecyRouting(Mapping[int, int]):
+    """Compact output → input map, one byte per output.
+
+    Behaves like the ``dict[int, int]`` it replaces (outputs are 1-indexed
+    keys) but a poll allocates a single small ``bytes`` object instead of
+    a dict, and equality between two routings is a bytes comparison.
+    """
+
+    __slots__ = ("_routes",)
+
+    def __init__(self, routes: bytes) -> None:
+        """Initialize from one input number per output, output 1 first."""
+        self._routes = routes
+
+    def __getitem__(self, output: int) -> int:
+        """Return the input routed to `output`."""
+        if not 1 <= output <= len(self._routes):
+            raise KeyError(output)
+        return self._routes[output - 1]
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over output numbers."""
+        return iter(range(1, len(self._routes) + 1))
+
+    def __len__(self) -> int:
+        """Return the number of outputs."""
+        return len(self._routes)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare by routing, against another routing or any mapping."""
+        if isinstance(other, ProphecyRouting):
+            return self._routes == other._routes
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        """Hash by routing; instances are immutable."""
+        return hash(self._routes)
+
+    def __repr__(self) -> str:
+        """Return a dict-like representation."""
+        return f"ProphecyRouting({dict(self)!r})"
+
+
 @dataclass(slots=True)
 class ProphecyState:
-    """Parsed state of the HDMI matrix."""
+    """Parsed state of the HDMI matrix.
+
+    Name mappings are shared with the previous poll's state whenever they
+    are unchanged, and ``raw`` is only populated on request (diagnostics),
+    so a steady-state poll allocates little beyond the routing bytes.
+    """
 
     power: bool
-    outputs: dict[int, int]
-    input_names: dict[int, str]
-    output_names: dict[int, str]
-    preset_names: dict[int, str] = field(default_factory=dict)
-    raw: dict[str, object] = field(default_factory=dict)
+    outputs: Mapping[int, int]
+    input_names: Mapping[int, str]
+    output_names: Mapping[int, str]
+    preset_names: Mapping[int, str] = field(default_factory=dict)
+    raw: dict[str, object] | None = None
+    generation: int = field(default=0, compare=False)
+    """Sequence number of the read that produced this state."""
 
     def input_choices(self) -> dict[int, str]:
         """Return input number → display name, including mute."""
         return {MUTE_INPUT: "Mute", **self.input_names}
 
 
+@dataclass(slots=True, frozen=True)
+class RouteChange:
+    """One output switched to another input."""
+
+    output: int
+    old_input: int | None
+    """None in the first change of a stream, when there was nothing before."""
+    new_input: int
+
+
+@dataclass(slots=True, frozen=True)
+class StateChange:
+    """What differs between two states; unchanged parts are left empty."""
+
+    routes: tuple[RouteChange, ...] = ()
+    power: bool | None = None
+    """The new power state, or None when it did not change."""
+    input_names: Mapping[int, str] = field(default_factory=dict)
+    output_names: Mapping[int, str] = field(default_factory=dict)
+
+
+def diff_states(old: ProphecyState | None, new: ProphecyState) -> StateChange | None:
+    """Return how `new` differs from `old`, or None if it doesn't.
+
+    Against no previous state, everything in `new` counts as changed.
+    """
+    if old is None:
+        return StateChange(
+            routes=tuple(
+                RouteChange(output, None, source)
+                for output, source in new.outputs.items()
+            ),
+            power=new.power,
+            input_names=dict(new.input_names),
+            output_names=dict(new.output_names),
+        )
+    routes = (
+        ()
+        if new.outputs == old.outputs
+        else tuple(
+            RouteChange(output, old.outputs.get(output), source)
+            for output, source in new.outputs.items()
+            if old.outputs.get(output) != source
+        )
+    )
+    # Unchanged name maps are shared between polls, so `is` settles most.
+    input_names = (
+        {}
+        if new.input_names is old.input_names
+        else _changed(old.input_names, new.input_names)
+    )
+    output_names = (
+        {}
+        if new.output_names is old.output_names
+        else _changed(old.output_names, new.output_names)
+    )
+    power = new.power if new.power != old.power else None
+    if not routes and power is None and not input_names and not output_names:
+        return None
+    return StateChange(routes, power, input_names, output_names)
+
+
+def _changed(old: Mapping[int, str], new: Mapping[int, str]) -> dict[int, str]:
+    """Return the entries of `new` that differ from `old`."""
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+@dataclass(slots=True)
+class ClientStats:
+    """Counters describing how the client has used the device."""
+
+    coalesced: int = 0
+    """Requests answered by joining an identical one already in flight."""
+    connections_opened: int = 0
+    connections_failed: int = 0
+    resolutions: int = 0
+    """Hostname lookups performed (cache misses and refreshes)."""
+    commands_held: int = 0
+    """Routing commands held back while the matrix booted after power-on."""
+
+    def as_dict(self) -> dict[str, int]:
+        """Return a JSON-serialisable view."""
+        return {
+            "coalesced": self.coalesced,
+            "connections_opened": self.connections_opened,
+            "connections_failed": self.connections_failed,
+            "resolutions": self.resolutions,
+            "commands_held": self.commands_held,
+        }
+
+
+@dataclass(slots=True)
+class _HeldCommand:
+    """A routing command held during boot, and the callers waiting on it."""
+
+    body: str
+    waiters: list[asyncio.Future[None]]
+
+    def resolve(self, error: ProphecyError | None) -> None:
+        """Release the waiters still pending, with `error` if given."""
+        for waiter in self.waiters:
+            if waiter.done():
+                continue
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
+
+
 class GofancoProphecyClient:
     """Async client for the Gofanco Prophecy HDMI matrix."""
 
@@ -75,12 +270,48 @@ class GofancoProphecyClient:
         port: int,
         *,
         timeout: float = DEFAULT_TIMEOUT,
+        trace_size: int = 0,
+        transport: TransportOptions | None = None,
+        exchange: Exchange | None = None,
     ) -> None:
-        """Initialize the client."""
+        """Initialize the client.
+
+        ``trace_size`` > 0 keeps the last N wire exchanges in memory for
+        diagnostics; 0 (the default) disables tracing entirely.
+        ``transport`` tunes the TCP sockets; ``exchange`` replaces the TCP
+        round trip altogether, e.g. with a recorded session.
+        """
         self._host = host
         self._port = port
         self._timeout = timeout
         self._lock = asyncio.Lock()
+        self._trace = WireTrace(trace_size) if trace_size > 0 else None
+        self._last_state: ProphecyState | None = None
+        self._presets: dict[int, str] = {}
+        self._presets_raw = ""
+        self._inflight: dict[
+            tuple[str, float | None], asyncio.Future[tuple[int, str]]
+        ] = {}
+        self._sequence = 0
+        self._write_generation = 0
+        self._boot: asyncio.Task[None] | None = None
+        self._held: dict[str, _HeldCommand] = {}
+        self._flushing = False
+        self._powered_off = False
+        self.stats = ClientStats()
+        self._transport = TcpTransport(
+            host,
+            port,
+            transport or TransportOptions(),
+            self.stats,
+            connect_timeout=_connect_timeout(timeout),
+        )
+        self._exchange_fn: Exchange = exchange or self._transport
+
+    @property
+    def timeout(self) -> float:
+        """Return the configured per-request timeout, in seconds."""
+        return self._timeout
 
     @property
     def host(self) -> str:
@@ -92,8 +323,204 @@ class GofancoProphecyClient:
         """Return the device port."""
         return self._port
 
+    @property
+    def exchange(self) -> Exchange:
+        """Return the function performing one raw request/response exchange."""
+        return self._exchange_fn
+
+    @exchange.setter
+    def exchange(self, exchange: Exchange) -> None:
+        """Swap the raw exchange, e.g. to record or replay wire traffic."""
+        self._exchange_fn = exchange
+
+    @property
+    def trace_enabled(self) -> bool:
+        """Return whether the wire-trace buffer is active."""
+        return self._trace is not None
+
+    def reconfigure(
+        self, *, timeout: float, trace_size: int, transport: TransportOptions
+    ) -> None:
+        """Apply new tuning to the running client.
+
+        Takes effect from the next request; requests in flight finish with
+        the settings they started with. Traced records are kept as far as
+        the new buffer size allows.
+        """
+        self._timeout = timeout
+        if trace_size <= 0:
+            self._trace = None
+        elif self._trace is None:
+            self._trace = WireTrace(trace_size)
+        else:
+            self._trace.resize(trace_size)
+        self._transport.options = transport
+        self._transport.connect_timeout = _connect_timeout(timeout)
+
+    @property
+    def write_generation(self) -> int:
+        """Return the sequence number of the last acknowledged write."""
+        return self._write_generation
+
+    def is_stale(self, state: ProphecyState) -> bool:
+        """Return whether `state` was read before the last acknowledged write."""
+        return state.generation < self._write_generation
+
+    def trace_snapshot(self) -> list[WireTraceRecord]:
+        """Return the traced exchanges, oldest first (empty when disabled)."""
+        return [] if self._trace is None else self._trace.snapshot()
+
+    @property
+    def booting(self) -> bool:
+        """Return whether routing commands are held for a booting matrix."""
+        return self._boot is not None
+
     async def _post(self, body: str) -> str:
         """Send a POST and return the response body (preamble stripped)."""
+        _, text = await self._request(body)
+        return text
+
+    async def _post_routing(self, body: str, key: str) -> None:
+        """Send a routing command, holding it while the matrix boots.
+
+        `key` names what the command sets: an output (``out1``), or
+        ``all`` for commands setting every output, which replace whatever
+        was held before them. A held caller returns once the command that
+        carries its setting (its own, or one that superseded it) is sent,
+        and gets that command's error if it could not be. If the boot is
+        abandoned (`close`), held callers get `ProphecyConnectionError`.
+        """
+        if (boot := self._boot) is None:
+            await self._post(body)
+            return
+        if self._flushing:
+            # Too late to join the batch; go after it to keep the order.
+            await asyncio.wait({boot})
+            if boot.cancelled():
+                raise ProphecyConnectionError(
+                    f"{self._host} closed before the command was sent"
+                )
+            await self._post(body)
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiter.add_done_callback(_retrieve_exception)
+        superseded = self._held.pop(key, None)
+        waiters = [waiter] if superseded is None else [*superseded.waiters, waiter]
+        if key == "all":
+            for held in self._held.values():
+                waiters.extend(held.waiters)
+            self._held.clear()
+        self._held[key] = _HeldCommand(body, waiters)
+        self.stats.commands_held += 1
+        await asyncio.shield(waiter)
+
+    def close(self) -> None:
+        """Stop background work; held routing commands are abandoned."""
+        if self._boot is not None:
+            self._boot.cancel()
+        self._transport.close()
+
+    def _start_boot(self) -> None:
+        """Enter the boot phase, unless already in it."""
+        self._powered_off = False
+        if self._boot is None:
+            self._boot = asyncio.ensure_future(self._async_boot())
+            self._boot.add_done_callback(_retrieve_exception)
+
+    async def _async_boot(self) -> None:
+        """Wait for the matrix to come up, then send the held commands.
+
+        Every held command is attempted; one that fails reports its error
+        to its own waiters only.
+        """
+        held: dict[str, _HeldCommand] = {}
+        try:
+            await self._async_wait_until_ready()
+            self._flushing = True
+            held, self._held = self._held, {}
+            for command in held.values():
+                try:
+                    await self._post(command.body)
+                except ProphecyError as err:
+                    command.resolve(err)
+                else:
+                    command.resolve(None)
+        finally:
+            # Only left unresolved when the boot was cancelled.
+            abandoned = ProphecyConnectionError(
+                f"{self._host} closed before the held command was sent"
+            )
+            for command in (*held.values(), *self._held.values()):
+                command.resolve(abandoned)
+            self._boot = None
+            self._held = {}
+            self._flushing = False
+
+    async def _async_wait_until_ready(self) -> None:
+        """Probe until the matrix reports itself on, within limits.
+
+        A ``poweroff`` acknowledged meanwhile ends the wait: there is no
+        boot left to wait for.
+        """
+        deadline = time.monotonic() + BOOT_MAX_WAIT
+        while not self._powered_off:
+            try:
+                state = await self.async_get_state(timeout=BOOT_PROBE_TIMEOUT)
+            except ProphecyError:
+                pass
+            else:
+                if state.power:
+                    return
+            if time.monotonic() >= deadline:
+                _LOGGER.debug("%s did not answer after power-on", self._host)
+                return
+            await asyncio.sleep(BOOT_PROBE_INTERVAL)
+
+    async def _request(
+        self, body: str, *, timeout: float | None = None
+    ) -> tuple[int, str]:
+        """Send a POST; return its sequence number and the response body.
+
+        A caller issuing the same read as one still in flight joins it
+        instead of queueing a second round trip; a reply to a read queued
+        before the caller arrived is at least as fresh as it asked for. Each
+        joiner is shielded, so one caller being cancelled does not cancel
+        the others.
+
+        Writes are never shared: a write queued before some other command
+        must not stand in for one issued after it, or ``poweron``,
+        ``poweroff``, ``poweron`` would leave the matrix off.
+        """
+        if body not in _READ_CMDS:
+            return await self._send(body, timeout)
+        # Only requests with the same timeout are shared, so a poll never
+        # inherits the short timeout of a boot probe.
+        key = (body, timeout)
+        shared = self._inflight.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(self._send(body, timeout))
+            self._inflight[key] = shared
+            shared.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.stats.coalesced += 1
+        return await asyncio.shield(shared)
+
+    def _forget(
+        self, key: tuple[str, float | None], done: asyncio.Future[tuple[int, str]]
+    ) -> None:
+        """Drop a finished request from the in-flight table."""
+        if self._inflight.get(key) is done:
+            del self._inflight[key]
+        if not done.cancelled():
+            # Mark the exception retrieved in case every caller was cancelled.
+            done.exception()
+
+    async def _send(self, body: str, timeout: float | None) -> tuple[int, str]:
+        """Perform one POST round trip, serialised with every other command.
+
+        The sequence number is taken once the command holds the device, so
+        numbers follow the order the device saw the commands in.
+        """
         request = (
             f"POST {_ENDPOINT}?{body} HTTP/1.1\r\n"
             f"Host: {self._host}\r\n"
@@ -106,84 +533,148 @@ class GofancoProphecyClient:
             f"{body}"
         ).encode()
 
-        async with self._lock:
-            try:
-                raw = await asyncio.wait_for(
-                    self._exchange(request), timeout=self._timeout
+        timestamp = time.time()
+        queued_at = sent_at = time.monotonic()
+        raw: str | None = None
+        error: BaseException | None = None
+        try:
+            async with self._lock:
+                sent_at = time.monotonic()
+                self._sequence += 1
+                sequence = self._sequence
+                try:
+                    raw = await asyncio.wait_for(
+                        self._exchange_fn(request), timeout=timeout or self._timeout
+                    )
+                except TimeoutError as err:
+                    raise ProphecyConnectionError(
+                        f"Timeout communicating with {self._host}"
+                    ) from err
+                except OSError as err:
+                    raise ProphecyConnectionError(
+                        f"Error communicating with {self._host}: {err}"
+                    ) from err
+            text = strip_http_preamble(raw)
+            if body not in _READ_CMDS:
+                self._write_generation = sequence
+            return sequence, text
+        except BaseException as err:
+            error = err
+            raise
+        finally:
+            if self._trace is not None:
+                self._trace.record(
+                    command=body,
+                    request=request,
+                    response=raw,
+                    status=_status_code(raw),
+                    timestamp=timestamp,
+                    queued=sent_at - queued_at,
+                    elapsed=time.monotonic() - sent_at,
+                    error=error,
                 )
-            except TimeoutError as err:
-                raise ProphecyConnectionError(
-                    f"Timeout communicating with {self._host}"
-                ) from err
-            except OSError as err:
-                raise ProphecyConnectionError(
-                    f"Error communicating with {self._host}: {err}"
-                ) from err
-
-        return _strip_http_preamble(raw)
 
-    async def _exchange(self, request: bytes) -> str:
-        """Write the request and read the full response, closing the socket.
+    async def async_get_state(
+        self, *, keep_raw: bool = False, timeout: float | None = None
+    ) -> ProphecyState:
+        """Fetch current device state.
 
-        The device is HTTP/1.0 and always closes the connection at end-of-response,
-        so connection reuse / keep-alive is not available — a new TCP socket per
-        command is the supported behaviour.
+        The raw reply is kept on the returned state only with ``keep_raw``;
+        name mappings unchanged since the previous poll are reused.
+        `timeout` overrides the client's own for this read.
         """
-        reader, writer = await asyncio.open_connection(self._host, self._port)
-        try:
-            writer.write(request)
-            await writer.drain()
-            chunks: list[bytes] = []
-            while True:
-                chunk = await reader.read(4096)
-                if not chunk:
-                    break
-                chunks.append(chunk)
-            return b"".join(chunks).decode("utf-8", errors="replace")
-        finally:
-            writer.close()
-            with contextlib.suppress(OSError):
-                await writer.wait_closed()
-
-    async def async_get_state(self) -> ProphecyState:
-        """Fetch current device state. Merges preset names from a recent cache."""
-        raw = await self._post(_STATE_CMD)
+        generation, raw = await self._request(STATE_CMD, timeout=timeout)
         data = _parse_json_response(raw)
-        if not _looks_like_state(data):
+        if not looks_like_state(data):
             raise ProphecyResponseError(
                 "Device response is missing expected state keys"
             )
-        return _parse_state(data)
+        state = _parse_state(data, self._last_state, keep_raw=keep_raw)
+        state.generation = generation
+        self._last_state = state
+        return state
+
+    async def watch(
+        self,
+        *,
+        min_interval: float = WATCH_MIN_INTERVAL,
+        max_interval: float = WATCH_MAX_INTERVAL,
+    ) -> AsyncIterator[StateChange]:
+        """Poll the device and yield each change, starting with the full state.
+
+        The schedule adapts: polls run every `min_interval` seconds right
+        after a change, and stretch by ``WATCH_BACKOFF`` per quiet poll up
+        to `max_interval`. A failed poll is logged and retried after
+        `max_interval`; the next change is still computed against the last
+        state seen, so nothing is lost across an outage.
+        """
+        previous: ProphecyState | None = None
+        interval = min_interval
+        while True:
+            try:
+                state = await self.async_get_state()
+            except ProphecyError as err:
+                _LOGGER.debug("Watch poll of %s failed: %s", self._host, err)
+                interval = max_interval
+            else:
+                change = diff_states(previous, state)
+                previous = state
+                if change is None:
+                    interval = min(interval * WATCH_BACKOFF, max_interval)
+                else:
+                    interval = min_interval
+                    yield change
+            await asyncio.sleep(interval)
 
     async def async_load_presets(self) -> dict[int, str]:
-        """Fetch the 8 preset names (`namem1..namem8`)."""
-        raw = await self._post(_LOAD_PRESETS_CMD)
+        """Fetch the 8 preset names (`namem1..namem8`).
+
+        A response identical to the previous one is not parsed again: the
+        previous dict itself is returned, so callers can tell "unchanged"
+        by identity.
+        """
+        raw = await self._post(LOAD_PRESETS_CMD)
+        if raw == self._presets_raw:
+            return self._presets
         data = _parse_json_response(raw)
-        return {
+        self._presets = {
             i: _truncate(str(data.get(f"namem{i}", f"Preset {i}")))
             for i in range(1, NUM_PRESETS + 1)
         }
+        self._presets_raw = raw
+        return self._presets
 
     async def async_set_output(self, output: int, source: int) -> None:
         """Route a single output to a specific input (0 = mute)."""
-        await self._post(f"out{output}={source}")
+        await self._post_routing(f"out{output}={source}", f"out{output}")
 
     async def async_set_all_outputs(self, source: int) -> None:
         """Route all outputs to a single input."""
-        await self._post(f"outa={source}")
+        await self._post_routing(f"outa={source}", "all")
 
     async def async_mute_all(self) -> None:
         """Mute all outputs."""
         await self.async_set_all_outputs(MUTE_INPUT)
 
-    async def async_power(self, on: bool) -> None:
-        """Turn the device power on or off."""
-        await self._post("poweron" if on else "poweroff")
+    async def async_power(self, on: bool) -> int:
+        """Turn the device power on or off; return the command's sequence.
+
+        The sequence number is comparable with `ProphecyState.generation`:
+        a state with a lower generation was read before this command.
+        Powering on starts the boot phase: routing commands issued until
+        the matrix reports itself on are held and then sent together.
+        """
+        sequence, _ = await self._request("poweron" if on else "poweroff")
+        if on:
+            self._start_boot()
+        else:
+            self._powered_off = True
+        return sequence
 
     async def async_set_names(
         self,
-        input_names: dict[int, str],
-        output_names: dict[int, str],
+        input_names: Mapping[int, str],
+        output_names: Mapping[int, str],
     ) -> None:
         """Write input and output name labels to the device."""
         parts: list[str] = []
@@ -198,7 +689,7 @@ class GofancoProphecyClient:
     async def async_recall_preset(self, index: int) -> None:
         """Recall a saved preset (1-indexed)."""
         _validate_preset_index(index)
-        await self._post(f"call={index}")
+        await self._post_routing(f"call={index}", "all")
 
     async def async_save_preset(self, index: int) -> None:
         """Save the current routing into a preset slot (1-indexed)."""
@@ -224,7 +715,7 @@ def _truncate(value: str) -> str:
     return value[:NAME_MAX_LEN]
 
 
-def _strip_http_preamble(raw: str) -> str:
+def strip_http_preamble(raw: str) -> str:
     r"""Return just the body, rejecting non-2xx responses.
 
     The device replies with either ``HTTP/1.0 <code> <msg>\r\n\r\n<body>`` or
@@ -235,14 +726,12 @@ def _strip_http_preamble(raw: str) -> str:
         return raw
     if raw.startswith("HTTP/"):
         try:
-            status_line, rest = raw.split("\r\n", 1)
+            _, rest = raw.split("\r\n", 1)
         except ValueError:
             return raw
-        parts = status_line.split(" ", 2)
-        if len(parts) >= 2 and parts[1].isdigit():
-            code = int(parts[1])
-            if not 200 <= code < 300:
-                raise ProphecyResponseError(f"HTTP {code} from device")
+        code = _status_code(raw)
+        if code is not None and not 200 <= code < 300:
+            raise ProphecyResponseError(f"HTTP {code} from device")
         header_end = rest.find("\r\n\r\n")
         if header_end != -1:
             return rest[header_end + 4 :]
@@ -250,6 +739,16 @@ def _strip_http_preamble(raw: str) -> str:
     return raw
 
 
+def _status_code(raw: str | None) -> int | None:
+    """Return the HTTP status code of a raw reply, or None if it has none."""
+    if not raw or not raw.startswith("HTTP/"):
+        return None
+    parts = raw.split("\r\n", 1)[0].split(" ", 2)
+    if len(parts) >= 2 and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
 def _parse_json_response(raw: str) -> dict[str, object]:
     """Parse a JSON object response, with diagnostic logging on failure."""
     try:
@@ -262,49 +761,97 @@ def _parse_json_response(raw: str) -> dict[str, object]:
     return data
 
 
-def _looks_like_state(data: dict[str, object]) -> bool:
+def looks_like_state(data: dict[str, object]) -> bool:
     """Heuristic: the reply is a state dump if it has any of the known keys."""
     return any(k in data for k in ("out1", "powstatus", "poweron"))
 
 
-def _parse_state(data: dict[str, object]) -> ProphecyState:
-    """Parse a raw state response into a ProphecyState."""
-    outputs: dict[int, int] = {}
+def _parse_names(
+    data: dict[str, object], key: str, count: int, fallback: str
+) -> Mapping[int, str]:
+    """Parse `<key>1..<key><count>` labels, defaulting blanks to `<fallback> N`."""
+    names: dict[int, str] = {}
+    for i in range(1, count + 1):
+        raw_name = data.get(f"{key}{i}")
+        names[i] = _truncate(str(raw_name) if raw_name else f"{fallback} {i}")
+    return names
+
+
+def _reuse_if_equal(
+    fresh: Mapping[int, str], previous: Mapping[int, str]
+) -> Mapping[int, str]:
+    """Return `previous` when it matches `fresh`, letting the fresh copy go."""
+    return previous if fresh == previous else fresh
+
+
+def _connect_timeout(timeout: float) -> float:
+    """Return the connect budget leaving a hostname retry half the timeout."""
+    return timeout / 2
+
+
+def _retrieve_exception(task: asyncio.Future[None]) -> None:
+    """Mark a background future's exception retrieved; its waiters report it."""
+    if not task.cancelled():
+        task.exception()
+
+
+def _parse_state(
+    data: dict[str, object],
+    previous: ProphecyState | None = None,
+    *,
+    keep_raw: bool = False,
+) -> ProphecyState:
+    """Parse a raw state response into a ProphecyState.
+
+    Name mappings equal to those of `previous` are reused rather than kept
+    as fresh copies, so steady-state polls don't accumulate duplicates.
+    """
+    routes = bytearray([MUTE_INPUT] * NUM_OUTPUTS)
     for i in range(1, NUM_OUTPUTS + 1):
         value = data.get(f"out{i}")
         if value is None:
-            outputs[i] = MUTE_INPUT
             continue
         try:
-            outputs[i] = int(str(value))
+            source = int(str(value))
         except (TypeError, ValueError):
-            outputs[i] = MUTE_INPUT
-
-    input_names: dict[int, str] = {}
-    for i in range(1, NUM_INPUTS + 1):
-        raw_name = data.get(f"namein{i}")
-        input_names[i] = _truncate(str(raw_name) if raw_name else f"Input {i}")
+            continue
+        # Values that don't fit the one-byte encoding are treated as mute,
+        # the same as unparsable ones.
+        if 0 <= source <= 0xFF:
+            routes[i - 1] = source
 
-    output_names: dict[int, str] = {}
-    for i in range(1, NUM_OUTPUTS + 1):
-        raw_name = data.get(f"nameout{i}")
-        output_names[i] = _truncate(str(raw_name) if raw_name else f"Output {i}")
+    input_names = _parse_names(data, "namein", NUM_INPUTS, "Input")
+    output_names = _parse_names(data, "nameout", NUM_OUTPUTS, "Output")
 
     power = str(data.get("powstatus", "0")) == "1"
 
+    if previous is not None:
+        input_names = _reuse_if_equal(input_names, previous.input_names)
+        output_names = _reuse_if_equal(output_names, previous.output_names)
+
     return ProphecyState(
         power=power,
-        outputs=outputs,
+        outputs=ProphecyRouting(bytes(routes)),
         input_names=input_names,
         output_names=output_names,
-        raw=data,
+        raw=data if keep_raw else None,
     )
 
 
 __all__ = [
+    "LOAD_PRESETS_CMD",
+    "STATE_CMD",
+    "ClientStats",
+    "Exchange",
     "GofancoProphecyClient",
     "ProphecyConnectionError",
     "ProphecyError",
     "ProphecyResponseError",
+    "ProphecyRouting",
     "ProphecyState",
+    "RouteChange",
+    "StateChange",
+    "diff_states",
+    "looks_like_state",
+    "strip_http_preamble",
 ]
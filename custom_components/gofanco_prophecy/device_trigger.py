@@ -0,0 +1,125 @@
+"""Device triggers for the Gofanco Prophecy HDMI Matrix.
+
+Built on the coordinator's ``gofanco_prophecy_route_changed`` event: one
+bus listener per trigger, filtered on the event's diff, instead of state
+triggers on every routing entity plus templates working out what changed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.components.device_automation import DEVICE_TRIGGER_BASE_SCHEMA
+from homeassistant.const import CONF_DEVICE_ID, CONF_DOMAIN, CONF_PLATFORM, CONF_TYPE
+from homeassistant.core import CALLBACK_TYPE, Event, HassJob, HomeAssistant, callback
+from homeassistant.helpers.trigger import TriggerActionType, TriggerInfo
+from homeassistant.helpers.typing import ConfigType
+import voluptuous as vol
+
+from .const import DOMAIN, EVENT_ROUTE_CHANGED, NUM_OUTPUTS
+
+CONF_SUBTYPE = "subtype"
+
+TRIGGER_ROUTE_CHANGED = "route_changed"
+TRIGGER_OUTPUT_CHANGED = "output_changed"
+TRIGGER_POWERED_ON = "powered_on"
+TRIGGER_POWERED_OFF = "powered_off"
+
+TRIGGER_TYPES = {
+    TRIGGER_ROUTE_CHANGED,
+    TRIGGER_OUTPUT_CHANGED,
+    TRIGGER_POWERED_ON,
+    TRIGGER_POWERED_OFF,
+}
+OUTPUT_SUBTYPES = {f"output_{output}": output for output in range(1, NUM_OUTPUTS + 1)}
+
+
+def _require_output_subtype(config: ConfigType) -> ConfigType:
+    """Reject output triggers that do not name an output."""
+    if config[CONF_TYPE] == TRIGGER_OUTPUT_CHANGED and CONF_SUBTYPE not in config:
+        raise vol.Invalid(f"{TRIGGER_OUTPUT_CHANGED} needs an output subtype")
+    return config
+
+
+TRIGGER_SCHEMA = vol.All(
+    DEVICE_TRIGGER_BASE_SCHEMA.extend(
+        {
+            vol.Required(CONF_TYPE): vol.In(TRIGGER_TYPES),
+            vol.Optional(CONF_SUBTYPE): vol.In(OUTPUT_SUBTYPES),
+        }
+    ),
+    _require_output_subtype,
+)
+
+
+async def async_get_triggers(
+    hass: HomeAssistant, device_id: str
+) -> list[dict[str, Any]]:
+    """List the triggers offered by an HDMI matrix device."""
+    base = {
+        CONF_PLATFORM: "device",
+        CONF_DOMAIN: DOMAIN,
+        CONF_DEVICE_ID: device_id,
+    }
+    triggers = [
+        {**base, CONF_TYPE: trigger_type}
+        for trigger_type in (
+            TRIGGER_ROUTE_CHANGED,
+            TRIGGER_POWERED_ON,
+            TRIGGER_POWERED_OFF,
+        )
+    ]
+    triggers.extend(
+        {**base, CONF_TYPE: TRIGGER_OUTPUT_CHANGED, CONF_SUBTYPE: subtype}
+        for subtype in OUTPUT_SUBTYPES
+    )
+    return triggers
+
+
+async def async_attach_trigger(
+    hass: HomeAssistant,
+    config: ConfigType,
+    action: TriggerActionType,
+    trigger_info: TriggerInfo,
+) -> CALLBACK_TYPE:
+    """Listen for route-changed events matching the trigger."""
+    device_id: str = config[CONF_DEVICE_ID]
+    trigger_type: str = config[CONF_TYPE]
+    output = OUTPUT_SUBTYPES.get(config.get(CONF_SUBTYPE, ""))
+    job = HassJob(action, f"{DOMAIN} device trigger {trigger_info}")
+
+    @callback
+    def _matches(event_data: Mapping[str, Any]) -> bool:
+        if event_data.get(CONF_DEVICE_ID) != device_id:
+            return False
+        power: bool = event_data["power"]
+        power_changed = event_data["old_power"] != power
+        if trigger_type == TRIGGER_POWERED_ON:
+            return power_changed and power
+        if trigger_type == TRIGGER_POWERED_OFF:
+            return power_changed and not power
+        if trigger_type == TRIGGER_OUTPUT_CHANGED:
+            return any(change["output"] == output for change in event_data["changes"])
+        return True
+
+    @callback
+    def _handle(event: Event) -> None:
+        hass.async_run_hass_job(
+            job,
+            {
+                "trigger": {
+                    **trigger_info["trigger_data"],
+                    CONF_PLATFORM: "device",
+                    CONF_DOMAIN: DOMAIN,
+                    CONF_DEVICE_ID: device_id,
+                    CONF_TYPE: trigger_type,
+                    CONF_SUBTYPE: config.get(CONF_SUBTYPE),
+                    "event": event,
+                    "description": f"{DOMAIN} {trigger_type}",
+                }
+            },
+            event.context,
+        )
+
+    return hass.bus.async_listen(EVENT_ROUTE_CHANGED, _handle, event_filter=_matches)
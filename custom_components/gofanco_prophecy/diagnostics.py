@@ -4,11 +4,12 @@ from __future__ import annotations
 
 from typing import Any
 
-from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
 from homeassistant.const import CONF_HOST
 from homeassistant.core import HomeAssistant
 
 from .coordinator import ProphecyConfigEntry
+from .device import ProphecyError, ProphecyState
 
 _REDACT_KEYS = {CONF_HOST}
 
@@ -18,18 +19,60 @@ async def async_get_config_entry_diagnostics(
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
     coordinator = entry.runtime_data
-    state = coordinator.data
+    # One read serves both the parsed and the raw view of the device; none
+    # at all while the event loop is lagging, like any background work.
+    state: ProphecyState | None
+    raw_state: Any
+    if coordinator.loop_lag.stressed:
+        state = coordinator.data
+        raw_state = {"error": "skipped while the event loop is lagging"}
+    else:
+        try:
+            state = await coordinator.async_get_state(keep_raw=True)
+        except ProphecyError as err:
+            state = coordinator.data
+            raw_state = {"error": str(err)}
+        else:
+            raw_state = state.raw
+    host: str = entry.data[CONF_HOST]
     return {
         "entry": {
             "title": entry.title,
             "version": entry.version,
             "data": async_redact_data(dict(entry.data), _REDACT_KEYS),
+            "options": dict(entry.options),
         },
         "state": {
             "power": state.power if state else None,
-            "outputs": state.outputs if state else None,
-            "input_names": state.input_names if state else None,
-            "output_names": state.output_names if state else None,
-            "preset_names": state.preset_names if state else None,
+            "outputs": dict(state.outputs) if state else None,
+            "input_names": dict(state.input_names) if state else None,
+            "output_names": dict(state.output_names) if state else None,
+            "preset_names": dict(state.preset_names) if state else None,
         },
+        "raw_state": raw_state,
+        "client_stats": coordinator.client.stats.as_dict(),
+        "loop_lag": {
+            "lag_ms": round(coordinator.loop_lag.lag * 1000, 1),
+            "stretch": round(coordinator.loop_lag.stretch, 2),
+            "poll_interval_s": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval
+                else None
+            ),
+        },
+        "stale_polls_discarded": coordinator.stale_polls_discarded,
+        "wire_trace": (
+            [
+                _redact_host(record.as_dict(), host)
+                for record in coordinator.client.trace_snapshot()
+            ]
+            if coordinator.client.trace_enabled
+            else None
+        ),
     }
+
+
+def _redact_host(record: dict[str, Any], host: str) -> dict[str, Any]:
+    """Scrub the device host from the request headers of a trace record."""
+    record["request"] = record["request"].replace(host, REDACTED)
+    return record
@@ -0,0 +1,128 @@
+"""Subnet sweep for Prophecy matrices.
+
+The matrix has no mDNS, SSDP or DHCP signature to discover it by, so
+installers with several units end up typing addresses one at a time. This
+module probes every host of a subnet with the normal state query, with
+bounded concurrency and a short connect timeout so dead addresses cost
+little, and stops reading a reply as soon as it parses as a state dump
+rather than waiting for the device to close the socket. A /24 sweep takes
+roughly ``254 / DISCOVERY_MAX_PARALLEL`` connect timeouts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator, Mapping
+import contextlib
+from dataclasses import dataclass
+from ipaddress import IPv4Address, IPv4Network
+import json
+import logging
+
+from .const import (
+    DEFAULT_PORT,
+    DISCOVERY_CONNECT_TIMEOUT,
+    DISCOVERY_MAX_PARALLEL,
+    DISCOVERY_PROBE_TIMEOUT,
+)
+from .device import (
+    Exchange,
+    GofancoProphecyClient,
+    ProphecyError,
+    looks_like_state,
+    strip_http_preamble,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class DiscoveredMatrix:
+    """A host that answered the state query like a Prophecy matrix."""
+
+    host: str
+    port: int
+    output_names: Mapping[int, str]
+
+
+async def async_discover(
+    network: IPv4Network,
+    port: int = DEFAULT_PORT,
+    *,
+    max_parallel: int = DISCOVERY_MAX_PARALLEL,
+    connect_timeout: float = DISCOVERY_CONNECT_TIMEOUT,
+    probe_timeout: float = DISCOVERY_PROBE_TIMEOUT,
+    limit: int | None = None,
+) -> list[DiscoveredMatrix]:
+    """Probe every host in `network`; return the matrices found, by address.
+
+    With `limit`, the sweep stops once that many matrices have been found.
+    """
+    hosts: Iterator[IPv4Address] = network.hosts()
+    found: list[DiscoveredMatrix] = []
+
+    async def _worker() -> None:
+        for address in hosts:
+            if limit is not None and len(found) >= limit:
+                return
+            matrix = await _async_probe(
+                str(address), port, connect_timeout, probe_timeout
+            )
+            if matrix is not None:
+                found.append(matrix)
+
+    await asyncio.gather(*(_worker() for _ in range(max_parallel)))
+    found.sort(key=lambda matrix: IPv4Address(matrix.host))
+    return found[:limit]
+
+
+async def _async_probe(
+    host: str, port: int, connect_timeout: float, probe_timeout: float
+) -> DiscoveredMatrix | None:
+    """Return the matrix at `host`, or None if nothing Prophecy-like answers."""
+    client = GofancoProphecyClient(
+        host,
+        port,
+        timeout=probe_timeout,
+        exchange=_probe_exchange(host, port, connect_timeout),
+    )
+    try:
+        state = await client.async_get_state()
+    except ProphecyError as err:
+        _LOGGER.debug("No matrix at %s:%s: %s", host, port, err)
+        return None
+    return DiscoveredMatrix(host=host, port=port, output_names=state.output_names)
+
+
+def _probe_exchange(host: str, port: int, connect_timeout: float) -> Exchange:
+    """Build an exchange that connects quickly and stops at a full state reply."""
+
+    async def _exchange(request: bytes) -> str:
+        async with asyncio.timeout(connect_timeout):
+            reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            received = b""
+            while chunk := await reader.read(4096):
+                received += chunk
+                if _is_complete_state(received):
+                    break
+            return received.decode("utf-8", errors="replace")
+        finally:
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+
+    return _exchange
+
+
+def _is_complete_state(received: bytes) -> bool:
+    """Return whether `received` already holds a whole state reply."""
+    try:
+        data = json.loads(
+            strip_http_preamble(received.decode("utf-8", errors="replace"))
+        )
+    except (ProphecyError, ValueError):
+        return False
+    return isinstance(data, dict) and looks_like_state(data)
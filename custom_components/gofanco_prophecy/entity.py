@@ -1,7 +1,18 @@
-"""Shared base entity for the Gofanco Prophecy HDMI Matrix integration."""
+"""Shared base entity for the Gofanco Prophecy HDMI Matrix integration.
+
+Any change in the matrix's state — one output rerouted, one label edited —
+notifies every entity of the device. Each entity therefore describes what
+it actually shows in `_visible_state`, and skips the state write when that
+is unchanged since its last write, so a single reroute costs one or two
+writes instead of one per entity.
+
+Preset names refresh separately (see `ProphecyPresetNamesCoordinator`);
+only entities that set ``_shows_preset_names`` hear about them.
+"""
 
 from __future__ import annotations
 
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -13,6 +24,7 @@ class ProphecyEntity(CoordinatorEntity[ProphecyDataUpdateCoordinator]):
     """Base class for Gofanco Prophecy entities."""
 
     _attr_has_entity_name = True
+    _shows_preset_names = False
 
     def __init__(
         self,
@@ -30,3 +42,28 @@ class ProphecyEntity(CoordinatorEntity[ProphecyDataUpdateCoordinator]):
             model=MODEL,
             configuration_url=f"http://{coordinator.client.host}",
         )
+        self._written: object = None
+
+    def _visible_state(self) -> object:
+        """Return everything the entity's state and attributes derive from."""
+        return self.coordinator.data
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state about to be written on add."""
+        await super().async_added_to_hass()
+        if self._shows_preset_names:
+            self.async_on_remove(
+                self.coordinator.preset_names_coordinator.async_add_listener(
+                    self._handle_coordinator_update
+                )
+            )
+        self._written = (self.available, self._visible_state())
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when something this entity shows has changed."""
+        visible = (self.available, self._visible_state())
+        if visible == self._written:
+            return
+        self._written = visible
+        self.async_write_ha_state()
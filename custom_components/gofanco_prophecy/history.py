@@ -0,0 +1,360 @@
+"""Compact on-disk routing history and usage statistics.
+
+Every routing or power change the coordinator observes is appended to a
+per-entry log of fixed-width binary records — an 8-byte timestamp, a power
+byte and one byte per output — so a year of busy switching fits in a few
+hundred KiB and can be scanned in milliseconds. Answering "how long was the
+Apple TV on the living-room TV this month?" from the recorder would mean
+walking thousands of full entity state rows instead.
+
+Time the matrix was not observed counts as nothing. When a poll fails,
+the entry unloads, or a log left open by an unclean stop is loaded, an
+"unseen" marker record closes the current segment at the last moment the
+matrix was seen. While nothing changes, the log file's modification time
+is refreshed every ``HISTORY_SENSOR_INTERVAL`` to serve as that moment
+after a crash.
+
+The log rotates once it holds ``HISTORY_MAX_RECORDS`` records, keeping one
+previous generation. Running totals are kept in memory for the sensors;
+arbitrary time windows are answered by `RoutingHistory.async_query`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Coroutine, Iterable, Iterator, Mapping
+import contextlib
+from dataclasses import dataclass, field
+import logging
+import os
+from pathlib import Path
+import struct
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import (
+    DOMAIN,
+    HISTORY_MAX_RECORDS,
+    HISTORY_SENSOR_INTERVAL,
+    MUTE_INPUT,
+    NUM_INPUTS,
+    NUM_OUTPUTS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_RECORD = struct.Struct(f"<dB{NUM_OUTPUTS}s")
+# Set in the power byte of a record marking the matrix as no longer seen.
+_UNSEEN = 0x02
+
+
+@dataclass(slots=True, frozen=True)
+class HistoryRecord:
+    """The matrix's power and routing from `timestamp` onwards."""
+
+    timestamp: float
+    power: bool
+    routes: bytes
+    seen: bool = True
+    """False for a marker: unobserved from here, last seen as recorded."""
+
+    def pack(self) -> bytes:
+        """Encode as a fixed-width record."""
+        flags = int(self.power) | (0 if self.seen else _UNSEEN)
+        return _RECORD.pack(self.timestamp, flags, self.routes)
+
+    def unseen(self, timestamp: float) -> HistoryRecord:
+        """Return a marker closing this record's segment at `timestamp`."""
+        return HistoryRecord(timestamp, self.power, self.routes, seen=False)
+
+
+@dataclass(slots=True)
+class HistoryStats:
+    """Usage totals over a span of history."""
+
+    on_air: dict[tuple[int, int], float] = field(default_factory=dict)
+    """Seconds each (output, input) pair was live: powered and not muted."""
+    switches: dict[int, int] = field(default_factory=dict)
+    """Number of times each output changed input."""
+    power_changes: int = 0
+
+    def input_on_air(self, source: int) -> float:
+        """Return the seconds `source` was live on any output, summed."""
+        return sum(
+            seconds for (_, src), seconds in self.on_air.items() if src == source
+        )
+
+    def copy(self) -> HistoryStats:
+        """Return an independent copy."""
+        return HistoryStats(
+            on_air=dict(self.on_air),
+            switches=dict(self.switches),
+            power_changes=self.power_changes,
+        )
+
+    def add_segment(self, record: HistoryRecord, until: float) -> None:
+        """Credit on-air time for `record` holding until `until`."""
+        duration = until - record.timestamp
+        if duration <= 0 or not record.power or not record.seen:
+            return
+        for output, source in enumerate(record.routes, start=1):
+            if source != MUTE_INPUT:
+                key = (output, source)
+                self.on_air[key] = self.on_air.get(key, 0.0) + duration
+
+    def add_transition(self, before: HistoryRecord, after: HistoryRecord) -> None:
+        """Count the switches between two consecutive records."""
+        if before.power != after.power:
+            self.power_changes += 1
+        for output, (old, new) in enumerate(
+            zip(before.routes, after.routes, strict=True), start=1
+        ):
+            if old != new:
+                self.switches[output] = self.switches.get(output, 0) + 1
+
+    def as_dict(self) -> dict[str, object]:
+        """Return a JSON-serialisable view, keyed by output and input."""
+        return {
+            "on_air": {
+                f"output_{output}": {
+                    f"input_{source}": round(self.on_air.get((output, source), 0.0))
+                    for source in range(1, NUM_INPUTS + 1)
+                }
+                for output in range(1, NUM_OUTPUTS + 1)
+            },
+            "switches": {
+                f"output_{output}": self.switches.get(output, 0)
+                for output in range(1, NUM_OUTPUTS + 1)
+            },
+            "power_changes": self.power_changes,
+        }
+
+
+def summarize(
+    records: Iterable[HistoryRecord], since: float, until: float
+) -> HistoryStats:
+    """Compute usage over ``[since, until]`` from time-ordered records."""
+    stats = HistoryStats()
+    previous: HistoryRecord | None = None
+    for record in records:
+        if record.timestamp > until:
+            break
+        if previous is not None:
+            if record.timestamp > since:
+                stats.add_transition(previous, record)
+            stats.add_segment(_clip(previous, since), min(record.timestamp, until))
+        previous = record
+    if previous is not None:
+        stats.add_segment(_clip(previous, since), until)
+    return stats
+
+
+def _clip(record: HistoryRecord, since: float) -> HistoryRecord:
+    """Move a record's start forward to `since` if it began earlier."""
+    if record.timestamp >= since:
+        return record
+    return HistoryRecord(since, record.power, record.routes, record.seen)
+
+
+class RoutingHistory:
+    """Append-only routing log for one matrix, with running totals."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        *,
+        max_records: int = HISTORY_MAX_RECORDS,
+    ) -> None:
+        """Initialize the history; call `async_load` before observing."""
+        self._hass = hass
+        self._path = Path(
+            hass.config.path(STORAGE_DIR, f"{DOMAIN}_history_{entry_id}.bin")
+        )
+        self._max_records = max_records
+        self._totals = HistoryStats()
+        self._last: HistoryRecord | None = None
+        self._pending: list[HistoryRecord] = []
+        self._write_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._seen_at = 0.0
+        self._touched_at = 0.0
+
+    @property
+    def _rotated_path(self) -> Path:
+        return self._path.with_name(f"{self._path.name}.1")
+
+    async def async_load(self) -> None:
+        """Rebuild running totals from the log on disk.
+
+        A log whose last segment was never closed (Home Assistant stopped
+        without unloading, or crashed) is closed at the log's modification
+        time, the last moment the matrix is known to have been seen.
+        """
+        records, modified = await self._hass.async_add_executor_job(self._read_log)
+        if not records:
+            return
+        if (last := records[-1]).seen:
+            marker = last.unseen(max(last.timestamp, modified))
+            records.append(marker)
+            self._pending.append(marker)
+            self._schedule(self._async_flush(), "history flush")
+        self._totals = summarize(records, records[0].timestamp, records[-1].timestamp)
+        self._last = records[-1]
+
+    @callback
+    def async_observe(self, power: bool, outputs: Mapping[int, int]) -> None:
+        """Record the current state if it differs from the last one seen."""
+        routes = bytes(
+            outputs.get(output, MUTE_INPUT) & 0xFF
+            for output in range(1, NUM_OUTPUTS + 1)
+        )
+        now = self._seen_at = time.time()
+        last = self._last
+        if (
+            last is not None
+            and last.seen
+            and last.power == power
+            and last.routes == routes
+        ):
+            if now - self._touched_at >= HISTORY_SENSOR_INTERVAL.total_seconds():
+                self._touched_at = now
+                self._schedule(self._async_touch(), "history heartbeat")
+            return
+        record = HistoryRecord(now, power, routes)
+        if last is not None:
+            self._totals.add_segment(last, record.timestamp)
+            self._totals.add_transition(last, record)
+        self._append_record(record)
+
+    @callback
+    def async_mark_unseen(self) -> None:
+        """Close the current segment where the matrix was last seen.
+
+        Called when a poll fails, so unreachable time is not counted as
+        on air; the next successful observation opens a new segment.
+        """
+        last = self._last
+        if last is None or not last.seen:
+            return
+        marker = last.unseen(max(self._seen_at, last.timestamp))
+        self._totals.add_segment(last, marker.timestamp)
+        self._append_record(marker)
+
+    async def async_close(self) -> None:
+        """Close the current segment and wait for the log to reach disk."""
+        self.async_mark_unseen()
+        await self.async_flush()
+
+    @callback
+    def _append_record(self, record: HistoryRecord) -> None:
+        """Make `record` the latest and queue it for writing."""
+        self._last = record
+        self._touched_at = record.timestamp
+        self._pending.append(record)
+        self._schedule(self._async_flush(), "history flush")
+
+    @callback
+    def _schedule(self, job: Coroutine[Any, Any, None], name: str) -> None:
+        """Run `job` as a tracked task, so `async_flush` waits for it."""
+        task = self._hass.async_create_task(job, f"{DOMAIN} {name}", eager_start=True)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def current_stats(self) -> HistoryStats:
+        """Return all-time totals including the ongoing segment."""
+        stats = self._totals.copy()
+        if self._last is not None:
+            stats.add_segment(self._last, time.time())
+        return stats
+
+    async def async_query(
+        self, since: float | None = None, until: float | None = None
+    ) -> HistoryStats:
+        """Compute usage over a window (default: all of the retained log)."""
+        await self.async_flush()
+        records = await self._hass.async_add_executor_job(self._read_all)
+        now = time.time()
+        return summarize(
+            records,
+            since if since is not None else 0.0,
+            min(until, now) if until is not None else now,
+        )
+
+    async def async_flush(self) -> None:
+        """Wait for every observed change to reach disk."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def async_remove(self) -> None:
+        """Delete the log files (the config entry is being removed)."""
+        await self.async_flush()
+        await self._hass.async_add_executor_job(self._remove_files)
+
+    async def _async_flush(self) -> None:
+        """Write pending records, one writer at a time, in observed order."""
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                await self._hass.async_add_executor_job(self._append, batch)
+            except OSError as err:
+                _LOGGER.warning("Could not write routing history: %s", err)
+
+    def _append(self, batch: list[HistoryRecord]) -> None:
+        """Append records, rotating the log when it is full (executor)."""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        size = 0
+        with contextlib.suppress(FileNotFoundError):
+            size = self._path.stat().st_size
+            if size >= self._max_records * _RECORD.size:
+                self._path.replace(self._rotated_path)
+                size = 0
+        if torn := size % _RECORD.size:
+            # Drop a record torn by a crash so the new ones stay aligned.
+            os.truncate(self._path, size - torn)
+        with self._path.open("ab") as fp:
+            fp.write(b"".join(record.pack() for record in batch))
+
+    async def _async_touch(self) -> None:
+        """Refresh the log's modification time as a "last seen" heartbeat."""
+        await self._hass.async_add_executor_job(self._touch)
+
+    def _touch(self) -> None:
+        """Set the log's modification time to now, if it exists (executor)."""
+        with contextlib.suppress(OSError):
+            os.utime(self._path)
+
+    def _read_log(self) -> tuple[list[HistoryRecord], float]:
+        """Read every record and the log's modification time (executor)."""
+        try:
+            modified = self._path.stat().st_mtime
+        except OSError:
+            modified = 0.0
+        return self._read_all(), modified
+
+    def _read_all(self) -> list[HistoryRecord]:
+        """Read the rotated and current logs, oldest first (executor)."""
+        records: list[HistoryRecord] = []
+        for path in (self._rotated_path, self._path):
+            with contextlib.suppress(FileNotFoundError):
+                records.extend(_iter_records(path.read_bytes()))
+        return records
+
+    def _remove_files(self) -> None:
+        """Delete both log generations (executor)."""
+        for path in (self._rotated_path, self._path):
+            path.unlink(missing_ok=True)
+
+
+def _iter_records(data: bytes) -> Iterator[HistoryRecord]:
+    """Decode whole records, ignoring a torn trailing write."""
+    usable = len(data) - len(data) % _RECORD.size
+    for timestamp, flags, routes in _RECORD.iter_unpack(data[:usable]):
+        yield HistoryRecord(
+            timestamp, bool(flags & 0x01), routes, seen=not flags & _UNSEEN
+        )
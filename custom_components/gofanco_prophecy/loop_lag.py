@@ -0,0 +1,126 @@
+"""Event-loop lag tracking, used to back off background work.
+
+When the Home Assistant event loop is overloaded, every poll still costs a
+parse, a diff and a fan-out to the entities, adding to the backlog. The
+`LoopLagMonitor` samples how late a timer fires on the loop — the time a
+ready callback waits to run — and keeps a smoothed lag. While that lag is
+above ``LOOP_LAG_THRESHOLD`` it reports a ``stretch`` factor, and tells
+its listeners whenever that factor changes so coordinators can lengthen
+their poll interval; periodic cosmetic updates (the on-air time sensors)
+are skipped. Commands and the refresh that
+follows them are never delayed.
+
+One monitor is shared by every matrix and only runs while at least one
+config entry is loaded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import (
+    DOMAIN,
+    LOOP_LAG_MAX_STRETCH,
+    LOOP_LAG_SAMPLE_INTERVAL,
+    LOOP_LAG_SMOOTHING,
+    LOOP_LAG_THRESHOLD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_MONITOR: HassKey[LoopLagMonitor] = HassKey(f"{DOMAIN}_loop_lag")
+
+
+class LoopLagMonitor:
+    """Smoothed measurement of how late the event loop runs callbacks."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize an idle monitor; `async_acquire` starts sampling."""
+        self._loop = loop
+        self._users = 0
+        self._expected = 0.0
+        self._handle: asyncio.TimerHandle | None = None
+        self._listeners: list[Callable[[], None]] = []
+        self.lag = 0.0
+        """Exponentially smoothed lag, in seconds."""
+
+    @property
+    def stressed(self) -> bool:
+        """Return whether the loop is lagging enough to back off."""
+        return self.lag >= LOOP_LAG_THRESHOLD
+
+    @property
+    def stretch(self) -> float:
+        """Return the factor to lengthen background intervals by (1 = none)."""
+        if not self.stressed:
+            return 1.0
+        return min(self.lag / LOOP_LAG_THRESHOLD, LOOP_LAG_MAX_STRETCH)
+
+    @callback
+    def async_acquire(self) -> CALLBACK_TYPE:
+        """Register a user, starting sampling; return the release callback."""
+        self._users += 1
+        if self._handle is None:
+            self._schedule()
+
+        @callback
+        def _release() -> None:
+            self._users -= 1
+            if not self._users and self._handle is not None:
+                self._handle.cancel()
+                self._handle = None
+                self.lag = 0.0
+
+        return _release
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call `update_callback` whenever `stretch` changes; return the remover."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def _remove() -> None:
+            self._listeners.remove(update_callback)
+
+        return _remove
+
+    @callback
+    def async_add_sample(self, lag: float) -> None:
+        """Fold one measured lag, in seconds, into the smoothed lag."""
+        was_stressed = self.stressed
+        stretch = self.stretch
+        self.lag += LOOP_LAG_SMOOTHING * (lag - self.lag)
+        if self.stressed != was_stressed:
+            _LOGGER.debug(
+                "Event loop lag %.0f ms: %s background polling",
+                self.lag * 1000,
+                "stretching" if self.stressed else "resuming normal",
+            )
+        if self.stretch != stretch:
+            for update_callback in list(self._listeners):
+                update_callback()
+
+    @callback
+    def _schedule(self) -> None:
+        """Arm the next sample."""
+        self._expected = self._loop.time() + LOOP_LAG_SAMPLE_INTERVAL
+        self._handle = self._loop.call_at(self._expected, self._sample)
+
+    @callback
+    def _sample(self) -> None:
+        """Fold how late this callback ran into the smoothed lag."""
+        self.async_add_sample(max(self._loop.time() - self._expected, 0.0))
+        self._schedule()
+
+
+@callback
+def async_get_loop_lag_monitor(hass: HomeAssistant) -> LoopLagMonitor:
+    """Return the monitor shared by every matrix."""
+    if (monitor := hass.data.get(_MONITOR)) is None:
+        monitor = hass.data[_MONITOR] = LoopLagMonitor(hass.loop)
+    return monitor
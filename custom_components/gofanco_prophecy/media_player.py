@@ -26,7 +26,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import MUTE_INPUT, NUM_OUTPUTS
+from .const import CONF_COMPACT, FRESH_STATE_MAX_AGE, MUTE_INPUT, NUM_OUTPUTS
 from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
 from .device import ProphecyError
 from .entity import ProphecyEntity
@@ -47,6 +47,8 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up media_player entities — one per output."""
+    if entry.options.get(CONF_COMPACT):
+        return
     coordinator = entry.runtime_data
     async_add_entities(
         ProphecyOutputMediaPlayer(coordinator, output)
@@ -73,6 +75,11 @@ class ProphecyOutputMediaPlayer(ProphecyEntity, MediaPlayerEntity):
         self._attr_suggested_object_id = f"output_{output}"
         self._last_source: int | None = None
 
+    def _visible_state(self) -> object:
+        """Return the power, this output's route and the input names."""
+        data = self.coordinator.data
+        return (data.power, data.outputs.get(self._output), data.input_names)
+
     @property
     def state(self) -> MediaPlayerState:
         """Reflect power + mute state."""
@@ -115,7 +122,16 @@ class ProphecyOutputMediaPlayer(ProphecyEntity, MediaPlayerEntity):
     async def async_mute_volume(self, mute: bool) -> None:
         """Route to the mute input, or unmute by restoring the previous source."""
         if mute:
-            current = self.coordinator.data.outputs.get(self._output)
+            state = self.coordinator.data
+            if not self.coordinator.data_is_fresh:
+                # Too old to know what to restore later; ask the device.
+                try:
+                    state = await self.coordinator.async_get_state(FRESH_STATE_MAX_AGE)
+                except ProphecyError as err:
+                    raise HomeAssistantError(
+                        f"Failed to mute output {self._output}: {err}"
+                    ) from err
+            current = state.outputs.get(self._output)
             if current and current != MUTE_INPUT:
                 self._last_source = current
             await self._run(
@@ -140,11 +156,22 @@ class ProphecyOutputMediaPlayer(ProphecyEntity, MediaPlayerEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Power the matrix on (global)."""
-        await self._run("power on", self.coordinator.client.async_power, True)
+        await self._async_set_power(True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Power the matrix off (global)."""
-        await self._run("power off", self.coordinator.client.async_power, False)
+        await self._async_set_power(False)
+
+    async def _async_set_power(self, on: bool) -> None:
+        """Switch the global power, unless it already is, and refresh."""
+        try:
+            sent = await self.coordinator.async_set_power(on)
+        except ProphecyError as err:
+            raise HomeAssistantError(
+                f"Failed to {'power on' if on else 'power off'} HDMI matrix: {err}"
+            ) from err
+        if sent:
+            await self.coordinator.async_request_refresh()
 
     async def _run(self, label: str, func: Any, *args: Any) -> None:
         """Wrap a client mutation so failures surface as HomeAssistantError."""
@@ -0,0 +1,96 @@
+"""Known preset contents and the active-preset index.
+
+The firmware stores eight routing presets but never reports what is in
+them, so "which preset is on screen?" cannot be asked of the device. The
+integration answers it itself: every `save_preset` captures the routing
+that was saved, persists it, and indexes it by that routing. Since
+`ProphecyRouting` hashes by its bytes, finding the active preset on a poll
+is one dict lookup.
+
+Presets saved outside Home Assistant (front panel, web UI) are unknown
+until they are saved again from here; an unknown preset is never reported
+as active. A known slot can also be overwritten from there, so the
+coordinator only skips a recall while the routing has stayed on a preset
+it put in place itself.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TypedDict
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, NUM_PRESETS
+from .device import ProphecyRouting
+
+_STORAGE_VERSION = 1
+
+
+class _StoredPresets(TypedDict):
+    presets: dict[str, list[int]]
+
+
+class PresetIndex:
+    """Routing saved into each preset slot, indexed by routing."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize an empty index; call `async_load` to restore it."""
+        self._store: Store[_StoredPresets] = Store(
+            hass, _STORAGE_VERSION, f"{DOMAIN}.presets.{entry_id}"
+        )
+        self._contents: dict[int, ProphecyRouting] = {}
+        self._by_routing: dict[ProphecyRouting, int] = {}
+
+    async def async_load(self) -> None:
+        """Restore the contents saved in earlier runs."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self._contents = {
+            int(index): ProphecyRouting(bytes(routes))
+            for index, routes in data["presets"].items()
+        }
+        self._reindex()
+
+    def contents(self, index: int) -> ProphecyRouting | None:
+        """Return the routing saved in preset `index`, if known."""
+        return self._contents.get(index)
+
+    def active(self, outputs: Mapping[int, int]) -> int | None:
+        """Return the preset whose contents match `outputs`, if any.
+
+        When several presets hold the same routing the lowest one wins.
+        """
+        return self._by_routing.get(_routing(outputs))
+
+    async def async_record(self, index: int, outputs: Mapping[int, int]) -> None:
+        """Remember that preset `index` now holds `outputs`, and persist it."""
+        self._contents[index] = _routing(outputs)
+        self._reindex()
+        await self._store.async_save(
+            {
+                "presets": {
+                    str(slot): list(routes.values())
+                    for slot, routes in sorted(self._contents.items())
+                }
+            }
+        )
+
+    async def async_remove(self) -> None:
+        """Delete the stored contents (the config entry is being removed)."""
+        await self._store.async_remove()
+
+    def _reindex(self) -> None:
+        """Rebuild the routing → preset index from the contents."""
+        self._by_routing = {}
+        for index in range(NUM_PRESETS, 0, -1):
+            if (routes := self._contents.get(index)) is not None:
+                self._by_routing[routes] = index
+
+
+def _routing(outputs: Mapping[int, int]) -> ProphecyRouting:
+    """Return `outputs` as a hashable routing."""
+    if isinstance(outputs, ProphecyRouting):
+        return outputs
+    return ProphecyRouting(bytes(outputs[output] for output in sorted(outputs)))
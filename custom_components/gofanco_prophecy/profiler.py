@@ -0,0 +1,179 @@
+"""Bounded, on-demand profiling of the integration on a live instance.
+
+The ``profile`` service runs cProfile on the event-loop thread for a fixed
+window, forcing one coordinator refresh per targeted matrix at the start so
+the report always covers a full update cycle: the client I/O path,
+`_async_update_data`, and the entity state-write fan-out that follows it.
+Optionally it diffs two `tracemalloc` snapshots taken around the window.
+
+The report is a plain-text summary written to the config directory, with
+the integration's own frames listed first so "is this integration the
+reason HA feels slow?" can be answered without reading the whole profile.
+A raw ``.cprof`` dump is written alongside for tools like snakeviz.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import io
+import logging
+from pathlib import Path
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    import cProfile
+    import tracemalloc
+
+    from .coordinator import ProphecyDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+_PROFILE_LOCK: HassKey[asyncio.Lock] = HassKey(f"{DOMAIN}_profile_lock")
+_PACKAGE_DIR = str(Path(__file__).parent)
+_TOP_OVERALL = 40
+_TOP_ALLOCATIONS = 25
+
+
+@dataclass(slots=True)
+class _Session:
+    """Everything collected during one profiling window."""
+
+    started: float
+    duration: float
+    titles: list[str]
+    refreshes: dict[str, float] = field(default_factory=dict)
+    profile: cProfile.Profile | None = None
+    snapshots: tuple[tracemalloc.Snapshot, tracemalloc.Snapshot] | None = None
+
+
+async def async_run_profile(
+    hass: HomeAssistant,
+    coordinators: list[ProphecyDataUpdateCoordinator],
+    duration: float,
+    trace_memory: bool,
+) -> str:
+    """Profile the integration for `duration` seconds and return the report path."""
+    # Deferred so the profiling machinery is only imported when used.
+    import tracemalloc
+
+    lock = hass.data.setdefault(_PROFILE_LOCK, asyncio.Lock())
+    if lock.locked():
+        raise HomeAssistantError("A profiling session is already running")
+
+    async with lock:
+        session = _Session(
+            started=time.time(),
+            duration=duration,
+            titles=[c.config_entry.title for c in coordinators],
+        )
+        started_tracemalloc = trace_memory and not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        try:
+            before: tracemalloc.Snapshot | None = None
+            if trace_memory:
+                before = await hass.async_add_executor_job(tracemalloc.take_snapshot)
+            session.profile = await _async_profile_window(coordinators, session)
+            if before is not None:
+                after = await hass.async_add_executor_job(tracemalloc.take_snapshot)
+                session.snapshots = (before, after)
+        finally:
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+    stamp = dt_util.utc_from_timestamp(session.started).strftime("%Y%m%dT%H%M%S")
+    report_path = hass.config.path(f"{DOMAIN}_profile_{stamp}.txt")
+    await hass.async_add_executor_job(_write_report, session, report_path)
+    _LOGGER.info("Wrote profiling report to %s", report_path)
+    return report_path
+
+
+async def _async_profile_window(
+    coordinators: list[ProphecyDataUpdateCoordinator], session: _Session
+) -> cProfile.Profile:
+    """Run cProfile for the session window, refreshing each matrix once."""
+    import cProfile
+
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as err:
+        # Another profiler (e.g. HA's own profiler integration) is active.
+        raise HomeAssistantError(f"Cannot start profiler: {err}") from err
+
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + session.duration
+        for coordinator in coordinators:
+            refresh_start = time.perf_counter()
+            await coordinator.async_refresh()
+            session.refreshes[coordinator.config_entry.title] = (
+                time.perf_counter() - refresh_start
+            )
+        await asyncio.sleep(max(0.0, deadline - loop.time()))
+    finally:
+        profile.disable()
+    return profile
+
+
+def _write_report(session: _Session, report_path: str) -> None:
+    """Render the collected data and write the report (runs in the executor)."""
+    import pstats
+
+    if session.profile is None:
+        return
+    session.profile.dump_stats(str(Path(report_path).with_suffix(".cprof")))
+
+    out = io.StringIO()
+    out.write(
+        f"Gofanco Prophecy profile — "
+        f"{dt_util.utc_from_timestamp(session.started).isoformat()}\n"
+        f"Window: {session.duration:.1f} s; matrices: {', '.join(session.titles)}\n"
+    )
+
+    out.write("\n== Forced refreshes (device I/O + parse + entity fan-out) ==\n")
+    for title, elapsed in session.refreshes.items():
+        out.write(f"  {title}: {elapsed * 1000:.1f} ms\n")
+
+    stats = pstats.Stats(session.profile, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    out.write("\n== Integration frames (cumulative) ==\n")
+    stats.print_stats(DOMAIN)
+    out.write(f"\n== Top {_TOP_OVERALL} frames overall (cumulative) ==\n")
+    stats.print_stats(_TOP_OVERALL)
+
+    if session.snapshots is not None:
+        _write_allocations(out, *session.snapshots)
+
+    Path(report_path).write_text(out.getvalue(), encoding="utf-8")
+
+
+def _write_allocations(
+    out: io.StringIO, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+) -> None:
+    """Append the tracemalloc diff, integration allocations first."""
+    import tracemalloc
+
+    diff = after.compare_to(before, "lineno")
+    ours = after.filter_traces(
+        [tracemalloc.Filter(inclusive=True, filename_pattern=f"{_PACKAGE_DIR}/*")]
+    )
+    total = sum(stat.size for stat in ours.statistics("filename"))
+    out.write(
+        f"\n== tracemalloc: integration holds {total / 1024:.1f} KiB "
+        f"at end of window ==\n"
+    )
+    for stat in ours.statistics("lineno")[:_TOP_ALLOCATIONS]:
+        out.write(f"  {stat}\n")
+    out.write(f"\n== tracemalloc: top {_TOP_ALLOCATIONS} growth during window ==\n")
+    for change in diff[:_TOP_ALLOCATIONS]:
+        out.write(f"  {change}\n")
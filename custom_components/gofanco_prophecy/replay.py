@@ -0,0 +1,247 @@
+"""Record and replay raw wire sessions with the HDMI matrix.
+
+Firmware revisions differ in how they frame replies (see
+`strip_http_preamble`), and the only reliable way to regression-test the
+parser and the polling logic against that variety is real traffic. A
+`WireRecorder` wraps a client's raw exchange and captures every request,
+reply and timing; the session is saved as JSON Lines. A `ReplayExchange`
+then stands in for the device: plug it into `GofancoProphecyClient` (and so
+into a coordinator) and it answers each command with the recorded reply,
+at the original pace, accelerated, or instantly.
+
+Nothing here depends on Home Assistant, so sessions can be replayed from a
+plain test or benchmark script.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+import json
+from pathlib import Path
+import time
+from typing import Any
+
+from .device import (
+    LOAD_PRESETS_CMD,
+    STATE_CMD,
+    Exchange,
+    GofancoProphecyClient,
+    ProphecyError,
+)
+
+SESSION_FORMAT = "gofanco_prophecy.wire"
+SESSION_VERSION = 1
+
+_HOST_PLACEHOLDER = "{host}"
+
+
+class ReplayMismatchError(ProphecyError):
+    """Raised when a replayed client sends a command the session never saw."""
+
+
+@dataclass(slots=True, frozen=True)
+class RecordedExchange:
+    """One request/response pair captured from a live device."""
+
+    offset: float
+    elapsed: float
+    request: str
+    response: str | None
+    error: str | None = None
+
+    @property
+    def command(self) -> str:
+        """Return the command body of the request."""
+        return command_of(self.request)
+
+
+def command_of(request: str) -> str:
+    """Extract the POST body (the command) from a raw request."""
+    return request.partition("\r\n\r\n")[2]
+
+
+class WireRecorder:
+    """Wrap a raw exchange and capture everything that passes through it."""
+
+    def __init__(self, inner: Exchange, host: str) -> None:
+        """Initialize the recorder around `inner`."""
+        self._inner = inner
+        self._host = host
+        self._started = time.monotonic()
+        self._recorded_at = datetime.now(UTC)
+        self.exchanges: list[RecordedExchange] = []
+
+    @property
+    def inner(self) -> Exchange:
+        """Return the wrapped exchange."""
+        return self._inner
+
+    async def __call__(self, request: bytes) -> str:
+        """Delegate to the wrapped exchange, recording the outcome."""
+        offset = time.monotonic() - self._started
+        text = request.decode("utf-8", errors="replace").replace(
+            self._host, _HOST_PLACEHOLDER
+        )
+        try:
+            response = await self._inner(request)
+        except (OSError, TimeoutError, asyncio.CancelledError) as err:
+            # A client-side timeout reaches us as a cancellation.
+            self.exchanges.append(
+                RecordedExchange(
+                    offset=offset,
+                    elapsed=time.monotonic() - self._started - offset,
+                    request=text,
+                    response=None,
+                    error=type(err).__name__,
+                )
+            )
+            raise
+        self.exchanges.append(
+            RecordedExchange(
+                offset=offset,
+                elapsed=time.monotonic() - self._started - offset,
+                request=text,
+                response=response,
+            )
+        )
+        return response
+
+    def save(self, path: str | Path) -> None:
+        """Write the session to `path` as JSON Lines (blocking I/O)."""
+        header = {
+            "format": SESSION_FORMAT,
+            "version": SESSION_VERSION,
+            "recorded_at": self._recorded_at.isoformat(),
+        }
+        with Path(path).open("w", encoding="utf-8") as fp:
+            fp.write(json.dumps(header) + "\n")
+            for exchange in self.exchanges:
+                record: dict[str, Any] = {
+                    "offset": round(exchange.offset, 6),
+                    "elapsed": round(exchange.elapsed, 6),
+                    "request": exchange.request,
+                    "response": exchange.response,
+                }
+                if exchange.error is not None:
+                    record["error"] = exchange.error
+                fp.write(json.dumps(record) + "\n")
+
+
+def load_session(path: str | Path) -> list[RecordedExchange]:
+    """Read a session written by `WireRecorder.save` (blocking I/O)."""
+    with Path(path).open(encoding="utf-8") as fp:
+        lines = [line for line in fp if line.strip()]
+    if not lines:
+        raise ValueError(f"{path} is empty")
+    header = json.loads(lines[0])
+    if header.get("format") != SESSION_FORMAT:
+        raise ValueError(f"{path} is not a recorded wire session")
+    if header.get("version") != SESSION_VERSION:
+        raise ValueError(f"Unsupported wire session version {header.get('version')}")
+    return [
+        RecordedExchange(
+            offset=float(record["offset"]),
+            elapsed=float(record["elapsed"]),
+            request=record["request"],
+            response=record.get("response"),
+            error=record.get("error"),
+        )
+        for record in map(json.loads, lines[1:])
+    ]
+
+
+class ReplayExchange:
+    """Answer requests from a recorded session instead of a real device.
+
+    Replies are matched per command in recorded order, so a session that
+    polled state ten times answers the next ten state polls with those ten
+    replies. With ``loop`` the replies for a command cycle once exhausted;
+    otherwise an unseen or exhausted command raises `ReplayMismatchError`.
+    ``speed`` scales the recorded device latency (2.0 = twice as fast);
+    ``None`` answers instantly.
+    """
+
+    def __init__(
+        self,
+        exchanges: Iterable[RecordedExchange],
+        *,
+        speed: float | None = 1.0,
+        loop: bool = False,
+    ) -> None:
+        """Index the recorded exchanges by command."""
+        self._speed = speed
+        self._loop = loop
+        self._replies: defaultdict[str, deque[RecordedExchange]] = defaultdict(deque)
+        for exchange in exchanges:
+            self._replies[exchange.command].append(exchange)
+        self.served = 0
+
+    async def __call__(self, request: bytes) -> str:
+        """Return the recorded reply for the request's command."""
+        command = command_of(request.decode("utf-8", errors="replace"))
+        replies = self._replies.get(command)
+        if not replies:
+            raise ReplayMismatchError(f"No recorded reply for command {command!r}")
+        exchange = replies.popleft()
+        if self._loop:
+            replies.append(exchange)
+        if self._speed:
+            await asyncio.sleep(exchange.elapsed / self._speed)
+        self.served += 1
+        if exchange.error in ("TimeoutError", "CancelledError"):
+            raise TimeoutError
+        if exchange.error is not None or exchange.response is None:
+            raise OSError(f"Recorded {exchange.error or 'failure'}")
+        return exchange.response
+
+
+@dataclass(slots=True)
+class ReplayReport:
+    """Outcome of driving a client through a recorded session."""
+
+    commands: int = 0
+    wall_time: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    errors: dict[str, int] = field(default_factory=dict)
+
+
+async def async_replay_session(
+    exchanges: list[RecordedExchange],
+    *,
+    speed: float | None = 1.0,
+) -> ReplayReport:
+    """Re-issue a recorded session through a fresh client and parser.
+
+    Commands are sent at their recorded offsets (scaled by ``speed``, or
+    back-to-back when ``None``) so polling and burst patterns are
+    reproduced. State and preset replies go through the same parsing as
+    live traffic; parse failures are counted per exception type.
+    """
+    replay = ReplayExchange(exchanges, speed=speed)
+    client = GofancoProphecyClient("replay.invalid", 80, exchange=replay)
+    report = ReplayReport()
+    start = time.monotonic()
+    for exchange in sorted(exchanges, key=lambda e: e.offset):
+        if speed:
+            delay = exchange.offset / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        sent = time.monotonic()
+        try:
+            if exchange.command == STATE_CMD:
+                await client.async_get_state()
+            elif exchange.command == LOAD_PRESETS_CMD:
+                await client.async_load_presets()
+            else:
+                await client._post(exchange.command)
+        except ProphecyError as err:
+            name = type(err).__name__
+            report.errors[name] = report.errors.get(name, 0) + 1
+        report.latencies.append(time.monotonic() - sent)
+        report.commands += 1
+    report.wall_time = time.monotonic() - start
+    return report
@@ -7,7 +7,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import MUTE_INPUT, NUM_OUTPUTS, NUM_PRESETS
+from .const import CONF_COMPACT, MUTE_INPUT, NUM_OUTPUTS, NUM_PRESETS
 from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
 from .device import ProphecyError
 from .entity import ProphecyEntity
@@ -21,6 +21,8 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up select entities."""
+    if entry.options.get(CONF_COMPACT):
+        return
     coordinator = entry.runtime_data
     entities: list[SelectEntity] = [
         ProphecyOutputSelect(coordinator, output)
@@ -34,6 +36,10 @@ async def async_setup_entry(
 class _OutputBase(ProphecyEntity, SelectEntity):
     """Shared behaviour for output-routing selects."""
 
+    def _visible_state(self) -> object:
+        """Return the routing and the input names."""
+        return (self.coordinator.data.outputs, self.coordinator.data.input_names)
+
     @property
     def options(self) -> list[str]:
         """Return the input names, including the mute option."""
@@ -63,6 +69,11 @@ class ProphecyOutputSelect(_OutputBase):
         self._attr_translation_placeholders = {"number": str(output)}
         self._attr_suggested_object_id = f"output_{output}"
 
+    def _visible_state(self) -> object:
+        """Return this output's route and the input names."""
+        data = self.coordinator.data
+        return (data.outputs.get(self._output), data.input_names)
+
     @property
     def current_option(self) -> str | None:
         """Return the currently routed input name."""
@@ -123,12 +134,17 @@ class ProphecyPresetRecallSelect(ProphecyEntity, SelectEntity):
     """A dropdown that recalls one of the 8 stored presets when selected."""
 
     _attr_translation_key = "preset_recall"
+    _shows_preset_names = True
 
     def __init__(self, coordinator: ProphecyDataUpdateCoordinator) -> None:
         """Initialize the preset-recall select."""
         super().__init__(coordinator, "preset_recall")
         self._attr_suggested_object_id = "recall_preset"
 
+    def _visible_state(self) -> object:
+        """Return the preset names and the active preset."""
+        return (self.coordinator.data.preset_names, self.coordinator.active_preset)
+
     @property
     def options(self) -> list[str]:
         """Return the list of preset names."""
@@ -136,8 +152,10 @@ class ProphecyPresetRecallSelect(ProphecyEntity, SelectEntity):
 
     @property
     def current_option(self) -> str | None:
-        """There's no "current preset" reported — always None."""
-        return None
+        """Return the preset whose saved routing is on the matrix, if known."""
+        if (index := self.coordinator.active_preset) is None:
+            return None
+        return self._preset_label(index)
 
     def _preset_label(self, index: int) -> str:
         """Format a user-facing preset label."""
@@ -154,7 +172,8 @@ class ProphecyPresetRecallSelect(ProphecyEntity, SelectEntity):
         if index is None:
             raise HomeAssistantError(f"Unknown preset: {option}")
         try:
-            await self.coordinator.client.async_recall_preset(index)
+            recalled = await self.coordinator.async_recall_preset(index)
         except ProphecyError as err:
             raise HomeAssistantError(f"Failed to recall preset {index}: {err}") from err
-        await self.coordinator.async_request_refresh()
+        if recalled:
+            await self.coordinator.async_request_refresh()
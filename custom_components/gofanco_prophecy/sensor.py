@@ -0,0 +1,163 @@
+"""Sensor platform for the Gofanco Prophecy HDMI Matrix.
+
+Usage statistics derived from the routing history: how long each input has
+been live on any output, and how often each output has been switched.
+
+In compact mode this platform instead creates the matrix's only entity:
+one sensor whose state is the power and whose attributes carry the whole
+routing, every label and the preset names. Installs with many matrices
+then cost one state object per matrix rather than thirty-odd.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import CONF_COMPACT, HISTORY_SENSOR_INTERVAL, NUM_INPUTS, NUM_OUTPUTS
+from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
+from .entity import ProphecyEntity
+
+PARALLEL_UPDATES = 0
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ProphecyConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the usage-statistics sensors, or the compact matrix sensor."""
+    coordinator = entry.runtime_data
+    if entry.options.get(CONF_COMPACT):
+        async_add_entities([ProphecyMatrixSensor(coordinator)])
+        return
+    entities: list[SensorEntity] = [
+        ProphecyInputOnAirSensor(coordinator, source)
+        for source in range(1, NUM_INPUTS + 1)
+    ]
+    entities.extend(
+        ProphecyOutputSwitchesSensor(coordinator, output)
+        for output in range(1, NUM_OUTPUTS + 1)
+    )
+    async_add_entities(entities)
+
+
+class ProphecyMatrixSensor(ProphecyEntity, SensorEntity):
+    """The whole matrix as one entity: power as state, the rest as attributes."""
+
+    _attr_name = None
+    _attr_translation_key = "matrix"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _shows_preset_names = True
+    # Routing has its own history log and the rest is static or bulky; keep
+    # all of it out of the recorder.
+    _unrecorded_attributes = frozenset(
+        {"entry_id", "routing", "input_names", "output_names", "preset_names"}
+    )
+
+    def __init__(self, coordinator: ProphecyDataUpdateCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "matrix")
+        self._attr_options = ["on", "off"]
+
+    def _visible_state(self) -> object:
+        """Return the state, and the preset names merged into it in place."""
+        return (self.coordinator.data, self.coordinator.data.preset_names)
+
+    @property
+    def native_value(self) -> str:
+        """Return the matrix power state."""
+        return "on" if self.coordinator.data.power else "off"
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the routing, labels and presets, plus the entry to target."""
+        state = self.coordinator.data
+        return {
+            "entry_id": self.coordinator.config_entry.entry_id,
+            "routing": dict(state.outputs),
+            "input_names": dict(state.input_names),
+            "output_names": dict(state.output_names),
+            "preset_names": dict(state.preset_names),
+        }
+
+
+class ProphecyInputOnAirSensor(ProphecyEntity, SensorEntity):
+    """Total time an input has been routed to a powered output."""
+
+    _attr_translation_key = "input_on_air"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_suggested_unit_of_measurement = UnitOfTime.HOURS
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: ProphecyDataUpdateCoordinator,
+        source: int,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, f"input_{source}_on_air")
+        self._source = source
+        self._attr_translation_placeholders = {"number": str(source)}
+
+    async def async_added_to_hass(self) -> None:
+        """Keep ticking between routing changes, which are all we are told of."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, self._async_tick, HISTORY_SENSOR_INTERVAL
+            )
+        )
+
+    @callback
+    def _async_tick(self, now: datetime) -> None:
+        """Publish the growing on-air time, unless the event loop is lagging."""
+        if not self.coordinator.loop_lag.stressed:
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> int:
+        """Return the whole seconds this input has been on air."""
+        stats = self.coordinator.history.current_stats()
+        return int(stats.input_on_air(self._source))
+
+
+class ProphecyOutputSwitchesSensor(ProphecyEntity, SensorEntity):
+    """Number of times an output has been switched to another input."""
+
+    _attr_translation_key = "output_switches"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: ProphecyDataUpdateCoordinator,
+        output: int,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, f"output_{output}_switches")
+        self._output = output
+        self._attr_translation_placeholders = {"number": str(output)}
+
+    def _visible_state(self) -> object:
+        """Return the switch count."""
+        return self.native_value
+
+    @property
+    def native_value(self) -> int:
+        """Return the switch count for this output."""
+        stats = self.coordinator.history.current_stats()
+        return stats.switches.get(self._output, 0)
@@ -0,0 +1,500 @@
+"""Integration-wide services for the Gofanco Prophecy HDMI Matrix.
+
+Every service can target one matrix (``entry_id``), several (a list of
+``entry_id``s), or every loaded matrix (``all_entries: true``). Multi-target
+calls fan out concurrently — bounded by ``FANOUT_MAX_PARALLEL`` and with a
+per-device timeout — so acting on the whole fleet costs roughly one device
+round trip rather than one per matrix. Callers that ask for a response get
+a per-entry result map instead of an exception on partial failure.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Coroutine
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
+
+from .const import (
+    BOOT_MAX_WAIT,
+    BOOT_PROBE_TIMEOUT,
+    DOMAIN,
+    FANOUT_MAX_PARALLEL,
+    FANOUT_TIMEOUT_MARGIN,
+    FRESH_STATE_MAX_AGE,
+    MUTE_INPUT,
+    NUM_INPUTS,
+    NUM_OUTPUTS,
+    NUM_PRESETS,
+    PROFILE_DEFAULT_DURATION,
+    PROFILE_MAX_DURATION,
+    RECORD_DEFAULT_DURATION,
+    RECORD_MAX_DURATION,
+)
+from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
+from .device import ProphecyError
+from .profiler import async_run_profile
+from .replay import WireRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SAVE_PRESET = "save_preset"
+SERVICE_RECALL_PRESET = "recall_preset"
+SERVICE_MUTE_ALL = "mute_all"
+SERVICE_ROUTE = "route"
+SERVICE_SET_POWER = "set_power"
+SERVICE_SET_NAMES = "set_names"
+SERVICE_PROFILE = "profile"
+SERVICE_RECORD_SESSION = "record_session"
+SERVICE_GET_HISTORY_STATS = "get_history_stats"
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_ALL_ENTRIES = "all_entries"
+ATTR_INDEX = "index"
+ATTR_OUTPUT = "output"
+ATTR_INPUT = "input"
+ATTR_POWER = "power"
+ATTR_DURATION = "duration"
+ATTR_TRACE_MEMORY = "trace_memory"
+ATTR_SINCE = "since"
+ATTR_UNTIL = "until"
+ATTR_INPUTS = "inputs"
+ATTR_OUTPUTS = "outputs"
+ATTR_PRESETS = "presets"
+
+type _Action = Callable[[ProphecyDataUpdateCoordinator, ServiceCall], Awaitable[None]]
+
+_TARGET_FIELDS: dict[vol.Marker, Any] = {
+    vol.Exclusive(ATTR_ENTRY_ID, "target"): vol.All(cv.ensure_list, [cv.string]),
+    vol.Exclusive(ATTR_ALL_ENTRIES, "target"): cv.boolean,
+}
+
+_PRESET_INDEX = vol.All(vol.Coerce(int), vol.Range(min=1, max=NUM_PRESETS))
+
+_SAVE_PRESET_SCHEMA = vol.Schema(
+    {**_TARGET_FIELDS, vol.Required(ATTR_INDEX): _PRESET_INDEX}
+)
+_RECALL_PRESET_SCHEMA = vol.Schema(
+    {**_TARGET_FIELDS, vol.Required(ATTR_INDEX): _PRESET_INDEX}
+)
+_MUTE_ALL_SCHEMA = vol.Schema(_TARGET_FIELDS)
+_ROUTE_SCHEMA = vol.Schema(
+    {
+        **_TARGET_FIELDS,
+        vol.Optional(ATTR_OUTPUT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=NUM_OUTPUTS)
+        ),
+        vol.Required(ATTR_INPUT): vol.All(
+            vol.Coerce(int), vol.Range(min=MUTE_INPUT, max=NUM_INPUTS)
+        ),
+    }
+)
+_SET_POWER_SCHEMA = vol.Schema({**_TARGET_FIELDS, vol.Required(ATTR_POWER): cv.boolean})
+
+
+def _names(count: int) -> vol.Schema:
+    """Validate a ``{number: label}`` mapping for numbers 1..`count`."""
+    return vol.Schema(
+        {vol.All(vol.Coerce(int), vol.Range(min=1, max=count)): cv.string}
+    )
+
+
+_SET_NAMES_SCHEMA = vol.Schema(
+    vol.All(
+        {
+            **_TARGET_FIELDS,
+            vol.Optional(ATTR_INPUTS): _names(NUM_INPUTS),
+            vol.Optional(ATTR_OUTPUTS): _names(NUM_OUTPUTS),
+            vol.Optional(ATTR_PRESETS): _names(NUM_PRESETS),
+        },
+        cv.has_at_least_one_key(ATTR_INPUTS, ATTR_OUTPUTS, ATTR_PRESETS),
+    )
+)
+
+_PROFILE_SCHEMA = vol.Schema(
+    {
+        **_TARGET_FIELDS,
+        vol.Optional(ATTR_DURATION, default=PROFILE_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+        ),
+        vol.Optional(ATTR_TRACE_MEMORY, default=False): cv.boolean,
+    }
+)
+
+_RECORD_SESSION_SCHEMA = vol.Schema(
+    {
+        **_TARGET_FIELDS,
+        vol.Optional(ATTR_DURATION, default=RECORD_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=RECORD_MAX_DURATION)
+        ),
+    }
+)
+
+_GET_HISTORY_STATS_SCHEMA = vol.Schema(
+    {
+        **_TARGET_FIELDS,
+        vol.Optional(ATTR_SINCE): cv.datetime,
+        vol.Optional(ATTR_UNTIL): cv.datetime,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration-wide services once per HA startup."""
+    if hass.services.has_service(DOMAIN, SERVICE_SAVE_PRESET):
+        return
+
+    services: tuple[tuple[str, vol.Schema, Callable[[ServiceCall], str], _Action], ...]
+    services = (
+        (
+            SERVICE_SAVE_PRESET,
+            _SAVE_PRESET_SCHEMA,
+            lambda call: f"save preset {call.data[ATTR_INDEX]}",
+            _async_save_preset,
+        ),
+        (
+            SERVICE_RECALL_PRESET,
+            _RECALL_PRESET_SCHEMA,
+            lambda call: f"recall preset {call.data[ATTR_INDEX]}",
+            _async_recall_preset,
+        ),
+        (
+            SERVICE_MUTE_ALL,
+            _MUTE_ALL_SCHEMA,
+            lambda call: "mute all outputs",
+            _async_mute_all,
+        ),
+        (
+            SERVICE_ROUTE,
+            _ROUTE_SCHEMA,
+            _route_label,
+            _async_route,
+        ),
+        (
+            SERVICE_SET_POWER,
+            _SET_POWER_SCHEMA,
+            lambda call: "power on" if call.data[ATTR_POWER] else "power off",
+            _async_set_power,
+        ),
+        (
+            SERVICE_SET_NAMES,
+            _SET_NAMES_SCHEMA,
+            lambda call: "rename",
+            _async_set_names,
+        ),
+    )
+    for name, schema, label, action in services:
+        hass.services.async_register(
+            DOMAIN,
+            name,
+            _make_handler(hass, label, action),
+            schema=schema,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    async def _handle_profile(call: ServiceCall) -> ServiceResponse:
+        # Profiling answers "is this integration the slow part?", so without
+        # any target it covers every loaded matrix; all_entries: false and
+        # an explicit entry_id are honoured like everywhere else.
+        entry_ids = call.data.get(ATTR_ENTRY_ID)
+        coordinators = _pick_coordinators(
+            hass,
+            entry_ids,
+            call.data.get(ATTR_ALL_ENTRIES, entry_ids is None),
+        )
+        report = await async_run_profile(
+            hass,
+            coordinators,
+            call.data[ATTR_DURATION],
+            call.data[ATTR_TRACE_MEMORY],
+        )
+        return {"report": report} if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _handle_profile,
+        schema=_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _handle_record_session(call: ServiceCall) -> ServiceResponse:
+        coordinators = _pick_coordinators(
+            hass,
+            call.data.get(ATTR_ENTRY_ID),
+            call.data.get(ATTR_ALL_ENTRIES, False),
+        )
+        files = await _async_record_session(
+            hass, coordinators, call.data[ATTR_DURATION]
+        )
+        return {"files": files} if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECORD_SESSION,
+        _handle_record_session,
+        schema=_RECORD_SESSION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _handle_get_history_stats(call: ServiceCall) -> ServiceResponse:
+        coordinators = _pick_coordinators(
+            hass,
+            call.data.get(ATTR_ENTRY_ID),
+            call.data.get(ATTR_ALL_ENTRIES, False),
+        )
+        since = call.data.get(ATTR_SINCE)
+        until = call.data.get(ATTR_UNTIL)
+        matrices: dict[str, Any] = {}
+        for coordinator in coordinators:
+            stats = await coordinator.history.async_query(
+                None if since is None else dt_util.as_timestamp(since),
+                None if until is None else dt_util.as_timestamp(until),
+            )
+            matrices[coordinator.config_entry.entry_id] = {
+                "title": coordinator.config_entry.title,
+                **stats.as_dict(),
+            }
+        return {"matrices": matrices}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY_STATS,
+        _handle_get_history_stats,
+        schema=_GET_HISTORY_STATS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def _make_handler(
+    hass: HomeAssistant,
+    label: Callable[[ServiceCall], str],
+    action: _Action,
+) -> Callable[[ServiceCall], Coroutine[Any, Any, ServiceResponse]]:
+    """Build a service handler that fans `action` out to the targeted matrices."""
+
+    async def _handle(call: ServiceCall) -> ServiceResponse:
+        coordinators = _pick_coordinators(
+            hass,
+            call.data.get(ATTR_ENTRY_ID),
+            call.data.get(ATTR_ALL_ENTRIES, False),
+        )
+        results = await _async_fan_out(coordinators, action, call)
+        if call.return_response:
+            return {"results": results}
+
+        failed = {
+            entry_id: result
+            for entry_id, result in results.items()
+            if not result["success"]
+        }
+        if not failed:
+            return None
+        if len(coordinators) == 1:
+            (result,) = failed.values()
+            raise HomeAssistantError(f"Failed to {label(call)}: {result['error']}")
+        details = "; ".join(
+            f"{result['title']}: {result['error']}" for result in failed.values()
+        )
+        raise HomeAssistantError(
+            f"Failed to {label(call)} on {len(failed)} of {len(coordinators)} "
+            f"HDMI matrices: {details}"
+        )
+
+    return _handle
+
+
+async def _async_fan_out(
+    coordinators: list[ProphecyDataUpdateCoordinator],
+    action: _Action,
+    call: ServiceCall,
+) -> dict[str, Any]:
+    """Run `action` against every coordinator concurrently.
+
+    Parallelism is capped at ``FANOUT_MAX_PARALLEL`` and each device gets
+    its configured request timeout plus ``FANOUT_TIMEOUT_MARGIN`` seconds,
+    extended by the boot hold while the matrix is still booting;
+    a slow or dead matrix only fails its own result and never delays the
+    others beyond that bound.
+    """
+    semaphore = asyncio.Semaphore(FANOUT_MAX_PARALLEL)
+
+    async def _run_one(
+        coordinator: ProphecyDataUpdateCoordinator,
+    ) -> tuple[str, dict[str, Any]]:
+        entry = coordinator.config_entry
+        result: dict[str, Any] = {"title": entry.title, "success": True}
+        timeout = coordinator.client.timeout + FANOUT_TIMEOUT_MARGIN
+        if coordinator.client.booting:
+            # Held routing is still sent once the matrix is up; reporting
+            # it as failed before then would be wrong.
+            timeout += BOOT_MAX_WAIT + BOOT_PROBE_TIMEOUT
+        async with semaphore:
+            try:
+                async with asyncio.timeout(timeout):
+                    await action(coordinator, call)
+            except TimeoutError:
+                result["success"] = False
+                result["error"] = f"Timed out after {timeout}s"
+            except ProphecyError as err:
+                result["success"] = False
+                result["error"] = str(err)
+        if not result["success"]:
+            _LOGGER.debug(
+                "Service %s failed for %s: %s",
+                call.service,
+                entry.entry_id,
+                result["error"],
+            )
+        return entry.entry_id, result
+
+    return dict(await asyncio.gather(*(_run_one(c) for c in coordinators)))
+
+
+async def _async_record_session(
+    hass: HomeAssistant,
+    coordinators: list[ProphecyDataUpdateCoordinator],
+    duration: float,
+) -> dict[str, Any]:
+    """Capture every matrix's wire traffic for `duration` seconds to files."""
+    if any(isinstance(c.client.exchange, WireRecorder) for c in coordinators):
+        raise HomeAssistantError("A wire session is already being recorded")
+
+    recorders: dict[str, WireRecorder] = {}
+    for coordinator in coordinators:
+        client = coordinator.client
+        recorder = WireRecorder(client.exchange, client.host)
+        client.exchange = recorder
+        recorders[coordinator.config_entry.entry_id] = recorder
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        for coordinator in coordinators:
+            recorder = recorders[coordinator.config_entry.entry_id]
+            coordinator.client.exchange = recorder.inner
+
+    stamp = dt_util.utcnow().strftime("%Y%m%dT%H%M%S")
+    files: dict[str, Any] = {}
+    for entry_id, recorder in recorders.items():
+        path = hass.config.path(f"{DOMAIN}_wire_{entry_id}_{stamp}.jsonl")
+        await hass.async_add_executor_job(recorder.save, path)
+        files[entry_id] = path
+    return files
+
+
+def _route_label(call: ServiceCall) -> str:
+    """Describe a route call for error messages."""
+    if (output := call.data.get(ATTR_OUTPUT)) is None:
+        return f"route all outputs to input {call.data[ATTR_INPUT]}"
+    return f"route output {output} to input {call.data[ATTR_INPUT]}"
+
+
+async def _async_save_preset(
+    coordinator: ProphecyDataUpdateCoordinator, call: ServiceCall
+) -> None:
+    """Save the current routing into a preset slot."""
+    await coordinator.async_save_preset(call.data[ATTR_INDEX])
+    await coordinator.async_reload_presets()
+
+
+async def _async_recall_preset(
+    coordinator: ProphecyDataUpdateCoordinator, call: ServiceCall
+) -> None:
+    """Recall a stored preset, unless it is already active."""
+    if await coordinator.async_recall_preset(call.data[ATTR_INDEX]):
+        await coordinator.async_request_refresh()
+
+
+async def _async_mute_all(
+    coordinator: ProphecyDataUpdateCoordinator, call: ServiceCall
+) -> None:
+    """Mute every output."""
+    await coordinator.client.async_mute_all()
+    await coordinator.async_request_refresh()
+
+
+async def _async_route(
+    coordinator: ProphecyDataUpdateCoordinator, call: ServiceCall
+) -> None:
+    """Route one output, or all outputs, to an input."""
+    source: int = call.data[ATTR_INPUT]
+    if (output := call.data.get(ATTR_OUTPUT)) is None:
+        await coordinator.client.async_set_all_outputs(source)
+    else:
+        await coordinator.client.async_set_output(output, source)
+    await coordinator.async_request_refresh()
+
+
+async def _async_set_power(
+    coordinator: ProphecyDataUpdateCoordinator, call: ServiceCall
+) -> None:
+    """Turn the matrix on or off, unless it already is."""
+    if await coordinator.async_set_power(call.data[ATTR_POWER]):
+        await coordinator.async_request_refresh()
+
+
+async def _async_set_names(
+    coordinator: ProphecyDataUpdateCoordinator, call: ServiceCall
+) -> None:
+    """Relabel inputs, outputs and presets; unlisted labels are kept."""
+    inputs: dict[int, str] = call.data.get(ATTR_INPUTS, {})
+    outputs: dict[int, str] = call.data.get(ATTR_OUTPUTS, {})
+    presets: dict[int, str] = call.data.get(ATTR_PRESETS, {})
+    if inputs or outputs:
+        # The device takes every input and output label in one command, so
+        # the unlisted ones are carried over from a recent read.
+        state = await coordinator.async_get_state(FRESH_STATE_MAX_AGE)
+        await coordinator.client.async_set_names(
+            {**state.input_names, **inputs}, {**state.output_names, **outputs}
+        )
+    for index, name in sorted(presets.items()):
+        await coordinator.client.async_set_preset_name(index, name)
+    if presets:
+        await coordinator.async_reload_presets()
+    else:
+        await coordinator.async_request_refresh()
+
+
+def _pick_coordinators(
+    hass: HomeAssistant,
+    entry_ids: list[str] | None,
+    all_entries: bool,
+) -> list[ProphecyDataUpdateCoordinator]:
+    """Resolve which matrices' coordinators to act on."""
+    loaded: list[ProphecyConfigEntry] = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    ]
+    if entry_ids:
+        by_id = {entry.entry_id: entry for entry in loaded}
+        coordinators: list[ProphecyDataUpdateCoordinator] = []
+        for entry_id in dict.fromkeys(entry_ids):
+            if entry_id not in by_id:
+                raise HomeAssistantError(
+                    f"No loaded HDMI Matrix entry with id {entry_id}"
+                )
+            coordinators.append(by_id[entry_id].runtime_data)
+        return coordinators
+    if not loaded:
+        raise HomeAssistantError("No HDMI Matrix entries are loaded")
+    if len(loaded) > 1 and not all_entries:
+        raise HomeAssistantError(
+            "Multiple HDMI Matrix entries are loaded; pass entry_id or "
+            "all_entries to choose"
+        )
+    return [entry.runtime_data for entry in loaded]
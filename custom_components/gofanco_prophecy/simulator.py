@@ -0,0 +1,110 @@
+"""In-process stand-in for a Prophecy matrix.
+
+`SimulatedMatrix` is an `Exchange`: plug it into `GofancoProphecyClient`
+and it answers every command the client sends the way the firmware does —
+state dumps, ``LOADMAP``, routing, power and presets — with a configurable
+service time and failure rate. Unlike a replayed session it keeps state, so
+route storms and preset cycles behave like they would on real hardware.
+
+With ``boot_time`` set, ``poweron`` starts a boot like the hardware's: for
+that long the matrix still reports itself off and ignores routing.
+
+Like the device, it serves one connection at a time: concurrent requests
+queue behind each other, so throughput under load is bounded by
+``latency`` just as the real matrix is bounded by its own service time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+
+from .const import NUM_INPUTS, NUM_OUTPUTS, NUM_PRESETS
+from .device import LOAD_PRESETS_CMD, STATE_CMD
+from .replay import command_of
+
+_OK = "HTTP/1.0 200 OK\r\n\r\n"
+
+
+class SimulatedMatrix:
+    """Answer client requests from an in-memory matrix model."""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        boot_time: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize a powered-on matrix with input N routed to output N.
+
+        ``latency`` is the per-request service time in seconds;
+        ``failure_rate`` is the fraction of requests that fail with a socket
+        error, drawn from a generator seeded with ``seed``; ``boot_time``
+        is how long, in seconds, the matrix takes to come up after
+        ``poweron``.
+        """
+        self._latency = latency
+        self._failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._boot_time = boot_time
+        self._booted_at = 0.0
+        self._busy = asyncio.Lock()
+        self.power = True
+        self.outputs = {i: min(i, NUM_INPUTS) for i in range(1, NUM_OUTPUTS + 1)}
+        self.presets: dict[int, dict[int, int]] = {}
+        self.preset_names = {i: f"Preset {i}" for i in range(1, NUM_PRESETS + 1)}
+        self.requests = 0
+
+    async def __call__(self, request: bytes) -> str:
+        """Serve one request after the configured service time."""
+        async with self._busy:
+            if self._latency:
+                await asyncio.sleep(self._latency)
+            self.requests += 1
+            if self._failure_rate and self._random.random() < self._failure_rate:
+                raise ConnectionResetError("Simulated connection reset")
+            return _OK + self._handle(
+                command_of(request.decode("utf-8", errors="replace"))
+            )
+
+    def _handle(self, command: str) -> str:
+        """Apply `command` to the model and return the JSON reply body."""
+        if command == STATE_CMD:
+            return json.dumps(self._state())
+        if command == LOAD_PRESETS_CMD:
+            return json.dumps(
+                {f"namem{i}": name for i, name in self.preset_names.items()}
+            )
+        key, _, value = command.partition("=")
+        if command in ("poweron", "poweroff"):
+            if command == "poweron" and not self.power:
+                self._booted_at = time.monotonic() + self._boot_time
+            self.power = command == "poweron"
+        elif self.booting:
+            pass
+        elif key == "outa":
+            self.outputs = dict.fromkeys(self.outputs, int(value))
+        elif key.startswith("out") and key[3:].isdigit():
+            self.outputs[int(key[3:])] = int(value)
+        elif key == "call":
+            self.outputs.update(self.presets.get(int(value), {}))
+        elif key == "save":
+            self.presets[int(value)] = dict(self.outputs)
+        return json.dumps({"result": "ok"})
+
+    @property
+    def booting(self) -> bool:
+        """Return whether the matrix is still coming up after power-on."""
+        return time.monotonic() < self._booted_at
+
+    def _state(self) -> dict[str, str]:
+        """Return the 13-key state dump."""
+        state = {f"out{i}": str(source) for i, source in self.outputs.items()}
+        state.update({f"namein{i}": f"Input{i}" for i in range(1, NUM_INPUTS + 1)})
+        state.update({f"nameout{i}": f"Output{i}" for i in range(1, NUM_OUTPUTS + 1)})
+        state["powstatus"] = "1" if self.power and not self.booting else "0"
+        return state
@@ -9,6 +9,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .const import CONF_COMPACT
 from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
 from .device import ProphecyError
 from .entity import ProphecyEntity
@@ -22,6 +23,8 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the power switch entity."""
+    if entry.options.get(CONF_COMPACT):
+        return
     async_add_entities([ProphecyPowerSwitch(entry.runtime_data)])
 
 
@@ -34,6 +37,10 @@ class ProphecyPowerSwitch(ProphecyEntity, SwitchEntity):
         """Initialize the power switch."""
         super().__init__(coordinator, "power")
 
+    def _visible_state(self) -> object:
+        """Return the power state."""
+        return self.coordinator.data.power
+
     @property
     def is_on(self) -> bool:
         """Return whether the device is powered on."""
@@ -48,11 +55,12 @@ class ProphecyPowerSwitch(ProphecyEntity, SwitchEntity):
         await self._async_set_power(False)
 
     async def _async_set_power(self, on: bool) -> None:
-        """Send a power command and refresh."""
+        """Send a power command, unless redundant, and refresh."""
         try:
-            await self.coordinator.client.async_power(on)
+            sent = await self.coordinator.async_set_power(on)
         except ProphecyError as err:
             raise HomeAssistantError(
                 f"Failed to {'power on' if on else 'power off'} HDMI matrix: {err}"
             ) from err
-        await self.coordinator.async_request_refresh()
+        if sent:
+            await self.coordinator.async_request_refresh()
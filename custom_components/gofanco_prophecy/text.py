@@ -8,7 +8,7 @@ from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import NAME_MAX_LEN, NUM_INPUTS, NUM_OUTPUTS, NUM_PRESETS
+from .const import CONF_COMPACT, NAME_MAX_LEN, NUM_INPUTS, NUM_OUTPUTS, NUM_PRESETS
 from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
 from .device import ProphecyError
 from .entity import ProphecyEntity
@@ -22,6 +22,8 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up text entities for naming inputs and outputs."""
+    if entry.options.get(CONF_COMPACT):
+        return
     coordinator = entry.runtime_data
     entities: list[TextEntity] = [
         ProphecyInputNameText(coordinator, i) for i in range(1, NUM_INPUTS + 1)
@@ -57,6 +59,10 @@ class _ProphecyNameText(ProphecyEntity, TextEntity):
         self._attr_translation_placeholders = {"number": str(index)}
         self._attr_suggested_object_id = object_id
 
+    def _visible_state(self) -> object:
+        """Return the label itself."""
+        return self.native_value
+
 
 class ProphecyInputNameText(_ProphecyNameText):
     """Editable label for an input."""
@@ -127,6 +133,8 @@ class ProphecyOutputNameText(_ProphecyNameText):
 class ProphecyPresetNameText(_ProphecyNameText):
     """Editable label for a preset slot."""
 
+    _shows_preset_names = True
+
     def __init__(self, coordinator: ProphecyDataUpdateCoordinator, index: int) -> None:
         """Initialize the preset-name text entity."""
         super().__init__(
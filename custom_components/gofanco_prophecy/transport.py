@@ -0,0 +1,215 @@
+"""TCP transport for the HDMI matrix, with tunable socket options.
+
+The device is HTTP/1.0 and closes the connection at the end of every reply,
+so each command — including every poll — is a fresh TCP connection. With
+several matrices and bursts of commands, the sockets left in TIME_WAIT on
+the Home Assistant host add up. `TcpTransport` owns that connection
+lifecycle and lets it be tuned:
+
+- ``tcp_nodelay`` sends the request segment immediately (on by default).
+- ``abortive_close`` closes with ``SO_LINGER`` 0, i.e. a reset instead of a
+  FIN handshake, so no TIME_WAIT socket is left behind. Only safe because
+  the reply has been read to EOF before closing; off by default.
+- ``local_address`` binds the source address, for multi-homed hosts.
+
+Hostnames are resolved once and cached for ``RESOLVE_TTL``. A lookup older
+than ``RESOLVE_REFRESH_AFTER`` is still used while a background refresh
+runs, so polls never wait on the resolver (or a slow mDNS fallback) in the
+steady state; a connect failure or timeout on a cached address re-resolves
+at once and retries if the address changed. IP literals skip all of this.
+
+Connections opened and failed are counted in the client's `ClientStats`,
+so the effect of a setting shows up in diagnostics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Mapping
+import contextlib
+from dataclasses import dataclass
+from ipaddress import ip_address
+import logging
+import socket
+import struct
+import time
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    CONF_ABORTIVE_CLOSE,
+    CONF_LOCAL_ADDRESS,
+    CONF_TCP_NODELAY,
+    RESOLVE_REFRESH_AFTER,
+    RESOLVE_TTL,
+)
+
+if TYPE_CHECKING:
+    from .device import ClientStats
+
+_LOGGER = logging.getLogger(__name__)
+
+_LINGER_ABORT = struct.pack("ii", 1, 0)
+
+
+@dataclass(slots=True, frozen=True)
+class TransportOptions:
+    """Socket options applied to every connection to the device."""
+
+    tcp_nodelay: bool = True
+    abortive_close: bool = False
+    local_address: str | None = None
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> TransportOptions:
+        """Build from config entry options, defaulting unset keys."""
+        return cls(
+            tcp_nodelay=options.get(CONF_TCP_NODELAY, True),
+            abortive_close=options.get(CONF_ABORTIVE_CLOSE, False),
+            local_address=options.get(CONF_LOCAL_ADDRESS) or None,
+        )
+
+
+class TcpTransport:
+    """One TCP connection per request/response exchange."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        options: TransportOptions,
+        stats: ClientStats,
+        connect_timeout: float | None = None,
+    ) -> None:
+        """Initialize the transport.
+
+        ``connect_timeout`` bounds the connect to a resolved hostname, after
+        which the name is looked up again and, if it moved, retried.
+        """
+        self.connect_timeout = connect_timeout
+        self._host = host
+        self._port = port
+        self.options = options
+        self._stats = stats
+        self._is_literal = _is_ip_literal(host)
+        self._address: str | None = None
+        self._resolved_at = 0.0
+        self._refresh: asyncio.Task[None] | None = None
+
+    async def __call__(self, request: bytes) -> str:
+        """Write the request and read the full response, closing the socket."""
+        options = self.options
+        local_addr = (
+            (options.local_address, 0) if options.local_address is not None else None
+        )
+        address = await self._async_address()
+        # A host that moved may leave its old address silent rather than
+        # refusing; bound the connect so there is time left to retry.
+        connect_timeout = None if self._is_literal else self.connect_timeout
+        try:
+            async with asyncio.timeout(connect_timeout):
+                reader, writer = await asyncio.open_connection(
+                    address, self._port, local_addr=local_addr
+                )
+        except OSError:  # TimeoutError included
+            self._stats.connections_failed += 1
+            if self._is_literal or address == await self._async_resolve():
+                raise
+            # The host moved since it was cached; try its new address once.
+            _LOGGER.debug("%s moved from %s, reconnecting", self._host, address)
+            reader, writer = await self._async_retry(self._address, local_addr)
+        except BaseException:
+            # The client's timeout cancels a connect that never completes.
+            self._stats.connections_failed += 1
+            raise
+        self._stats.connections_opened += 1
+        sock: socket.socket | None = writer.get_extra_info("socket")
+        if sock is not None:
+            _apply_options(sock, options)
+        try:
+            writer.write(request)
+            await writer.drain()
+            chunks: list[bytes] = []
+            while True:
+                chunk = await reader.read(4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks).decode("utf-8", errors="replace")
+        finally:
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+
+    def close(self) -> None:
+        """Cancel a background address refresh still running."""
+        if self._refresh is not None:
+            self._refresh.cancel()
+
+    async def _async_retry(
+        self, address: str | None, local_addr: tuple[str, int] | None
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Connect to a freshly resolved address."""
+        try:
+            return await asyncio.open_connection(
+                address, self._port, local_addr=local_addr
+            )
+        except BaseException:
+            self._stats.connections_failed += 1
+            raise
+
+    async def _async_address(self) -> str:
+        """Return the address to connect to, resolving hostnames via the cache."""
+        if self._is_literal:
+            return self._host
+        age = time.monotonic() - self._resolved_at
+        if self._address is None or age >= RESOLVE_TTL:
+            return await self._async_resolve()
+        if age >= RESOLVE_REFRESH_AFTER and self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._async_background_refresh())
+        return self._address
+
+    async def _async_background_refresh(self) -> None:
+        """Refresh the cached address without holding up a request."""
+        try:
+            await self._async_resolve()
+        except OSError as err:
+            # Keep the cached address; the next request retries when it expires.
+            _LOGGER.debug("Could not re-resolve %s: %s", self._host, err)
+        finally:
+            self._refresh = None
+
+    async def _async_resolve(self) -> str:
+        """Resolve the hostname and cache the first address returned."""
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            self._host, self._port, type=socket.SOCK_STREAM
+        )
+        if not infos:
+            raise OSError(f"Could not resolve {self._host}")
+        self._stats.resolutions += 1
+        self._address = str(infos[0][4][0])
+        self._resolved_at = time.monotonic()
+        return self._address
+
+
+def _is_ip_literal(host: str) -> bool:
+    """Return whether `host` is an IP address rather than a hostname."""
+    try:
+        ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _apply_options(sock: socket.socket, options: TransportOptions) -> None:
+    """Set the configured options on a connected socket.
+
+    Each option is set on its own, so one the platform rejects does not
+    keep the others from being applied.
+    """
+    with contextlib.suppress(OSError):
+        sock.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_NODELAY, int(options.tcp_nodelay)
+        )
+    if options.abortive_close:
+        with contextlib.suppress(OSError):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
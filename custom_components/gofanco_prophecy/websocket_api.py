@@ -0,0 +1,185 @@
+"""WebSocket API for the Gofanco Prophecy HDMI Matrix.
+
+A matrix-grid card built from entities subscribes to dozens of states and
+rebuilds the grid from templates on every change. These commands give
+frontends the whole matrix in one message instead:
+
+- ``gofanco_prophecy/snapshot`` returns routing, power, labels and preset
+  names for one matrix.
+- ``gofanco_prophecy/subscribe`` sends that snapshot as its first event and
+  afterwards only what changed — e.g. ``{"routing": {"2": 3}}`` when
+  output 2 moved to input 3 — each time the coordinator observes a change.
+  When the config entry unloads (reload, options change, removal) the
+  subscription ends with a ``not_found`` error, and the frontend can
+  subscribe again once the matrix is back.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+import voluptuous as vol
+
+from .const import DOMAIN
+from .coordinator import ProphecyConfigEntry, ProphecyDataUpdateCoordinator
+
+_MAPPINGS = ("routing", "input_names", "output_names", "preset_names")
+
+_SUBSCRIPTIONS: HassKey[dict[str, set[CALLBACK_TYPE]]] = HassKey(
+    f"{DOMAIN}_ws_subscriptions"
+)
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands."""
+    websocket_api.async_register_command(hass, ws_snapshot)
+    websocket_api.async_register_command(hass, ws_subscribe)
+
+
+@websocket_api.websocket_command(
+    {vol.Required("type"): f"{DOMAIN}/snapshot", vol.Required("entry_id"): str}
+)
+@callback
+def ws_snapshot(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the full state of one matrix."""
+    if (coordinator := _coordinator(hass, connection, msg)) is None:
+        return
+    connection.send_result(msg["id"], snapshot(coordinator))
+
+
+@websocket_api.websocket_command(
+    {vol.Required("type"): f"{DOMAIN}/subscribe", vol.Required("entry_id"): str}
+)
+@callback
+def ws_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Stream a snapshot, then the changes to it, until unsubscribed."""
+    if (coordinator := _coordinator(hass, connection, msg)) is None:
+        return
+    msg_id: int = msg["id"]
+    last = snapshot(coordinator)
+
+    @callback
+    def _async_coordinator_updated() -> None:
+        nonlocal last
+        current = snapshot(coordinator)
+        if changes := diff(last, current):
+            last = current
+            connection.send_message(websocket_api.event_message(msg_id, changes))
+
+    unsubscribers = (
+        coordinator.async_add_listener(_async_coordinator_updated),
+        coordinator.preset_names_coordinator.async_add_listener(
+            _async_coordinator_updated
+        ),
+    )
+
+    live = _live_subscriptions(hass, coordinator)
+
+    @callback
+    def _async_unsubscribe() -> None:
+        live.discard(_async_entry_unloaded)
+        for unsubscribe in unsubscribers:
+            unsubscribe()
+
+    @callback
+    def _async_entry_unloaded() -> None:
+        connection.subscriptions.pop(msg_id, None)
+        _async_unsubscribe()
+        connection.send_error(
+            msg_id, websocket_api.ERR_NOT_FOUND, "HDMI matrix unloaded"
+        )
+
+    live.add(_async_entry_unloaded)
+    connection.subscriptions[msg_id] = _async_unsubscribe
+    connection.send_result(msg_id)
+    connection.send_message(websocket_api.event_message(msg_id, last))
+
+
+def snapshot(coordinator: ProphecyDataUpdateCoordinator) -> dict[str, Any]:
+    """Return everything a frontend needs to draw the matrix."""
+    state = coordinator.data
+    return {
+        "entry_id": coordinator.config_entry.entry_id,
+        "title": coordinator.config_entry.title,
+        "available": coordinator.last_update_success,
+        "power": state.power,
+        "routing": dict(state.outputs),
+        "input_names": dict(state.input_names),
+        "output_names": dict(state.output_names),
+        "preset_names": dict(state.preset_names),
+    }
+
+
+def diff(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    """Return the fields of `new` that differ from `old`.
+
+    Mappings are compared per key, so rerouting one output yields just that
+    output's entry.
+    """
+    changes: dict[str, Any] = {}
+    for key, value in new.items():
+        if key in _MAPPINGS:
+            changed = {k: v for k, v in value.items() if old[key].get(k) != v}
+            if changed:
+                changes[key] = changed
+        elif old.get(key) != value:
+            changes[key] = value
+    return changes
+
+
+@callback
+def _live_subscriptions(
+    hass: HomeAssistant, coordinator: ProphecyDataUpdateCoordinator
+) -> set[CALLBACK_TYPE]:
+    """Return the callbacks ending each live subscription to an entry.
+
+    The first subscription registers a single unload hook for the entry,
+    which ends every subscription still live at that point. Subscriptions
+    that end earlier remove themselves, so nothing pins their connection.
+    """
+    entry = coordinator.config_entry
+    subscriptions = hass.data.setdefault(_SUBSCRIPTIONS, {})
+    if (live := subscriptions.get(entry.entry_id)) is None:
+        live = subscriptions[entry.entry_id] = set()
+
+        @callback
+        def _async_entry_unloaded() -> None:
+            for end in list(subscriptions.pop(entry.entry_id, ())):
+                end()
+
+        entry.async_on_unload(_async_entry_unloaded)
+    return live
+
+
+def _coordinator(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> ProphecyDataUpdateCoordinator | None:
+    """Return the coordinator of the requested entry, or send an error."""
+    entry: ProphecyConfigEntry | None = hass.config_entries.async_get_entry(
+        msg["entry_id"]
+    )
+    if (
+        entry is None
+        or entry.domain != DOMAIN
+        or entry.state is not ConfigEntryState.LOADED
+    ):
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "HDMI matrix not loaded"
+        )
+        return None
+    return entry.runtime_data
@@ -0,0 +1,104 @@
+"""Bounded ring buffer of recent wire exchanges with the HDMI matrix.
+
+Firmware quirks — a missing status line, a non-2xx reply, a truncated JSON
+body — are awkward to catch with debug logging, which has to be enabled
+before the fact and logs everything. When tracing is enabled the client
+keeps the last N exchanges verbatim (responses truncated) so they can be
+pulled out of a diagnostics download after the fact.
+
+Memory is bounded by ``maxlen`` records of at most ``_RESPONSE_LIMIT``
+characters each; with tracing disabled the client holds no buffer at all.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+_RESPONSE_LIMIT = 512
+
+
+@dataclass(slots=True, frozen=True)
+class WireTraceRecord:
+    """One request/response exchange with the device."""
+
+    command: str
+    request: bytes
+    response: str | None
+    response_length: int
+    status: int | None
+    timestamp: float
+    queued: float
+    elapsed: float
+    error: str | None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serialisable view of the record."""
+        return {
+            "command": self.command,
+            "request": self.request.decode("utf-8", errors="replace"),
+            "response": self.response,
+            "response_length": self.response_length,
+            "status": self.status,
+            "timestamp": self.timestamp,
+            "queued_ms": round(self.queued * 1000, 2),
+            "elapsed_ms": round(self.elapsed * 1000, 2),
+            "error": self.error,
+        }
+
+
+class WireTrace:
+    """Fixed-size ring buffer of `WireTraceRecord`s, oldest evicted first."""
+
+    def __init__(self, maxlen: int) -> None:
+        """Initialize an empty buffer holding at most `maxlen` records."""
+        self._records: deque[WireTraceRecord] = deque(maxlen=maxlen)
+
+    @property
+    def maxlen(self) -> int:
+        """Return the buffer capacity."""
+        return self._records.maxlen or 0
+
+    def __len__(self) -> int:
+        """Return the number of records currently held."""
+        return len(self._records)
+
+    def record(
+        self,
+        *,
+        command: str,
+        request: bytes,
+        response: str | None,
+        status: int | None,
+        timestamp: float,
+        queued: float,
+        elapsed: float,
+        error: BaseException | None,
+    ) -> None:
+        """Append an exchange, truncating the response body."""
+        self._records.append(
+            WireTraceRecord(
+                command=command,
+                request=request,
+                response=None if response is None else response[:_RESPONSE_LIMIT],
+                response_length=0 if response is None else len(response),
+                status=status,
+                timestamp=timestamp,
+                queued=queued,
+                elapsed=elapsed,
+                error=None if error is None else f"{type(error).__name__}: {error}",
+            )
+        )
+
+    def snapshot(self) -> list[WireTraceRecord]:
+        """Return the held records, oldest first."""
+        return list(self._records)
+
+    def resize(self, maxlen: int) -> None:
+        """Change the capacity, keeping the newest records that still fit."""
+        self._records = deque(self._records, maxlen=maxlen)
+
+    def clear(self) -> None:
+        """Drop every held record."""
+        self._records.clear()
@@ -3,8 +3,12 @@
 from __future__ import annotations
 
 import asyncio
-from collections.abc import AsyncGenerator, Generator
+from collections.abc import AsyncGenerator, Generator, Iterator
+from contextlib import contextmanager
 import json
+from pathlib import Path
+import time
+from types import SimpleNamespace
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -37,12 +41,27 @@ DEVICE_STATE: dict[str, Any] = {
 PRESET_NAMES: dict[str, str] = {f"namem{i}": f"Preset{i}" for i in range(1, 9)}
 
 
+@contextmanager
+def aged_poll(seconds: float = 60.0) -> Iterator[None]:
+    """Make the coordinator's last poll look `seconds` older than it is."""
+    monotonic = time.monotonic
+    clock = SimpleNamespace(monotonic=lambda: monotonic() + seconds)
+    with patch("custom_components.gofanco_prophecy.coordinator.time", clock):
+        yield
+
+
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
     """Enable loading of custom integrations in every test."""
     return
 
 
+@pytest.fixture(autouse=True)
+def isolated_config_dir(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Keep files the integration writes (routing history) out of the repo."""
+    hass.config.config_dir = str(tmp_path)
+
+
 class FakeDevice:
     """Stand-in for the HDMI matrix TCP endpoint.
 
@@ -64,6 +83,10 @@ class FakeDevice:
         """Update the canned state payload."""
         self._state = dict(state)
 
+    def set_preset_names(self, names: dict[str, str]) -> None:
+        """Update the canned `LOADMAP` payload (``namem1``…``namem8``)."""
+        self._presets = dict(names)
+
     def set_raw_response(self, raw: str) -> None:
         """Force the next response to be this raw bytes (HTTP preamble etc)."""
         self._raw_override = raw
@@ -92,6 +115,8 @@ class FakeDevice:
                 "nameout4",
             )
             return json.dumps({k: self._state.get(k, "") for k in keys})
+        if body in ("poweron", "poweroff"):
+            self._state["powstatus"] = "1" if body == "poweron" else "0"
         # State query or any mutation: return current state.
         return json.dumps(self._state)
 
@@ -0,0 +1,117 @@
+"""Tests for the built-in auto-route engine."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.gofanco_prophecy.const import CONF_AUTO_ROUTES
+
+from .conftest import FakeDevice
+
+APPLE_TV = "media_player.apple_tv"
+ROKU = "media_player.roku"
+
+RULES = [
+    {"entity_id": APPLE_TV, "input": 2, "outputs": [1, 3]},
+    {"entity_id": ROKU, "input": 1, "outputs": 4, "states": ["playing", "on"]},
+]
+
+
+@pytest.fixture
+def mock_config_entry(mock_config_entry: MockConfigEntry) -> MockConfigEntry:
+    """Configure auto-route rules on the entry."""
+    return MockConfigEntry(
+        domain=mock_config_entry.domain,
+        title=mock_config_entry.title,
+        version=mock_config_entry.version,
+        data=dict(mock_config_entry.data),
+        unique_id=mock_config_entry.unique_id,
+        options={CONF_AUTO_ROUTES: RULES},
+    )
+
+
+async def _fire_debounce(hass: HomeAssistant) -> None:
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+    await hass.async_block_till_done()
+
+
+async def test_player_starting_routes_its_input(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Entering a trigger state routes the input to each configured output."""
+    hass.states.async_set(APPLE_TV, "idle")
+    hass.states.async_set(ROKU, "off")
+    await hass.async_block_till_done()
+    mock_device.requests.clear()
+
+    hass.states.async_set(APPLE_TV, "playing")
+    hass.states.async_set(ROKU, "on")
+    await hass.async_block_till_done()
+    assert mock_device.requests == []
+
+    await _fire_debounce(hass)
+    assert mock_device.requests[:3] == ["out1=2", "out3=2", "out4=1"]
+
+
+async def test_flapping_player_is_debounced(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """A player that stops again inside the window does not route."""
+    hass.states.async_set(APPLE_TV, "idle")
+    await hass.async_block_till_done()
+    mock_device.requests.clear()
+
+    hass.states.async_set(APPLE_TV, "playing")
+    hass.states.async_set(APPLE_TV, "idle")
+    await _fire_debounce(hass)
+    assert mock_device.requests == []
+
+
+async def test_options_flow_rejects_invalid_rules(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+) -> None:
+    """Rules are validated before the options are stored."""
+    result = await hass.config_entries.options.async_init(setup_integration.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {CONF_AUTO_ROUTES: [{"entity_id": "light.kitchen", "input": 9}]},
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_AUTO_ROUTES: "invalid_auto_routes"}
+
+
+async def test_rule_changes_apply_live(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Editing the rules re-subscribes without reloading the entry."""
+    coordinator = setup_integration.runtime_data
+    hass.config_entries.async_update_entry(
+        setup_integration,
+        options={CONF_AUTO_ROUTES: [{"entity_id": ROKU, "input": 3, "outputs": 2}]},
+    )
+    await hass.async_block_till_done()
+    assert setup_integration.runtime_data is coordinator
+    mock_device.requests.clear()
+
+    hass.states.async_set(APPLE_TV, "playing")
+    hass.states.async_set(ROKU, "playing")
+    await hass.async_block_till_done()
+    await _fire_debounce(hass)
+    assert mock_device.requests[:1] == ["out2=3"]
+    assert "out1=2" not in mock_device.requests
@@ -0,0 +1,100 @@
+"""Tests for the standalone profiling CLI and the matrix simulator."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from custom_components.gofanco_prophecy.cli import async_run_workload, main
+from custom_components.gofanco_prophecy.device import GofancoProphecyClient
+from custom_components.gofanco_prophecy.simulator import SimulatedMatrix
+
+
+async def test_route_storm_restores_routing() -> None:
+    """A route storm is measured and the starting routing put back."""
+    matrix = SimulatedMatrix()
+    before = dict(matrix.outputs)
+
+    report = await async_run_workload(
+        lambda: GofancoProphecyClient("sim.invalid", 80, exchange=matrix),
+        "route-storm",
+        count=20,
+        concurrency=3,
+    )
+
+    assert report.operations == 20
+    assert report.succeeded == 20
+    assert len(report.latencies) == 20
+    assert matrix.outputs == before
+
+
+async def test_failed_restore_is_reported_per_output() -> None:
+    """An output that cannot be put back does not stop the others."""
+    matrix = SimulatedMatrix()
+    before = dict(matrix.outputs)
+
+    async def exchange(request: bytes) -> str:
+        if b"out2=" in request:
+            raise OSError("refused")
+        return await matrix(request)
+
+    report = await async_run_workload(
+        lambda: GofancoProphecyClient("sim.invalid", 80, exchange=exchange),
+        "route-storm",
+        count=8,
+    )
+
+    assert list(report.restore_errors) == [2]
+    assert report.as_dict()["restore_errors"].keys() == {"2"}
+    assert matrix.outputs == before
+
+
+async def test_failures_are_broken_down_by_type() -> None:
+    """Failed operations are counted per error type, not raised."""
+    matrix = SimulatedMatrix(failure_rate=1.0)
+    report = await async_run_workload(
+        lambda: GofancoProphecyClient("sim.invalid", 80, exchange=matrix),
+        "poll",
+        count=5,
+    )
+    assert report.succeeded == 0
+    assert report.errors == {"ProphecyConnectionError": 5}
+
+
+async def test_simulator_presets() -> None:
+    """Saved presets recall the routing they captured."""
+    client = GofancoProphecyClient("sim.invalid", 80, exchange=SimulatedMatrix())
+    await client.async_set_all_outputs(2)
+    await client.async_save_preset(1)
+    await client.async_set_output(1, 4)
+    await client.async_recall_preset(1)
+    assert dict((await client.async_get_state()).outputs) == dict.fromkeys(
+        range(1, 5), 2
+    )
+
+
+def test_main_reports_json(capsys: pytest.CaptureFixture[str]) -> None:
+    """The entry point runs every workload and prints percentiles."""
+    assert (
+        main(
+            [
+                "--simulate",
+                "--latency",
+                "0",
+                "--workload",
+                "all",
+                "--count",
+                "8",
+                "--json",
+            ]
+        )
+        == 0
+    )
+    reports = json.loads(capsys.readouterr().out)
+    assert [report["workload"] for report in reports] == [
+        "poll",
+        "route-storm",
+        "preset-cycle",
+    ]
+    assert set(reports[0]["latency_ms"]) == {"p50", "p90", "p95", "p99", "max", "mean"}
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from typing import Any
 from unittest.mock import AsyncMock, patch
 
 from homeassistant import config_entries
@@ -137,3 +138,83 @@ async def test_user_flow_rejects_out_of_range_port(
         await hass.config_entries.flow.async_configure(
             result["flow_id"], {CONF_HOST: HOST, CONF_PORT: 99999}
         )
+
+
+async def test_options_flow_sets_trace_size(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+) -> None:
+    """The options flow stores the wire-trace buffer size."""
+    result = await hass.config_entries.options.async_init(setup_integration.entry_id)
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"trace_size": 25}
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert setup_integration.options == {
+        "scan_interval": 15,
+        "timeout": 10.0,
+        "trace_size": 25,
+        "tcp_nodelay": True,
+        "abortive_close": False,
+        "compact": False,
+    }
+    assert setup_integration.runtime_data.client.trace_enabled
+
+
+async def test_user_flow_subnet_scan(
+    hass: HomeAssistant,
+    mock_device: FakeDevice,
+    mock_config_entry: MockConfigEntry,
+) -> None:
+    """A subnet in the host field sweeps it and offers unconfigured matrices."""
+    mock_config_entry.add_to_hass(hass)
+    answering = {HOST, "192.0.2.12"}
+
+    async def _open_connection(host: str, port: int, **kwargs: Any) -> Any:
+        if host not in answering:
+            raise OSError("unreachable")
+        return await mock_device.open_connection(host, port, **kwargs)
+
+    result = await _start_user_flow(hass)
+    with patch("asyncio.open_connection", _open_connection):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_HOST: "192.0.2.8/29", CONF_PORT: PORT}
+        )
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "pick"
+    assert mock_device.requests.count('{"param1":"1"}') == 2
+
+    with patch(
+        "custom_components.gofanco_prophecy.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_HOST: "192.0.2.12"}
+        )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["data"] == {CONF_HOST: "192.0.2.12", CONF_PORT: PORT}
+
+
+@pytest.mark.parametrize(
+    ("subnet", "error"),
+    [
+        ("192.0.2.0/33", "invalid_subnet"),
+        ("10.0.0.0/16", "subnet_too_large"),
+        ("192.0.2.8/30", "no_devices_found"),
+    ],
+)
+async def test_user_flow_subnet_scan_errors(
+    hass: HomeAssistant, subnet: str, error: str
+) -> None:
+    """Bad, oversized or empty subnets are reported on the user form."""
+    result = await _start_user_flow(hass)
+    with patch("asyncio.open_connection", side_effect=OSError("unreachable")):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_HOST: subnet, CONF_PORT: PORT}
+        )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": error}
@@ -2,12 +2,22 @@
 
 from __future__ import annotations
 
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
 import pytest
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.gofanco_prophecy.device import ProphecyError
 
-from .conftest import FakeDevice
+from .conftest import DEVICE_STATE, PRESET_NAMES, FakeDevice
 
 
 async def test_coordinator_initial_refresh(
@@ -45,3 +55,145 @@ async def test_coordinator_invalid_response(
     mock_device.set_raw_response("HTTP/1.1 200 OK\r\n\r\n<html>nope</html>")
     with pytest.raises(UpdateFailed):
         await coordinator._async_update_data()
+
+
+async def test_get_state_serves_fresh_poll_from_cache(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """A recent poll is served as-is; a stale one triggers one device read."""
+    coordinator = setup_integration.runtime_data
+    mock_device.requests.clear()
+
+    assert await coordinator.async_get_state() is coordinator.data
+    assert mock_device.requests == []
+
+    mock_device.set_state({**DEVICE_STATE, "out4": 1})
+    state = await coordinator.async_get_state(max_age=0)
+    assert mock_device.requests == ['{"param1":"1"}']
+    assert state.outputs[4] == 1
+    assert coordinator.data is state
+
+    mock_device.set_failure(OSError)
+    with pytest.raises(ProphecyError):
+        await coordinator.async_get_state(max_age=0)
+
+
+async def test_scheduled_polls_back_off_while_loop_lags(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """A lagging loop stretches the poll interval, but not requested refreshes."""
+    coordinator = setup_integration.runtime_data
+    interval = coordinator.update_interval
+    coordinator.loop_lag.async_add_sample(1.0)
+    assert coordinator.update_interval == interval * coordinator.loop_lag.stretch
+    assert coordinator.update_interval > interval * 2
+
+    mock_device.requests.clear()
+    await coordinator.async_refresh()
+    assert mock_device.requests == ['{"param1":"1"}']
+
+    # That refresh scheduled the next poll on the stretched interval.
+    mock_device.requests.clear()
+    async_fire_time_changed(hass, dt_util.utcnow() + interval + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert mock_device.requests == []
+
+    coordinator.loop_lag.async_add_sample(-10.0)
+    assert not coordinator.loop_lag.stressed
+    assert coordinator.update_interval == interval
+
+
+async def test_preset_names_refresh_on_their_own_schedule(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Renames made on the device surface without touching routing entities."""
+    coordinator = setup_integration.runtime_data
+    names = coordinator.preset_names_coordinator.data
+    output_1 = hass.states.get("select.hdmi_matrix_output_1")
+    assert output_1 is not None
+    mock_device.requests.clear()
+
+    # Routing polls no longer read the preset names.
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=16))
+    await hass.async_block_till_done()
+    assert "LOADMAP" not in mock_device.requests
+
+    # An unchanged LOADMAP response keeps the very same names.
+    assert coordinator.preset_names_coordinator.update_interval == timedelta(minutes=5)
+    await coordinator.preset_names_coordinator.async_refresh()
+    assert "LOADMAP" in mock_device.requests
+    assert coordinator.preset_names_coordinator.data is names
+
+    mock_device.set_preset_names({**PRESET_NAMES, "namem2": "Movie"})
+    await coordinator.preset_names_coordinator.async_refresh()
+    await hass.async_block_till_done()
+    preset_2 = hass.states.get("text.hdmi_matrix_preset_2_name")
+    assert preset_2 is not None
+    assert preset_2.state == "Movie"
+    assert coordinator.data.preset_names[2] == "Movie"
+    assert hass.states.get("select.hdmi_matrix_output_1") == output_1
+
+
+async def test_reads_older_than_the_last_write_are_discarded(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """A state read sent before an acknowledged write is never published."""
+    coordinator = setup_integration.runtime_data
+    client = coordinator.client
+    mock_device.set_state({**DEVICE_STATE, "out2": 3})
+    stale = await client.async_get_state()
+    await client.async_set_output(2, 2)
+    mock_device.set_state(DEVICE_STATE)
+    assert client.is_stale(stale)
+
+    fresh_read = client.async_get_state
+    with patch.object(client, "async_get_state", AsyncMock(return_value=stale)):
+        await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data.outputs[2] == 2
+    assert coordinator.stale_polls_discarded == 1
+
+    # Callers asking for current state get a second, fresh read instead.
+    reads = AsyncMock(side_effect=[stale, await fresh_read()])
+    with patch.object(client, "async_get_state", reads):
+        state = await coordinator.async_get_state(max_age=60)
+    assert not client.is_stale(state)
+    assert reads.await_count == 2
+    assert coordinator.stale_polls_discarded == 2
+
+
+async def test_opposite_power_request_in_flight_is_sent(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Off then on, issued together, both reach the matrix in that order."""
+    coordinator = setup_integration.runtime_data
+    mock_device.requests.clear()
+
+    sent = await asyncio.gather(
+        coordinator.async_set_power(False),
+        coordinator.async_set_power(False),
+        coordinator.async_set_power(True),
+    )
+
+    assert sent == [True, False, True]
+    assert [r for r in mock_device.requests if r.startswith("power")] == [
+        "poweroff",
+        "poweron",
+    ]
+    assert coordinator.expected_power is True
+
+    # Without a recent poll the request is sent even if it looks redundant.
+    with patch(
+        "custom_components.gofanco_prophecy.coordinator.FRESH_STATE_MAX_AGE", -1
+    ):
+        assert await coordinator.async_set_power(True)
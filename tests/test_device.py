@@ -7,49 +7,56 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from custom_components.gofanco_prophecy.const import NAME_MAX_LEN
+from custom_components.gofanco_prophecy.const import NAME_MAX_LEN, RESOLVE_REFRESH_AFTER
 from custom_components.gofanco_prophecy.device import (
     GofancoProphecyClient,
     ProphecyConnectionError,
     ProphecyError,
     ProphecyResponseError,
-    _looks_like_state,
-    _strip_http_preamble,
+    ProphecyRouting,
+    RouteChange,
+    StateChange,
+    _parse_state,
     _truncate,
+    diff_states,
+    looks_like_state,
+    strip_http_preamble,
 )
+from custom_components.gofanco_prophecy.simulator import SimulatedMatrix
+from custom_components.gofanco_prophecy.transport import TransportOptions
 
 
 def test_strip_http_preamble_bare_body() -> None:
     """Bare JSON bodies pass through unchanged."""
-    assert _strip_http_preamble('{"out1":"1"}') == '{"out1":"1"}'
+    assert strip_http_preamble('{"out1":"1"}') == '{"out1":"1"}'
 
 
 def test_strip_http_preamble_http10_ok() -> None:
     """Status line + headers are stripped on 200."""
     raw = 'HTTP/1.0 200 OK\r\nContent-type: application/json\r\n\r\n{"out1":"1"}'
-    assert _strip_http_preamble(raw) == '{"out1":"1"}'
+    assert strip_http_preamble(raw) == '{"out1":"1"}'
 
 
 def test_strip_http_preamble_http10_non_2xx_raises() -> None:
     """Non-2xx status codes surface as ProphecyResponseError."""
     raw = "HTTP/1.0 500 Internal\r\n\r\noops"
     with pytest.raises(ProphecyResponseError):
-        _strip_http_preamble(raw)
+        strip_http_preamble(raw)
 
 
 def test_strip_http_preamble_empty() -> None:
     """Empty response is returned as-is (caller decides)."""
-    assert _strip_http_preamble("") == ""
+    assert strip_http_preamble("") == ""
 
 
 def test_looks_like_state_positive() -> None:
     """Real state responses pass the heuristic."""
-    assert _looks_like_state({"out1": "1", "powstatus": "1"})
+    assert looks_like_state({"out1": "1", "powstatus": "1"})
 
 
 def test_looks_like_state_negative() -> None:
     """Preset-name responses are *not* state responses."""
-    assert not _looks_like_state({"namem1": "Preset1"})
+    assert not looks_like_state({"namem1": "Preset1"})
 
 
 def test_name_truncation_at_max_len() -> None:
@@ -119,3 +126,405 @@ async def test_concurrent_commands_serialize() -> None:
     # Each "enter" is followed by its own "exit" before the next "enter".
     # If the lock were missing we'd see interleaved enter/enter/exit/exit.
     assert order == ["enter", "exit"] * 3
+
+
+async def test_identical_inflight_requests_are_coalesced() -> None:
+    """Concurrent identical commands share one round trip; others do not."""
+    sent: list[bytes] = []
+    release = asyncio.Event()
+
+    async def exchange(request: bytes) -> str:
+        sent.append(request)
+        await release.wait()
+        return '{"out1":"1","powstatus":"1"}'
+
+    client = GofancoProphecyClient("127.0.0.1", 80, exchange=exchange)
+    reads = [asyncio.ensure_future(client.async_get_state()) for _ in range(3)]
+    presets = asyncio.ensure_future(client.async_load_presets())
+    await asyncio.sleep(0)
+    reads[0].cancel()
+    release.set()
+
+    states = await asyncio.gather(*reads[1:])
+    await presets
+    assert states[0].outputs == states[1].outputs
+    assert len(sent) == 2
+    assert client.stats.coalesced == 2
+
+    await client.async_get_state()
+    assert len(sent) == 3
+
+
+async def test_writes_are_not_coalesced() -> None:
+    """A write queued behind another command is sent again, in order."""
+    sent: list[str] = []
+    release = asyncio.Event()
+
+    async def exchange(request: bytes) -> str:
+        sent.append(request.decode().rsplit("\r\n", 1)[-1])
+        await release.wait()
+        return '{"out1":"1","powstatus":"1"}'
+
+    client = GofancoProphecyClient("127.0.0.1", 80, exchange=exchange)
+    writes = [
+        asyncio.ensure_future(client.async_power(on)) for on in (True, False, True)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*writes)
+    client.close()
+
+    assert [body for body in sent if body.startswith("power")] == [
+        "poweron",
+        "poweroff",
+        "poweron",
+    ]
+    assert client.stats.coalesced == 0
+
+
+async def test_wire_trace_disabled_by_default() -> None:
+    """Without a trace size the client keeps no exchange history."""
+    client = GofancoProphecyClient("127.0.0.1", 80)
+    assert not client.trace_enabled
+    assert client.trace_snapshot() == []
+
+
+async def test_wire_trace_records_bounded_exchanges() -> None:
+    """The ring buffer keeps only the most recent N exchanges, with status."""
+
+    async def fake_open(*_args, **_kwargs):
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'HTTP/1.0 200 OK\r\n\r\n{"out1":"1","powstatus":"1"}')
+        reader.feed_eof()
+        writer = MagicMock()
+        writer.drain = AsyncMock()
+        writer.wait_closed = AsyncMock()
+        return reader, writer
+
+    with patch(
+        "custom_components.gofanco_prophecy.device.asyncio.open_connection",
+        fake_open,
+    ):
+        client = GofancoProphecyClient("127.0.0.1", 80, trace_size=2)
+        for output in (1, 2, 3):
+            await client.async_set_output(output, 1)
+
+    records = client.trace_snapshot()
+    assert [r.command for r in records] == ["out2=1", "out3=1"]
+    assert records[-1].status == 200
+    assert records[-1].error is None
+    assert b"out3=1" in records[-1].request
+
+
+async def test_wire_trace_records_failures() -> None:
+    """Non-2xx replies are traced with their status and the raised error."""
+
+    async def fake_open(*_args, **_kwargs):
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"HTTP/1.0 500 Internal\r\n\r\n" + b"x" * 2000)
+        reader.feed_eof()
+        writer = MagicMock()
+        writer.drain = AsyncMock()
+        writer.wait_closed = AsyncMock()
+        return reader, writer
+
+    with patch(
+        "custom_components.gofanco_prophecy.device.asyncio.open_connection",
+        fake_open,
+    ):
+        client = GofancoProphecyClient("127.0.0.1", 80, trace_size=4)
+        with pytest.raises(ProphecyResponseError):
+            await client.async_get_state()
+
+    (record,) = client.trace_snapshot()
+    assert record.status == 500
+    assert record.error == "ProphecyResponseError: HTTP 500 from device"
+    assert record.response is not None
+    assert len(record.response) < record.response_length
+
+
+def test_routing_behaves_like_a_mapping() -> None:
+    """The compact routing compares and reads like the dict it replaces."""
+    routing = ProphecyRouting(bytes([1, 2, 0, 4]))
+    assert routing == {1: 1, 2: 2, 3: 0, 4: 4}
+    assert routing == ProphecyRouting(bytes([1, 2, 0, 4]))
+    assert routing != ProphecyRouting(bytes([1, 2, 3, 4]))
+    assert routing.get(3) == 0
+    assert routing.get(5) is None
+    assert list(routing.values()) == [1, 2, 0, 4]
+
+
+def test_parse_state_reuses_unchanged_names_and_drops_raw() -> None:
+    """Unchanged name maps are shared with the previous poll; raw is opt-in."""
+    data = {
+        "out1": "2",
+        "out2": "bogus",
+        "namein1": "Roku",
+        "nameout1": "TV",
+        "powstatus": "1",
+    }
+    first = _parse_state(data)
+    second = _parse_state(dict(data), first)
+    assert first.raw is None
+    assert second.input_names is first.input_names
+    assert second.output_names is first.output_names
+    assert second.outputs == {1: 2, 2: 0, 3: 0, 4: 0}
+
+    renamed = _parse_state({**data, "namein1": "AppleTV"}, second, keep_raw=True)
+    assert renamed.input_names is not second.input_names
+    assert renamed.output_names is second.output_names
+    assert renamed.raw is not None
+
+
+async def test_transport_options_and_connection_counters(socket_enabled: None) -> None:
+    """The TCP transport applies socket options and counts connections."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.read(4096)
+        writer.write(b'HTTP/1.0 200 OK\r\n\r\n{"out1":"2","powstatus":"1"}')
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        client = GofancoProphecyClient(
+            "127.0.0.1",
+            port,
+            transport=TransportOptions(abortive_close=True, local_address="127.0.0.1"),
+        )
+        state = await client.async_get_state()
+        assert state.outputs[1] == 2
+
+    with pytest.raises(ProphecyConnectionError):
+        await client.async_get_state()
+    assert client.stats.connections_opened == 1
+    assert client.stats.connections_failed == 1
+
+
+async def test_transport_counts_connect_timeouts(socket_enabled: None) -> None:
+    """A connect cut short by the request timeout counts as a failure."""
+
+    async def connect(*args: object, **kwargs: object) -> object:
+        await asyncio.Event().wait()
+
+    client = GofancoProphecyClient("127.0.0.1", 80, timeout=0.01)
+    with (
+        patch("asyncio.open_connection", connect),
+        pytest.raises(ProphecyConnectionError),
+    ):
+        await client.async_get_state()
+    assert client.stats.connections_failed == 1
+    assert client.stats.connections_opened == 0
+
+
+async def test_transport_caches_and_re_resolves_hostnames(socket_enabled: None) -> None:
+    """A hostname is resolved once, and again when its cached address fails."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.read(4096)
+        writer.write(b'HTTP/1.0 200 OK\r\n\r\n{"out1":"3","powstatus":"1"}')
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    # The first lookup returns a stale address nothing listens on.
+    addresses = iter(["127.0.0.2", "127.0.0.1"])
+
+    async def getaddrinfo(host: str, port: int, **kwargs: object) -> list:
+        assert host == "matrix.local"
+        return [(0, 0, 0, "", (next(addresses), port))]
+
+    open_connection = asyncio.open_connection
+
+    async def connect(host: str, *args: object, **kwargs: object) -> object:
+        if host == "127.0.0.2":
+            raise ConnectionRefusedError
+        return await open_connection(host, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    async with server:
+        client = GofancoProphecyClient("matrix.local", port)
+        with (
+            patch.object(loop, "getaddrinfo", getaddrinfo),
+            patch("asyncio.open_connection", connect),
+        ):
+            assert (await client.async_get_state()).outputs[1] == 3
+            assert (await client.async_get_state()).outputs[1] == 3
+    assert client.stats.resolutions == 2
+    assert client.stats.connections_failed == 1
+    assert client.stats.connections_opened == 2
+
+
+async def test_transport_re_resolves_after_connect_timeout(
+    socket_enabled: None,
+) -> None:
+    """A cached address that never answers is re-resolved like a refused one."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.read(4096)
+        writer.write(b'HTTP/1.0 200 OK\r\n\r\n{"out1":"3","powstatus":"1"}')
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    addresses = iter(["127.0.0.2", "127.0.0.1"])
+    lookups: list[asyncio.Future[None]] = []
+
+    async def getaddrinfo(host: str, port: int, **kwargs: object) -> list:
+        if (address := next(addresses, None)) is None:
+            # A background refresh whose lookup never completes.
+            lookups.append(asyncio.get_running_loop().create_future())
+            await lookups[-1]
+        return [(0, 0, 0, "", (address, port))]
+
+    open_connection = asyncio.open_connection
+
+    async def connect(host: str, *args: object, **kwargs: object) -> object:
+        if host == "127.0.0.2":
+            await asyncio.Event().wait()
+        return await open_connection(host, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    async with server:
+        # The silent address gets half the request timeout; the retry the rest.
+        client = GofancoProphecyClient("matrix.local", port, timeout=0.2)
+        with (
+            patch.object(loop, "getaddrinfo", getaddrinfo),
+            patch("asyncio.open_connection", connect),
+        ):
+            assert (await client.async_get_state()).outputs[1] == 3
+            client._transport._resolved_at -= RESOLVE_REFRESH_AFTER
+            await client.async_get_state()
+            await asyncio.sleep(0)
+    assert client.stats.connections_failed == 1
+    assert client.stats.resolutions == 2
+
+    # Closing the client cancels the refresh still waiting on the resolver.
+    client.close()
+    await asyncio.sleep(0)
+    assert lookups[0].cancelled()
+
+
+async def test_watch_yields_changes_only() -> None:
+    """watch() starts with the full state, then yields just what changed."""
+    matrix = SimulatedMatrix()
+    client = GofancoProphecyClient("sim.invalid", 80, exchange=matrix)
+    changes = client.watch(min_interval=0.001, max_interval=0.002)
+
+    first = await anext(changes)
+    assert first.power is True
+    assert RouteChange(2, None, 2) in first.routes
+    assert first.output_names[1] == "Output1"
+
+    matrix.outputs[2] = 4
+    matrix.power = False
+    change = await anext(changes)
+    assert change == StateChange(routes=(RouteChange(2, 2, 4),), power=False)
+    await changes.aclose()
+
+
+def test_diff_states_without_changes() -> None:
+    """Identical states produce no change."""
+    state = _parse_state({"out1": "1", "powstatus": "1"})
+    assert diff_states(state, _parse_state({"out1": "1", "powstatus": "1"})) is None
+
+
+async def test_state_generations_order_reads_and_writes() -> None:
+    """A read is stale once a later write is acknowledged."""
+    client = GofancoProphecyClient("sim.invalid", 80, exchange=SimulatedMatrix())
+    before = await client.async_get_state()
+    assert not client.is_stale(before)
+
+    await client.async_set_output(1, 3)
+    assert client.is_stale(before)
+    after = await client.async_get_state()
+    assert after.generation > client.write_generation > before.generation
+    assert not client.is_stale(after)
+    assert after.outputs[1] == 3
+
+
+async def test_routing_is_held_until_the_matrix_has_booted() -> None:
+    """Routes issued during boot are merged and sent once the matrix is up."""
+    matrix = SimulatedMatrix(boot_time=0.05)
+    matrix.power = False
+    client = GofancoProphecyClient("sim.invalid", 80, exchange=matrix, trace_size=50)
+
+    await client.async_power(True)
+    assert client.booting
+    await asyncio.gather(
+        client.async_set_output(1, 2),
+        client.async_set_output(1, 3),
+        client.async_set_output(2, 4),
+    )
+
+    assert not client.booting
+    assert not matrix.booting
+    assert (matrix.outputs[1], matrix.outputs[2]) == (3, 4)
+    assert client.stats.commands_held == 3
+    # The superseded route never reached the wire.
+    sent = [record.command for record in client.trace_snapshot()]
+    assert [command for command in sent if command.startswith("out")] == [
+        "out1=3",
+        "out2=4",
+    ]
+
+
+async def test_failed_held_command_only_fails_its_own_callers() -> None:
+    """One held route failing neither drops nor fails the others."""
+    matrix = SimulatedMatrix(boot_time=0.05)
+    matrix.power = False
+
+    async def exchange(request: bytes) -> str:
+        if b"out1=" in request:
+            raise OSError("refused")
+        return await matrix(request)
+
+    client = GofancoProphecyClient("sim.invalid", 80, exchange=exchange)
+    await client.async_power(True)
+    first, second = await asyncio.gather(
+        client.async_set_output(1, 2),
+        client.async_set_output(2, 4),
+        return_exceptions=True,
+    )
+
+    assert isinstance(first, ProphecyConnectionError)
+    assert second is None
+    assert matrix.outputs[2] == 4
+
+
+async def test_closing_during_boot_fails_held_callers_cleanly() -> None:
+    """Held callers of an abandoned boot get a connection error."""
+    matrix = SimulatedMatrix(boot_time=60)
+    matrix.power = False
+    client = GofancoProphecyClient("sim.invalid", 80, exchange=matrix)
+    await client.async_power(True)
+    held = asyncio.ensure_future(client.async_set_output(1, 2))
+    await asyncio.sleep(0)
+
+    client.close()
+    with pytest.raises(ProphecyConnectionError):
+        await held
+    assert not client.booting
+
+
+async def test_reads_with_other_timeouts_are_not_shared() -> None:
+    """A read never joins one sent with a different timeout."""
+    release = asyncio.Event()
+
+    async def exchange(request: bytes) -> str:
+        await release.wait()
+        return '{"out1":"1","powstatus":"1"}'
+
+    client = GofancoProphecyClient("127.0.0.1", 80, exchange=exchange)
+    probe = asyncio.ensure_future(client.async_get_state(timeout=0.01))
+    poll = asyncio.ensure_future(client.async_get_state())
+    await asyncio.sleep(0.05)
+    release.set()
+
+    with pytest.raises(ProphecyConnectionError):
+        await probe
+    assert (await poll).power
+    assert client.stats.coalesced == 0
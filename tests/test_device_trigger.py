@@ -0,0 +1,112 @@
+"""Tests for route-changed events and device triggers."""
+
+from __future__ import annotations
+
+from homeassistant.components import automation
+from homeassistant.components.device_automation import DeviceAutomationType
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.helpers import device_registry as dr
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_get_device_automations,
+    async_mock_service,
+)
+
+from custom_components.gofanco_prophecy.const import DOMAIN, EVENT_ROUTE_CHANGED
+
+from .conftest import DEVICE_STATE, FakeDevice
+
+
+def _device_id(hass: HomeAssistant, entry: MockConfigEntry) -> str:
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, entry.entry_id)})
+    assert device is not None
+    return device.id
+
+
+async def test_route_changed_event_carries_diff(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """One event per observed change, with only the changed outputs."""
+    events = async_capture_events(hass, EVENT_ROUTE_CHANGED)
+    coordinator = setup_integration.runtime_data
+
+    await coordinator.async_refresh()
+    mock_device.set_state({**DEVICE_STATE, "out2": 4, "out3": 0})
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert len(events) == 1
+    data = events[0].data
+    assert data["device_id"] == _device_id(hass, setup_integration)
+    assert data["changes"] == [
+        {"output": 2, "old_input": 2, "new_input": 4},
+        {"output": 3, "old_input": 3, "new_input": 0},
+    ]
+    assert data["routing"] == {1: 1, 2: 4, 3: 0, 4: 4}
+    assert data["old_power"] is data["power"] is True
+
+
+async def test_get_triggers(
+    hass: HomeAssistant, setup_integration: MockConfigEntry
+) -> None:
+    """The device offers routing, power and per-output triggers."""
+    triggers = await async_get_device_automations(
+        hass, DeviceAutomationType.TRIGGER, _device_id(hass, setup_integration)
+    )
+    types = {(t["type"], t.get("subtype")) for t in triggers}
+    assert ("route_changed", None) in types
+    assert ("powered_off", None) in types
+    assert ("output_changed", "output_4") in types
+
+
+async def test_output_trigger_fires_only_for_its_output(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """An output trigger ignores changes on other outputs."""
+    calls: list[ServiceCall] = async_mock_service(hass, "test", "automation")
+    device_id = _device_id(hass, setup_integration)
+    assert await async_setup_component(
+        hass,
+        automation.DOMAIN,
+        {
+            automation.DOMAIN: [
+                {
+                    "trigger": {
+                        "platform": "device",
+                        "domain": DOMAIN,
+                        "device_id": device_id,
+                        "type": trigger_type,
+                        **extra,
+                    },
+                    "action": {
+                        "service": "test.automation",
+                        "data": {"which": trigger_type},
+                    },
+                }
+                for trigger_type, extra in (
+                    ("output_changed", {"subtype": "output_1"}),
+                    ("powered_off", {}),
+                )
+            ]
+        },
+    )
+    coordinator = setup_integration.runtime_data
+
+    mock_device.set_state({**DEVICE_STATE, "out2": 1})
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert calls == []
+
+    mock_device.set_state({**DEVICE_STATE, "out1": 3, "powstatus": "0"})
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert sorted(call.data["which"] for call in calls) == [
+        "output_changed",
+        "powered_off",
+    ]
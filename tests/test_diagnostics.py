@@ -2,19 +2,72 @@
 
 from __future__ import annotations
 
+from homeassistant.const import CONF_HOST, CONF_PORT
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from custom_components.gofanco_prophecy.const import DOMAIN, SCAN_INTERVAL
+from custom_components.gofanco_prophecy.device import STATE_CMD
 from custom_components.gofanco_prophecy.diagnostics import (
     async_get_config_entry_diagnostics,
 )
 
+from .conftest import HOST, PORT, FakeDevice
+
 
 async def test_diagnostics_redact_host(
-    hass: HomeAssistant, setup_integration: MockConfigEntry
+    hass: HomeAssistant, setup_integration: MockConfigEntry, mock_device: FakeDevice
 ) -> None:
     """Host is redacted from diagnostics output."""
+    mock_device.requests.clear()
     data = await async_get_config_entry_diagnostics(hass, setup_integration)
+    assert mock_device.requests == [STATE_CMD]
     assert data["entry"]["data"]["host"] == "**REDACTED**"
     assert data["state"]["power"] is True
     assert data["state"]["outputs"] == {1: 1, 2: 2, 3: 3, 4: 4}
+    assert data["raw_state"]["namein1"] == "Roku"
+
+
+async def test_diagnostics_skip_device_read_while_loop_lags(
+    hass: HomeAssistant, setup_integration: MockConfigEntry, mock_device: FakeDevice
+) -> None:
+    """Under event-loop lag the download is built from the last poll."""
+    setup_integration.runtime_data.loop_lag.async_add_sample(1.0)
+    mock_device.requests.clear()
+    data = await async_get_config_entry_diagnostics(hass, setup_integration)
+    assert mock_device.requests == []
+    assert data["state"]["outputs"] == {1: 1, 2: 2, 3: 3, 4: 4}
+    assert "error" in data["raw_state"]
+    assert data["loop_lag"]["poll_interval_s"] > SCAN_INTERVAL.total_seconds()
+
+
+async def test_diagnostics_wire_trace(
+    hass: HomeAssistant,
+    mock_device: FakeDevice,
+) -> None:
+    """Traced exchanges are exported with the host scrubbed from requests."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        data={CONF_HOST: HOST, CONF_PORT: PORT},
+        options={"trace_size": 10},
+        unique_id=f"{HOST}:{PORT}",
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    data = await async_get_config_entry_diagnostics(hass, entry)
+    trace = data["wire_trace"]
+    assert trace
+    assert trace[0]["command"] == '{"param1":"1"}'
+    assert trace[0]["error"] is None
+    assert all(HOST not in record["request"] for record in trace)
+
+
+async def test_diagnostics_wire_trace_disabled(
+    hass: HomeAssistant, setup_integration: MockConfigEntry
+) -> None:
+    """With tracing off the diagnostics carry no trace section."""
+    data = await async_get_config_entry_diagnostics(hass, setup_integration)
+    assert data["wire_trace"] is None
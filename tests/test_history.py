@@ -0,0 +1,180 @@
+"""Tests for the on-disk routing history and usage statistics."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.gofanco_prophecy.const import DOMAIN
+from custom_components.gofanco_prophecy.history import (
+    HistoryRecord,
+    RoutingHistory,
+    summarize,
+)
+
+from .conftest import DEVICE_STATE, FakeDevice
+
+
+def test_summarize_on_air_and_switches() -> None:
+    """On-air time excludes mute and power-off; switches count per output."""
+    records = [
+        HistoryRecord(100.0, True, bytes([1, 2, 0, 4])),
+        HistoryRecord(160.0, True, bytes([3, 2, 0, 4])),
+        HistoryRecord(200.0, False, bytes([3, 2, 0, 4])),
+        HistoryRecord(300.0, True, bytes([3, 2, 0, 4])),
+    ]
+    stats = summarize(records, 0.0, 310.0)
+
+    assert stats.on_air[(1, 1)] == 60.0
+    assert stats.on_air[(1, 3)] == 40.0 + 10.0
+    assert stats.on_air[(2, 2)] == 100.0 + 10.0
+    assert (3, 0) not in stats.on_air
+    assert stats.switches == {1: 1}
+    assert stats.power_changes == 2
+    assert stats.input_on_air(2) == 110.0
+
+
+def test_summarize_clips_to_window() -> None:
+    """Segments straddling the window edges only count their overlap."""
+    records = [
+        HistoryRecord(0.0, True, bytes([1, 1, 1, 1])),
+        HistoryRecord(100.0, True, bytes([2, 1, 1, 1])),
+    ]
+    stats = summarize(records, 50.0, 150.0)
+
+    assert stats.on_air[(1, 1)] == 50.0
+    assert stats.on_air[(1, 2)] == 50.0
+    assert stats.switches == {1: 1}
+
+    assert summarize(records, 120.0, 150.0).switches == {}
+
+
+async def test_history_persists_and_rotates(hass: HomeAssistant) -> None:
+    """Changes are appended, duplicates skipped, and the log rotates."""
+    history = RoutingHistory(hass, "abc", max_records=2)
+    await history.async_load()
+    for routes in ((1, 1, 1, 1), (1, 1, 1, 1), (2, 1, 1, 1), (3, 1, 1, 1)):
+        history.async_observe(True, dict(enumerate(routes, start=1)))
+        await history.async_flush()
+
+    storage = Path(hass.config.path(".storage"))
+    assert (storage / f"{DOMAIN}_history_abc.bin.1").stat().st_size == 2 * 13
+    assert (storage / f"{DOMAIN}_history_abc.bin").stat().st_size == 13
+
+    reloaded = RoutingHistory(hass, "abc")
+    await reloaded.async_load()
+    assert reloaded.current_stats().switches == {1: 2}
+
+    await reloaded.async_remove()
+    assert not list(storage.glob(f"{DOMAIN}_history_abc*"))
+
+
+async def test_history_ignores_torn_record(hass: HomeAssistant) -> None:
+    """A partially written trailing record is ignored on load."""
+    history = RoutingHistory(hass, "torn")
+    history.async_observe(True, {1: 1, 2: 2, 3: 3, 4: 4})
+    await history.async_flush()
+    path = Path(hass.config.path(".storage", f"{DOMAIN}_history_torn.bin"))
+    with path.open("ab") as fp:
+        fp.write(b"\x00\x01\x02")
+
+    reloaded = RoutingHistory(hass, "torn")
+    await reloaded.async_load()
+    assert reloaded.current_stats().input_on_air(1) >= 0.0
+    await reloaded.async_flush()
+    records = await hass.async_add_executor_job(reloaded._read_all)
+    assert [record.seen for record in records] == [True, False]
+
+
+def test_summarize_skips_unseen_time() -> None:
+    """Time after an unseen marker is not on air, and no switch is counted."""
+    records = [
+        HistoryRecord(0.0, True, bytes([1, 1, 1, 1])),
+        HistoryRecord(10.0, True, bytes([1, 1, 1, 1]), seen=False),
+        HistoryRecord(500.0, True, bytes([1, 1, 1, 1])),
+    ]
+    stats = summarize(records, 0.0, 510.0)
+
+    assert stats.on_air[(1, 1)] == 20.0
+    assert stats.switches == {}
+
+
+async def test_history_closes_open_segment_on_load(hass: HomeAssistant) -> None:
+    """A log left open is closed at its last write, not at load time."""
+    history = RoutingHistory(hass, "crash")
+    history.async_observe(True, {1: 1, 2: 2, 3: 3, 4: 4})
+    await history.async_flush()
+    path = Path(hass.config.path(".storage", f"{DOMAIN}_history_crash.bin"))
+    (last,) = await hass.async_add_executor_job(history._read_all)
+    os.utime(path, (last.timestamp + 5.0, last.timestamp + 5.0))
+
+    reloaded = RoutingHistory(hass, "crash")
+    await reloaded.async_load()
+
+    assert reloaded.current_stats().input_on_air(1) == pytest.approx(5.0)
+
+
+async def test_failed_poll_stops_on_air_time(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """While the matrix cannot be reached its routing is not on air."""
+    coordinator = setup_integration.runtime_data
+    mock_device.set_failure(OSError)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    before = coordinator.history.current_stats().input_on_air(1)
+    await asyncio.sleep(0.01)
+    assert coordinator.history.current_stats().input_on_air(1) == before
+
+
+async def test_coordinator_records_routing_changes(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """A routing change seen by a poll feeds the switch-count sensor."""
+    coordinator = setup_integration.runtime_data
+    mock_device.set_state({**DEVICE_STATE, "out2": 4})
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.hdmi_matrix_output_2_switches")
+    assert state is not None
+    assert state.state == "1"
+    on_air = hass.states.get("sensor.hdmi_matrix_input_1_on_air")
+    assert on_air is not None
+    assert on_air.attributes["unit_of_measurement"] == "h"
+
+
+async def test_get_history_stats_service(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """The service returns the pair breakdown for each targeted matrix."""
+    coordinator = setup_integration.runtime_data
+    mock_device.set_state({**DEVICE_STATE, "out1": 0})
+    await coordinator.async_refresh()
+
+    response = await hass.services.async_call(
+        DOMAIN, "get_history_stats", {}, blocking=True, return_response=True
+    )
+
+    assert response is not None
+    matrix = response["matrices"][setup_integration.entry_id]
+    assert matrix["switches"]["output_1"] == 1
+    assert matrix["power_changes"] == 0
+    assert set(matrix["on_air"]["output_1"]) == {
+        "input_1",
+        "input_2",
+        "input_3",
+        "input_4",
+    }
@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
+from unittest.mock import patch
+
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.const import CONF_HOST, CONF_PORT
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
 import pytest
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
+from custom_components.gofanco_prophecy import async_unload_entry
 from custom_components.gofanco_prophecy.const import DOMAIN
 
 from .conftest import HOST, PORT, FakeDevice
@@ -27,6 +35,78 @@ async def test_setup_and_unload(
     assert entry.state is ConfigEntryState.NOT_LOADED
 
 
+async def test_failed_unload_keeps_history_open(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+) -> None:
+    """History is only closed once the platforms are actually gone."""
+    entry = setup_integration
+    history = entry.runtime_data.history
+
+    with (
+        patch.object(hass.config_entries, "async_unload_platforms", return_value=False),
+        patch.object(history, "async_close") as close,
+    ):
+        assert not await async_unload_entry(hass, entry)
+    close.assert_not_called()
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_option_changes_apply_without_reload(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+) -> None:
+    """Tuning options reach the running client and coordinator in place."""
+    entry = setup_integration
+    coordinator = entry.runtime_data
+
+    hass.config_entries.async_update_entry(
+        entry,
+        options={"scan_interval": 30, "timeout": 4.0, "trace_size": 5},
+    )
+    await hass.async_block_till_done()
+
+    assert entry.runtime_data is coordinator
+    assert coordinator.update_interval == timedelta(seconds=30)
+    assert coordinator.client.trace_enabled
+
+
+async def test_shorter_scan_interval_applies_to_the_queued_poll(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """The poll queued on the old interval is moved to the new one."""
+    hass.config_entries.async_update_entry(
+        setup_integration, options={"scan_interval": 5}
+    )
+    await hass.async_block_till_done()
+    mock_device.requests.clear()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert mock_device.requests
+
+
+async def test_address_change_reloads(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+) -> None:
+    """A new host is structural and rebuilds the entry."""
+    entry = setup_integration
+    coordinator = entry.runtime_data
+
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_HOST: "192.0.2.11"}
+    )
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert entry.runtime_data is not coordinator
+    assert entry.runtime_data.client.host == "192.0.2.11"
+
+
 async def test_setup_retry_on_connection_error(
     hass: HomeAssistant,
     mock_device: FakeDevice,
@@ -15,7 +15,9 @@ from homeassistant.core import HomeAssistant
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from .conftest import FakeDevice
+from custom_components.gofanco_prophecy.device import STATE_CMD
+
+from .conftest import DEVICE_STATE, FakeDevice, aged_poll
 
 ENTITY_OUT1 = "media_player.hdmi_matrix_output_1"
 
@@ -53,14 +55,34 @@ async def test_media_player_turn_on_off(
 ) -> None:
     """Turn_on / turn_off drive the matrix power."""
     await hass.services.async_call(
-        MP_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: ENTITY_OUT1}, blocking=True
+        MP_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: ENTITY_OUT1}, blocking=True
     )
-    assert any("poweron" in req for req in mock_device.requests)
+    assert any("poweroff" in req for req in mock_device.requests)
 
     await hass.services.async_call(
-        MP_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: ENTITY_OUT1}, blocking=True
+        MP_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: ENTITY_OUT1}, blocking=True
     )
-    assert any("poweroff" in req for req in mock_device.requests)
+    assert any("poweron" in req for req in mock_device.requests)
+
+
+async def test_power_requests_are_deduplicated(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Every entity asking for the same power state costs one command."""
+    players = {
+        ATTR_ENTITY_ID: [f"media_player.hdmi_matrix_output_{i}" for i in range(1, 5)]
+    }
+    switch = {ATTR_ENTITY_ID: "switch.hdmi_matrix_power"}
+    mock_device.requests.clear()
+    await hass.services.async_call(MP_DOMAIN, SERVICE_TURN_ON, players, blocking=True)
+    await hass.services.async_call("switch", SERVICE_TURN_ON, switch, blocking=True)
+    assert mock_device.requests == []
+
+    await hass.services.async_call(MP_DOMAIN, SERVICE_TURN_OFF, players, blocking=True)
+    await hass.services.async_call("switch", SERVICE_TURN_OFF, switch, blocking=True)
+    assert mock_device.requests.count("poweroff") == 1
 
 
 async def test_media_player_mute_routes_to_zero(
@@ -69,13 +91,40 @@ async def test_media_player_mute_routes_to_zero(
     mock_device: FakeDevice,
 ) -> None:
     """Muting a media_player routes that output to input 0."""
+    mock_device.requests.clear()
     await hass.services.async_call(
         MP_DOMAIN,
         SERVICE_VOLUME_MUTE,
         {ATTR_ENTITY_ID: ENTITY_OUT1, ATTR_MEDIA_VOLUME_MUTED: True},
         blocking=True,
     )
-    assert any("out1=0" in req for req in mock_device.requests)
+    # The input to restore on unmute comes from the last poll, not a read.
+    assert "out1=0" in mock_device.requests[0]
+
+
+async def test_media_player_mute_rereads_an_old_poll(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """On old data the input to restore comes from a fresh device read."""
+    mock_device.set_state({**DEVICE_STATE, "out1": 3})
+    mock_device.requests.clear()
+    with aged_poll():
+        await hass.services.async_call(
+            MP_DOMAIN,
+            SERVICE_VOLUME_MUTE,
+            {ATTR_ENTITY_ID: ENTITY_OUT1, ATTR_MEDIA_VOLUME_MUTED: True},
+            blocking=True,
+        )
+        await hass.services.async_call(
+            MP_DOMAIN,
+            SERVICE_VOLUME_MUTE,
+            {ATTR_ENTITY_ID: ENTITY_OUT1, ATTR_MEDIA_VOLUME_MUTED: False},
+            blocking=True,
+        )
+    assert mock_device.requests[0] == STATE_CMD
+    assert "out1=3" in mock_device.requests
 
 
 async def test_media_player_unmute_with_no_inputs_raises(
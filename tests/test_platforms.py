@@ -12,10 +12,11 @@ from homeassistant.components.text import DOMAIN as TEXT_DOMAIN, SERVICE_SET_VAL
 from homeassistant.const import ATTR_ENTITY_ID, STATE_ON
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from .conftest import FakeDevice
+from .conftest import DEVICE_STATE, FakeDevice
 
 SWITCH_ENTITY = "switch.hdmi_matrix_power"
 SELECT_OUTPUT_1 = "select.hdmi_matrix_output_1"
@@ -39,6 +40,8 @@ async def test_power_switch_turn_on(
     mock_device: FakeDevice,
 ) -> None:
     """Turning the switch on issues a poweron POST."""
+    mock_device.set_state({**DEVICE_STATE, "powstatus": "0"})
+    await setup_integration.runtime_data.async_refresh()
     await hass.services.async_call(
         SWITCH_DOMAIN,
         "turn_on",
@@ -130,7 +133,57 @@ async def test_command_failure_raises(
     with pytest.raises(HomeAssistantError):
         await hass.services.async_call(
             SWITCH_DOMAIN,
-            "turn_on",
+            "turn_off",
             {ATTR_ENTITY_ID: SWITCH_ENTITY},
             blocking=True,
         )
+
+
+async def test_unrelated_change_skips_state_writes(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Rerouting one output only rewrites the entities that show it."""
+    label_before = hass.states.get(TEXT_INPUT_1)
+    output_1_before = hass.states.get(SELECT_OUTPUT_1)
+    assert label_before is not None
+    assert output_1_before is not None
+
+    mock_device.set_state({**DEVICE_STATE, "out2": 4})
+    await setup_integration.runtime_data.async_refresh()
+    await hass.async_block_till_done()
+
+    label_after = hass.states.get(TEXT_INPUT_1)
+    output_1_after = hass.states.get(SELECT_OUTPUT_1)
+    output_2 = hass.states.get("select.hdmi_matrix_output_2")
+    assert label_after is not None
+    assert output_1_after is not None
+    assert output_2 is not None
+    assert label_after.last_reported == label_before.last_reported
+    assert output_1_after.last_reported == output_1_before.last_reported
+    assert output_2.state == "NintSw"
+
+
+async def test_compact_mode_exposes_one_entity(
+    hass: HomeAssistant, setup_integration: MockConfigEntry
+) -> None:
+    """Compact mode replaces every entity with one attribute-rich sensor."""
+    hass.config_entries.async_update_entry(setup_integration, options={"compact": True})
+    await hass.async_block_till_done()
+
+    entities = er.async_entries_for_config_entry(
+        er.async_get(hass), setup_integration.entry_id
+    )
+    assert [entity.entity_id for entity in entities] == ["sensor.hdmi_matrix"]
+    assert hass.states.get(SWITCH_ENTITY) is None
+    state = hass.states.get("sensor.hdmi_matrix")
+    assert state.state == "on"
+    assert state.attributes["entry_id"] == setup_integration.entry_id
+    assert state.attributes["routing"] == {1: 1, 2: 2, 3: 3, 4: 4}
+    assert state.attributes["input_names"][1] == "Roku"
+    assert state.attributes["preset_names"][1] == "Preset1"
+    assert state.state_info is not None
+    assert {"routing", "input_names", "options"} <= state.state_info[
+        "unrecorded_attributes"
+    ]
@@ -0,0 +1,112 @@
+"""Tests for wire-session recording and replay."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.gofanco_prophecy.const import DOMAIN
+from custom_components.gofanco_prophecy.device import (
+    STATE_CMD,
+    GofancoProphecyClient,
+    ProphecyConnectionError,
+)
+from custom_components.gofanco_prophecy.replay import (
+    RecordedExchange,
+    ReplayExchange,
+    ReplayMismatchError,
+    WireRecorder,
+    async_replay_session,
+    load_session,
+)
+
+from .conftest import HOST, PORT, FakeDevice
+
+_STATE_REQUEST = 'POST /inform.cgi HTTP/1.1\r\n\r\n{"param1":"1"}'
+
+
+async def test_record_save_load_replay_roundtrip(
+    mock_device: FakeDevice, tmp_path: Path
+) -> None:
+    """A recorded session replays to the same parsed state, host scrubbed."""
+    client = GofancoProphecyClient(HOST, PORT)
+    recorder = WireRecorder(client.exchange, HOST)
+    client.exchange = recorder
+    live = await client.async_get_state()
+    await client.async_set_output(1, 3)
+
+    path = tmp_path / "session.jsonl"
+    recorder.save(path)
+    assert HOST not in path.read_text(encoding="utf-8")
+
+    exchanges = load_session(path)
+    assert [e.command for e in exchanges] == ['{"param1":"1"}', "out1=3"]
+
+    replayed = GofancoProphecyClient(
+        "replay.invalid", PORT, exchange=ReplayExchange(exchanges, speed=None)
+    )
+    state = await replayed.async_get_state()
+    assert state.outputs == live.outputs
+    assert state.input_names == live.input_names
+
+
+async def test_replay_mismatch_and_recorded_failures() -> None:
+    """Unknown commands and recorded socket errors surface like live ones."""
+    exchanges = [
+        RecordedExchange(0.0, 0.0, _STATE_REQUEST, None, error="OSError"),
+    ]
+    client = GofancoProphecyClient(
+        "replay.invalid", PORT, exchange=ReplayExchange(exchanges, speed=None)
+    )
+    with pytest.raises(ProphecyConnectionError):
+        await client.async_get_state()
+    with pytest.raises(ReplayMismatchError):
+        await client.async_get_state()
+
+
+async def test_replay_session_counts_parse_errors() -> None:
+    """Driving a session reports per-type parse failures."""
+    exchanges = [
+        RecordedExchange(0.0, 0.01, _STATE_REQUEST, '{"out1":"2","powstatus":"1"}'),
+        RecordedExchange(0.5, 0.01, _STATE_REQUEST, "HTTP/1.0 500 Oops\r\n\r\n"),
+        RecordedExchange(1.0, 0.01, _STATE_REQUEST, "<html>"),
+    ]
+    report = await async_replay_session(exchanges, speed=None)
+    assert report.commands == 3
+    assert report.errors == {"ProphecyResponseError": 2}
+
+
+async def test_record_session_service(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    tmp_path: Path,
+) -> None:
+    """The record_session service captures traffic and restores the client."""
+    hass.config.config_dir = str(tmp_path)
+    coordinator = setup_integration.runtime_data
+    original = coordinator.client.exchange
+
+    recording = hass.async_create_task(
+        hass.services.async_call(
+            DOMAIN,
+            "record_session",
+            {"duration": 1},
+            blocking=True,
+            return_response=True,
+        )
+    )
+    while not isinstance(coordinator.client.exchange, WireRecorder):
+        await asyncio.sleep(0)
+    await coordinator.client.async_get_state()
+    response = await recording
+    assert response is not None
+    assert coordinator.client.exchange == original
+
+    (path,) = response["files"].values()
+    assert Path(path).parent == tmp_path
+    commands = [exchange.command for exchange in load_session(path)]
+    assert commands == [STATE_CMD]
@@ -0,0 +1,336 @@
+"""Tests for the integration-wide services and multi-matrix fan-out."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import voluptuous as vol
+
+from custom_components.gofanco_prophecy.const import DOMAIN
+from custom_components.gofanco_prophecy.transport import TransportOptions
+
+from .conftest import DEVICE_STATE, PORT, FakeDevice, aged_poll
+
+COORDINATOR = "custom_components.gofanco_prophecy.coordinator"
+SERVICES = "custom_components.gofanco_prophecy.services"
+
+
+async def _add_second_matrix(hass: HomeAssistant) -> MockConfigEntry:
+    """Load a second matrix entry on a different host."""
+    second = MockConfigEntry(
+        domain=DOMAIN,
+        title="HDMI Matrix (192.0.2.11)",
+        version=2,
+        data={CONF_HOST: "192.0.2.11", CONF_PORT: PORT},
+        unique_id="192.0.2.11:80",
+    )
+    second.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(second.entry_id)
+    await hass.async_block_till_done()
+    return second
+
+
+async def test_route_service_single_output(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """The route service issues out<N>=<I> for a single output."""
+    await hass.services.async_call(
+        DOMAIN, "route", {"output": 2, "input": 3}, blocking=True
+    )
+    assert "out2=3" in mock_device.requests
+
+
+async def test_route_service_all_outputs(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Omitting the output routes every output at once."""
+    await hass.services.async_call(DOMAIN, "route", {"input": 1}, blocking=True)
+    assert "outa=1" in mock_device.requests
+
+
+async def test_all_entries_fans_out_and_returns_results(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """all_entries drives every loaded matrix and reports per-entry results."""
+    second = await _add_second_matrix(hass)
+    mock_device.requests.clear()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "set_power",
+        {"all_entries": True, "power": False},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert mock_device.requests.count("poweroff") == 2
+    assert response is not None
+    results = response["results"]
+    assert set(results) == {setup_integration.entry_id, second.entry_id}
+    assert all(result["success"] for result in results.values())
+
+
+async def test_entry_id_list_targets_each_matrix(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """A list of entry_ids targets exactly those matrices."""
+    second = await _add_second_matrix(hass)
+    mock_device.requests.clear()
+
+    await hass.services.async_call(
+        DOMAIN,
+        "recall_preset",
+        {"entry_id": [setup_integration.entry_id, second.entry_id], "index": 5},
+        blocking=True,
+    )
+    assert mock_device.requests.count("call=5") == 2
+
+
+async def test_partial_failure_reported_per_entry(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """One unreachable matrix fails its own result without sinking the rest."""
+    await _add_second_matrix(hass)
+    mock_device.requests.clear()
+    mock_device.set_failure(OSError)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "mute_all",
+        {"all_entries": True},
+        blocking=True,
+        return_response=True,
+    )
+    assert response is not None
+    outcomes = sorted(r["success"] for r in response["results"].values())
+    assert outcomes == [False, True]
+    assert mock_device.requests.count("outa=0") == 1
+
+    mock_device.set_failure(OSError)
+    with pytest.raises(HomeAssistantError, match="on 1 of 2 HDMI matrices"):
+        await hass.services.async_call(
+            DOMAIN, "mute_all", {"all_entries": True}, blocking=True
+        )
+
+
+async def test_entry_id_and_all_entries_are_exclusive(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+) -> None:
+    """Passing both targeting fields is rejected by the schema."""
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(
+            DOMAIN,
+            "mute_all",
+            {"entry_id": setup_integration.entry_id, "all_entries": True},
+            blocking=True,
+        )
+
+
+async def test_profile_service_writes_report(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+    tmp_path: Path,
+) -> None:
+    """The profile service refreshes the matrix and writes a report."""
+    hass.config.config_dir = str(tmp_path)
+    mock_device.requests.clear()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "profile",
+        {"duration": 1, "trace_memory": True},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert response is not None
+    report = Path(response["report"])
+    assert report.parent == tmp_path
+    text = report.read_text(encoding="utf-8")
+    assert "Forced refreshes" in text
+    assert "_async_update_data" in text
+    assert "tracemalloc" in text
+    assert report.with_suffix(".cprof").exists()
+    assert '{"param1":"1"}' in mock_device.requests
+
+
+async def test_profile_service_honours_all_entries_false(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    tmp_path: Path,
+) -> None:
+    """all_entries: false without an entry_id does not profile every matrix."""
+    hass.config.config_dir = str(tmp_path)
+    await _add_second_matrix(hass)
+
+    with pytest.raises(HomeAssistantError, match="Multiple HDMI Matrix"):
+        await hass.services.async_call(
+            DOMAIN,
+            "profile",
+            {"duration": 1, "all_entries": False},
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_fan_out_timeout_follows_the_request_timeout(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+) -> None:
+    """Each matrix gets its own request timeout plus the fan-out margin."""
+    client = setup_integration.runtime_data.client
+    client.reconfigure(timeout=0.05, trace_size=0, transport=TransportOptions())
+
+    async def hang(*args: object) -> None:
+        await asyncio.sleep(1)
+
+    with (
+        patch(f"{SERVICES}.FANOUT_TIMEOUT_MARGIN", 0.0),
+        patch.object(client, "async_mute_all", hang),
+    ):
+        response = await hass.services.async_call(
+            DOMAIN, "mute_all", {}, blocking=True, return_response=True
+        )
+    assert response is not None
+    (result,) = response["results"].values()
+    assert result["error"] == "Timed out after 0.05s"
+
+
+async def test_fan_out_waits_for_routing_held_during_boot(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+) -> None:
+    """A command held while the matrix boots is not reported as timed out."""
+    client = setup_integration.runtime_data.client
+    client.reconfigure(timeout=0.05, trace_size=0, transport=TransportOptions())
+
+    async def held(*args: object) -> None:
+        await asyncio.sleep(0.2)
+
+    with (
+        patch(f"{SERVICES}.FANOUT_TIMEOUT_MARGIN", 0.0),
+        patch(f"{SERVICES}.BOOT_MAX_WAIT", 0.5),
+        patch.object(type(client), "booting", True),
+        patch.object(client, "async_mute_all", held),
+    ):
+        response = await hass.services.async_call(
+            DOMAIN, "mute_all", {}, blocking=True, return_response=True
+        )
+    assert response is not None
+    (result,) = response["results"].values()
+    assert result["success"]
+
+
+async def test_set_names_keeps_unlisted_labels(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Relabelling one input rewrites the others unchanged."""
+    await hass.services.async_call(
+        DOMAIN,
+        "set_names",
+        {"inputs": {"2": "Apple"}, "presets": {"3": "Movie"}},
+        blocking=True,
+    )
+    assert (
+        "namein1?Roku?namein2?Apple?namein3?PC?namein4?NintSw?"
+        "nameout1?LivTV?nameout2?Kitchn?nameout3?Office?nameout4?Bdrm?"
+    ) in mock_device.requests
+    assert "mname3?Movie?" in mock_device.requests
+
+
+async def test_set_names_rereads_labels_older_than_a_poll(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """A label renamed on the device since an old poll is not reverted."""
+    mock_device.set_state({**DEVICE_STATE, "namein3": "Xbox"})
+    with aged_poll():
+        await hass.services.async_call(
+            DOMAIN, "set_names", {"inputs": {"2": "Apple"}}, blocking=True
+        )
+    assert any(
+        request.startswith("namein1?Roku?namein2?Apple?namein3?Xbox?")
+        for request in mock_device.requests
+    )
+
+
+async def test_saved_preset_is_indexed_and_recall_skipped_when_active(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """Saving captures the routing; recalling the active preset sends nothing."""
+    coordinator = setup_integration.runtime_data
+    await hass.services.async_call(DOMAIN, "save_preset", {"index": 3}, blocking=True)
+    await hass.async_block_till_done()
+    assert "save=3" in mock_device.requests
+    assert coordinator.active_preset == 3
+    state = hass.states.get("select.hdmi_matrix_recall_preset")
+    assert state is not None
+    assert state.state == "3: Preset3"
+
+    mock_device.requests.clear()
+    await hass.services.async_call(DOMAIN, "recall_preset", {"index": 3}, blocking=True)
+    assert mock_device.requests == []
+
+    # A poll too old to vouch for the routing does not suppress the recall.
+    with patch(f"{COORDINATOR}.FRESH_STATE_MAX_AGE", -1):
+        await hass.services.async_call(
+            DOMAIN, "recall_preset", {"index": 3}, blocking=True
+        )
+    assert mock_device.requests == ["call=3"]
+    mock_device.requests.clear()
+
+    mock_device.set_state({**DEVICE_STATE, "out2": 4})
+    await coordinator.async_refresh()
+    assert coordinator.active_preset is None
+    await hass.services.async_call(DOMAIN, "recall_preset", {"index": 3}, blocking=True)
+    assert "call=3" in mock_device.requests
+
+
+async def test_recall_sent_once_routing_left_the_saved_preset(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+) -> None:
+    """The slot may have been re-saved from the front panel in the meantime."""
+    coordinator = setup_integration.runtime_data
+    await hass.services.async_call(DOMAIN, "save_preset", {"index": 3}, blocking=True)
+
+    mock_device.set_state({**DEVICE_STATE, "out2": 4})
+    await coordinator.async_refresh()
+    mock_device.set_state(DEVICE_STATE)
+    await coordinator.async_refresh()
+    assert coordinator.active_preset == 3
+
+    mock_device.requests.clear()
+    await hass.services.async_call(DOMAIN, "recall_preset", {"index": 3}, blocking=True)
+    assert mock_device.requests == ["call=3"]
+
+    # The recall put the preset in place again.
+    await coordinator.async_refresh()
+    mock_device.requests.clear()
+    await hass.services.async_call(DOMAIN, "recall_preset", {"index": 3}, blocking=True)
+    assert mock_device.requests == []
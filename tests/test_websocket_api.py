@@ -0,0 +1,117 @@
+"""Tests for the WebSocket snapshot and subscription commands."""
+
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import WebSocketGenerator
+
+from custom_components.gofanco_prophecy.const import DOMAIN
+
+from .conftest import DEVICE_STATE, FakeDevice
+
+
+async def test_snapshot(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    hass_ws_client: WebSocketGenerator,
+) -> None:
+    """The snapshot holds the whole matrix in one message."""
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {"type": "gofanco_prophecy/snapshot", "entry_id": setup_integration.entry_id}
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+    result = msg["result"]
+    assert result["power"] is True
+    assert result["routing"] == {"1": 1, "2": 2, "3": 3, "4": 4}
+    assert result["input_names"]["1"] == "Roku"
+    assert result["preset_names"]["8"] == "Preset8"
+
+
+async def test_subscribe_streams_only_changes(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    mock_device: FakeDevice,
+    hass_ws_client: WebSocketGenerator,
+) -> None:
+    """After the initial snapshot, only changed fields are sent."""
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {"type": "gofanco_prophecy/subscribe", "entry_id": setup_integration.entry_id}
+    )
+    assert (await client.receive_json())["success"]
+    initial = await client.receive_json()
+    assert initial["event"]["routing"]["1"] == 1
+
+    mock_device.set_state({**DEVICE_STATE, "out2": 3})
+    await setup_integration.runtime_data.async_refresh()
+    msg = await client.receive_json()
+    assert msg["event"] == {"routing": {"2": 3}}
+
+
+async def test_unknown_entry(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    hass_ws_client: WebSocketGenerator,
+) -> None:
+    """Commands for an entry that isn't a loaded matrix fail cleanly."""
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {"type": "gofanco_prophecy/snapshot", "entry_id": "nope"}
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "not_found"
+
+
+async def test_subscription_ends_when_entry_reloads(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    hass_ws_client: WebSocketGenerator,
+) -> None:
+    """Unloading the entry ends the subscription so it can be renewed."""
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {"type": "gofanco_prophecy/subscribe", "entry_id": setup_integration.entry_id}
+    )
+    assert (await client.receive_json())["success"]
+    await client.receive_json()
+
+    assert await hass.config_entries.async_reload(setup_integration.entry_id)
+    await hass.async_block_till_done()
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "not_found"
+
+    await client.send_json_auto_id(
+        {"type": "gofanco_prophecy/subscribe", "entry_id": setup_integration.entry_id}
+    )
+    assert (await client.receive_json())["success"]
+
+
+async def test_ended_subscriptions_leave_nothing_behind(
+    hass: HomeAssistant,
+    setup_integration: MockConfigEntry,
+    hass_ws_client: WebSocketGenerator,
+) -> None:
+    """Unsubscribing drops the subscription from the entry's unload set."""
+    client = await hass_ws_client(hass)
+    live = None
+    for _ in range(3):
+        await client.send_json_auto_id(
+            {
+                "type": "gofanco_prophecy/subscribe",
+                "entry_id": setup_integration.entry_id,
+            }
+        )
+        subscription = (await client.receive_json())["id"]
+        await client.receive_json()
+        live = hass.data[f"{DOMAIN}_ws_subscriptions"][setup_integration.entry_id]
+        assert len(live) == 1
+        await client.send_json_auto_id(
+            {"type": "unsubscribe_events", "subscription": subscription}
+        )
+        assert (await client.receive_json())["success"]
+    assert live == set()